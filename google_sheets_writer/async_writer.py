@@ -0,0 +1,581 @@
+import asyncio
+import gspread
+import logging
+import time
+
+from typing import Dict, List, Literal, Optional, Tuple
+from urllib.parse import quote
+from google_sheets_writer.chunker import AdaptiveChunker, estimate_payload_bytes, is_payload_error
+from google_sheets_writer.rate_limiter import RequestScheduler
+from google_sheets_writer.serializer import get_headers, is_sized, serialize_chunk
+from google_sheets_writer.utils.layout_utils import (
+    is_repeatable,
+    partition_files_query,
+    partition_records,
+    plan_layout,
+    stale_partitions,
+)
+from google_sheets_writer.utils.sync_utils import delete_manifests_request
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+# Google Sheets API Reference: https://developers.google.com/sheets/api/reference/rest
+# Google Drive API Reference: https://developers.google.com/drive/api/reference/rest/v3
+
+SHEETS_API_URL = 'https://sheets.googleapis.com/v4'
+DRIVE_API_URL = 'https://www.googleapis.com/drive/v3'
+SPREADSHEET_MIME_TYPE = 'application/vnd.google-apps.spreadsheet'
+
+
+def a1_range(worksheet_name: str, cell: str) -> str:
+    """
+    Return an A1 range on the provided worksheet, e.g. 'my sheet'!A1.
+    """
+
+    return "'{}'!{}".format(worksheet_name.replace("'", "''"), cell)
+
+
+class AsyncGoogleSheetsWriter:
+    """
+    Asyncio counterpart of GoogleSheetsWriter with the same public methods, all of which are coroutines.
+
+    Requests are sent straight to the REST API through a single httpx.AsyncClient, so every request of
+    every export shares one keep-alive connection pool.  The number of requests in flight is capped by
+    max_concurrency, which lets many exports run concurrently on one writer in one event loop
+    (e.g. with asyncio.gather) without exceeding the cap.  Quota pacing and retries work the same way
+    as in GoogleSheetsWriter.
+
+    Workbooks and worksheets are represented by their API metadata (dicts) rather than gspread objects.
+    Requires the optional httpx dependency.
+    """
+
+    def __init__(
+        self,
+        user_email: Optional[str] = None,  # all new workbooks will be shared with this email
+        auth_type: Literal['oauth', 'service_account'] = 'oauth',  # authorization type
+        credentials=None,  # google.auth credentials, built from auth_type if not provided
+        max_concurrency: int = 10,  # max number of requests in flight across all exports
+        cache_ttl: Optional[float] = 300,  # seconds before cached workbook metadata is refetched (None = never)
+        read_requests_per_minute: float = 60,  # read quota shared by every export of this writer
+        write_requests_per_minute: float = 60,  # write quota shared by every export of this writer
+        max_retries: int = 5,  # retries of a request that failed with a 429 or 5xx before giving up
+        sheets_api_url: str = SHEETS_API_URL,
+        drive_api_url: str = DRIVE_API_URL,
+    ):
+        if httpx is None:
+            raise ImportError('AsyncGoogleSheetsWriter requires httpx, install it with "pip install httpx".')
+
+        self.user_email = user_email
+        self.auth_type = auth_type
+        self.credentials = credentials
+        self.max_concurrency = max_concurrency
+        self.cache_ttl = cache_ttl
+        self.sheets_api_url = sheets_api_url.rstrip('/')
+        self.drive_api_url = drive_api_url.rstrip('/')
+        self.scheduler = RequestScheduler(
+            read_requests_per_minute=read_requests_per_minute,
+            write_requests_per_minute=write_requests_per_minute,
+            max_retries=max_retries,
+            retry_exceptions=(httpx.TransportError,),
+        )
+        self._http_client = None
+        self._semaphore = None
+        self._auth_lock = None
+        self._workbook_cache = {}  # workbook name -> (workbook metadata, time fetched)
+        self._worksheet_cache = {}  # workbook name -> {worksheet title: worksheet properties}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Close the pooled HTTP connections.
+        """
+
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    @property
+    def http_client(self) -> 'httpx.AsyncClient':
+        """
+        Return the shared HTTP client, created on first use so it binds to the running event loop.
+        """
+
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(120, connect=10),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._auth_lock = asyncio.Lock()
+        return self._http_client
+
+    async def _authorization(self) -> Dict[str, str]:
+        """
+        Return the authorization header, refreshing the credentials in a worker thread when needed.  Concurrent
+        requests wait on the same refresh rather than each starting their own.
+        """
+
+        if self.credentials is None or not self.credentials.valid:
+            async with self._auth_lock:
+                loop = asyncio.get_running_loop()
+                if self.credentials is None:
+                    client = await loop.run_in_executor(
+                        None, gspread.oauth if self.auth_type == 'oauth' else gspread.service_account
+                    )
+                    self.credentials = client.auth
+                if not self.credentials.valid:
+                    from google.auth.transport.requests import Request
+                    await loop.run_in_executor(None, self.credentials.refresh, Request())
+        return {'Authorization': f'Bearer {self.credentials.token}'}
+
+    async def _send(self, method: str, url: str, **kwargs) -> dict:
+        """
+        Send a single request and return the decoded JSON response.  Error responses are raised as
+        gspread APIErrors, the same as with GoogleSheetsWriter.
+        """
+
+        client = self.http_client
+        headers = await self._authorization()
+        async with self._semaphore:
+            response = await client.request(method, url, headers=headers, **kwargs)
+        if response.status_code >= 400:
+            raise gspread.exceptions.APIError(response)
+        return response.json() if response.content else {}
+
+    async def _request(
+        self,
+        kind: Literal['read', 'write'],
+        method: str,
+        url: str,
+        retry_ambiguous: bool = True,  # False for requests that aren't safe to repeat, see RequestScheduler
+        **kwargs,
+    ) -> dict:
+        """
+        Send a request through the scheduler, which paces it against the quota and retries failures.
+        """
+
+        return await self.scheduler.call_async(kind, self._send, method, url, retry_ambiguous=retry_ambiguous, **kwargs)
+
+    def _cache_is_fresh(self, fetched_at: float) -> bool:
+        """
+        Returns a boolean indicating whether a cache entry fetched at the provided time is still valid.
+        """
+
+        return self.cache_ttl is None or time.monotonic() - fetched_at < self.cache_ttl
+
+    def invalidate_cache(self, workbook_name: Optional[str] = None):
+        """
+        Drop cached metadata for the provided workbook, or for every workbook if no name is provided.
+        """
+
+        if workbook_name is None:
+            self._workbook_cache.clear()
+            self._worksheet_cache.clear()
+        else:
+            self._workbook_cache.pop(workbook_name, None)
+            self._worksheet_cache.pop(workbook_name, None)
+
+    async def open_workbook(self, workbook_name: str) -> dict:
+        """
+        Return the metadata ({'id', 'name'}) of the workbook with the provided name, searching Drive
+        only if it isn't cached.  Raises SpreadsheetNotFound if the workbook doesn't exist.
+        """
+
+        cached = self._workbook_cache.get(workbook_name)
+        if cached and self._cache_is_fresh(cached[1]):
+            return cached[0]
+
+        self.invalidate_cache(workbook_name)
+        escaped_name = workbook_name.replace('\\', '\\\\').replace("'", "\\'")
+        response = await self._request('read', 'GET', f'{self.drive_api_url}/files', params={
+            'q': f"name = '{escaped_name}' and mimeType = '{SPREADSHEET_MIME_TYPE}' and trashed = false",
+            'fields': 'files(id,name)',
+            'supportsAllDrives': 'true',
+            'includeItemsFromAllDrives': 'true',
+        })
+        if not response.get('files'):
+            raise gspread.exceptions.SpreadsheetNotFound(workbook_name)
+
+        wb = response['files'][0]
+        self._workbook_cache[workbook_name] = (wb, time.monotonic())
+        return wb
+
+    async def fetch_sheet_metadata(self, workbook_name: str) -> dict:
+        """
+        Fetch the properties of every worksheet in the provided workbook with a single API call and
+        cache them by title.  Returns a dict of worksheet title to worksheet properties.
+        """
+
+        wb = await self.open_workbook(workbook_name)
+        response = await self._request(
+            'read', 'GET', f'{self.sheets_api_url}/spreadsheets/{wb["id"]}', params={'fields': 'sheets.properties'}
+        )
+        worksheets = {sheet['properties']['title']: sheet['properties'] for sheet in response.get('sheets', [])}
+        self._worksheet_cache[workbook_name] = worksheets
+        return worksheets
+
+    async def get_worksheets(self, workbook_name: str) -> dict:
+        """
+        Return a dict of worksheet title to worksheet properties for the provided workbook, fetching
+        the metadata only if it isn't cached.
+        """
+
+        await self.open_workbook(workbook_name)  # Expires the worksheet cache along with the workbook
+        worksheets = self._worksheet_cache.get(workbook_name)
+        if worksheets is None:
+            worksheets = await self.fetch_sheet_metadata(workbook_name)
+        return worksheets
+
+    async def open_worksheet(self, workbook_name: str, worksheet_name: str) -> dict:
+        """
+        Return the properties of the worksheet with the provided name.  Raises WorksheetNotFound if the
+        worksheet doesn't exist.
+        """
+
+        worksheets = await self.get_worksheets(workbook_name)
+        try:
+            return worksheets[worksheet_name]
+        except KeyError:
+            raise gspread.exceptions.WorksheetNotFound(worksheet_name)
+
+    async def batch_update(self, workbook_name: str, requests: List[dict]) -> dict:
+        """
+        Send batchUpdate requests to the provided workbook and refresh the cached worksheet properties
+        from the response.  Returns the response.
+        """
+
+        wb = await self.open_workbook(workbook_name)
+        url = f'{self.sheets_api_url}/spreadsheets/{wb["id"]}:batchUpdate'
+        response = await self._request('write', 'POST', url, retry_ambiguous=is_repeatable(requests), json={
+            'requests': requests,
+            'includeSpreadsheetInResponse': True,
+            'responseIncludeGridData': False,
+        })
+        self._worksheet_cache[workbook_name] = {
+            sheet['properties']['title']: sheet['properties']
+            for sheet in response['updatedSpreadsheet']['sheets']
+        }
+        return response
+
+    async def apply_layout(
+        self,
+        workbook_name: str,
+        desired_sheets: Dict[str, Tuple[int, int]],
+        prefix: Optional[str],  # None only deletes "Sheet1"
+        clear: bool = True,
+    ) -> dict:
+        """
+        Bring a workbook to the desired set of worksheets (title -> (rows, cols)) with a single batchUpdate
+        request, see GoogleSheetsWriter.apply_layout.  Returns a dict of worksheet title to worksheet properties.
+        """
+
+        existing_sheets = await self.get_worksheets(workbook_name)
+        requests = plan_layout(
+            existing_sheets={title: properties['sheetId'] for title, properties in existing_sheets.items()},
+            desired_sheets=desired_sheets,
+            prefix=prefix,
+            clear=clear,
+        )
+        requests.append(delete_manifests_request())  # The sync manifests no longer describe the data
+        await self.batch_update(workbook_name, requests)
+        logging.info(f'Applied {len(requests):,} layout changes to "{workbook_name}" workbook.')
+        return self._worksheet_cache[workbook_name]
+
+    async def get_last_cell(self, workbook_name: str, worksheet_name: str) -> str:
+        """
+        Given a workbook and worksheet name, return the cell address of the next empty cell in column A.
+        """
+
+        wb = await self.open_workbook(workbook_name)
+        cell_range = quote(a1_range(worksheet_name, 'A:A'), safe='')
+        response = await self._request(
+            'read', 'GET', f'{self.sheets_api_url}/spreadsheets/{wb["id"]}/values/{cell_range}',
+            params={'majorDimension': 'COLUMNS'},
+        )
+        values = response.get('values') or [[]]
+        return f'A{len(values[0]) + 1}'
+
+    async def create_workbook(self, name: str):
+        """
+        Create a new workbook and share it with the provided user_email.
+        """
+
+        response = await self._request(
+            'write', 'POST', f'{self.sheets_api_url}/spreadsheets', retry_ambiguous=False, json={
+                'properties': {'title': name},
+            },
+        )
+        wb = {'id': response['spreadsheetId'], 'name': name}
+        if self.user_email:
+            await self._request('write', 'POST', f'{self.drive_api_url}/files/{wb["id"]}/permissions', params={
+                'supportsAllDrives': 'true',
+            }, json={'type': 'user', 'role': 'writer', 'emailAddress': self.user_email})
+        self.invalidate_cache(name)
+        self._workbook_cache[name] = (wb, time.monotonic())
+        self._worksheet_cache[name] = {
+            sheet['properties']['title']: sheet['properties'] for sheet in response.get('sheets', [])
+        }
+        logging.info(f'Created "{name}" workbook.')
+
+    async def create_worksheet(self, workbook_name: str, worksheet_name: str, num_rows: int, num_cols: int) -> dict:
+        """
+        Create a new worksheet in the provided workbook.  Returns the worksheet properties.
+        """
+
+        await self.batch_update(workbook_name, [{
+            'addSheet': {
+                'properties': {
+                    'title': worksheet_name,
+                    'gridProperties': {'rowCount': num_rows, 'columnCount': num_cols},
+                },
+            }
+        }])
+        logging.info(f'Created "{worksheet_name}" worksheet in "{workbook_name}" workbook.')
+        return self._worksheet_cache[workbook_name][worksheet_name]
+
+    async def delete_object(self, workbook_name: str, worksheet_name: Optional[str] = None):
+        """
+        Delete a worksheet or a workbook
+        """
+
+        if worksheet_name:
+            worksheet = await self.open_worksheet(workbook_name, worksheet_name)
+            await self.batch_update(workbook_name, [{'deleteSheet': {'sheetId': worksheet['sheetId']}}])
+        else:
+            wb = await self.open_workbook(workbook_name)
+            await self._request('write', 'DELETE', f'{self.drive_api_url}/files/{wb["id"]}', params={
+                'supportsAllDrives': 'true',
+            })
+            self.invalidate_cache(workbook_name)
+
+    async def check_existence(self, workbook_name: str, worksheet_name: Optional[str] = None) -> bool:
+        """
+        Returns a boolean indicating whether a workbook or worksheet exists.
+        Providing a worksheet name is optional.
+        """
+
+        try:
+            if worksheet_name:
+                await self.open_worksheet(workbook_name, worksheet_name)
+            else:
+                await self.open_workbook(workbook_name)
+            return True
+        except (gspread.exceptions.SpreadsheetNotFound, gspread.exceptions.WorksheetNotFound):
+            return False
+
+    async def list_workbooks(self, prefix: Optional[str] = None) -> List[dict]:
+        """
+        Return the metadata ({'id', 'name'}) of the spreadsheets the account can see, one Drive listing request
+        per page of 1,000 spreadsheets.  If a prefix is provided, only spreadsheets named "<prefix>_..." are
+        listed, with a Drive query for just those names.
+        """
+
+        query = partition_files_query(prefix) if prefix else f"mimeType = '{SPREADSHEET_MIME_TYPE}' and trashed = false"
+        files, page_token = [], None
+        while True:
+            params = {
+                'q': query,
+                'fields': 'nextPageToken,files(id,name)',
+                'pageSize': '1000',
+                'supportsAllDrives': 'true',
+                'includeItemsFromAllDrives': 'true',
+            }
+            if page_token:
+                params['pageToken'] = page_token
+            response = await self._request('read', 'GET', f'{self.drive_api_url}/files', params=params)
+            files.extend(response.get('files', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return files
+
+    async def cleanup(self, max_objects: int, workbook_name: str, worksheet_name: Optional[str] = None):
+        """
+        Delete all worksheets or workbooks that are greater than or equal to the provided max_objects value.
+
+        Stale worksheets are deleted with a single batchUpdate request, stale workbooks are found with a
+        Drive query for the "<workbook_name>_..." spreadsheets and deleted concurrently.  Every stale object
+        is deleted, including any past a gap.
+        """
+
+        if worksheet_name:
+            try:
+                worksheets = await self.get_worksheets(workbook_name)
+            except gspread.exceptions.SpreadsheetNotFound:
+                return
+            sheet_ids = stale_partitions(
+                ((title, ws['sheetId']) for title, ws in worksheets.items()), worksheet_name, max_objects
+            )
+            if sheet_ids:
+                await self.batch_update(workbook_name, [
+                    {'deleteSheet': {'sheetId': sheet_id}} for sheet_id in sheet_ids
+                ])
+            return
+
+        files = await self.list_workbooks(prefix=workbook_name)
+        stale = stale_partitions(((wb['name'], wb) for wb in files), workbook_name, max_objects)
+
+        async def delete_workbook(wb):
+            await self._request('write', 'DELETE', f'{self.drive_api_url}/files/{wb["id"]}', params={
+                'supportsAllDrives': 'true',
+            })
+            self.invalidate_cache(wb['name'])
+
+        await asyncio.gather(*[delete_workbook(wb) for wb in stale])
+        if stale:
+            logging.info(f'Deleted {len(stale):,} stale "{workbook_name}" workbooks.')
+
+    async def _write_chunks(
+        self,
+        workbook_name: str,
+        worksheet_name: str,
+        chunks,
+        headers: List[str],
+        chunker: AdaptiveChunker,
+    ) -> int:
+        """
+        Write chunks of records to a worksheet starting at A1, with the headers folded into the first chunk.
+        Chunks are serialized in a worker thread so the event loop keeps serving other exports.  A chunk that
+        fails as an oversized payload is split in half and each half uploaded, down to a single row.  Returns
+        the number of records written.
+        """
+
+        loop = asyncio.get_running_loop()
+        wb = await self.open_workbook(workbook_name)
+
+        async def upload(start_row, values, n_bytes):
+            # Write the rows from start_row, halving them after an oversized payload down to a single row
+            cell_range = a1_range(worksheet_name, f'A{start_row}')
+            url = f'{self.sheets_api_url}/spreadsheets/{wb["id"]}/values/{quote(cell_range, safe="")}'
+            start = time.monotonic()
+            try:
+                await self._request(
+                    'write', 'PUT', url,
+                    params={'valueInputOption': 'RAW'},
+                    json={'range': cell_range, 'majorDimension': 'ROWS', 'values': values},
+                )
+            except Exception as error:
+                failed = is_payload_error(error) or isinstance(error, httpx.TransportError)
+                chunker.record_upload(n_bytes, time.monotonic() - start, failed=failed)
+                if len(values) < 2 or not failed:
+                    raise
+                half = len(values) // 2
+                logging.warning(f'Upload of {len(values):,} rows failed ({error}), retrying in two halves...')
+                await upload(start_row, values[:half], estimate_payload_bytes(values[:half]))
+                await upload(start_row + half, values[half:], estimate_payload_bytes(values[half:]))
+                return
+            chunker.record_upload(n_bytes, time.monotonic() - start)
+
+        next_row = 1
+        records_written = 0
+        for chunk in chunks:
+            # Convert to rows of strings in header order, missing values become None
+            values = await loop.run_in_executor(None, serialize_chunk, chunk, headers)
+            n_bytes = chunker.observe_payload(len(chunk), values)
+            if next_row == 1:
+                values = [headers] + values
+
+            # Write data to next available row
+            await upload(next_row, values, n_bytes)
+            next_row += len(values)
+            records_written += len(chunk)
+
+        return records_written
+
+    async def _write_workbook(
+        self,
+        data_lod,
+        workbook_name: str,
+        _workbook_name: str,
+        worksheet_ranges: List[Tuple[int, int]],
+        headers: List[str],
+        chunker: AdaptiveChunker,
+    ) -> int:
+        """
+        Create and lay out one workbook of a write, then write its worksheets concurrently.  Returns the
+        number of records written.
+        """
+
+        logging.info(f'Starting write to "{_workbook_name}" workbook...')
+
+        # Create workbook if it doesn't exist
+        if not await self.check_existence(workbook_name=_workbook_name):
+            await self.create_workbook(_workbook_name)
+
+        # Create, clear and resize worksheets and remove "Sheet1" and stale worksheets in one request
+        worksheet_names = [workbook_name + f'_{j}' for j in range(1, len(worksheet_ranges) + 1)]
+        await self.apply_layout(
+            workbook_name=_workbook_name,
+            desired_sheets={
+                name: (n_records_to_write + 1, len(headers))  # Plus one row for the headers
+                for name, (_, n_records_to_write) in zip(worksheet_names, worksheet_ranges)
+            },
+            prefix=workbook_name,
+        )
+
+        records_written = await asyncio.gather(*[
+            self._write_chunks(
+                _workbook_name,
+                name,
+                chunker.chunks(data_lod, start=start, n_records=n_records_to_write),
+                headers,
+                chunker,
+            )
+            for name, (start, n_records_to_write) in zip(worksheet_names, worksheet_ranges)
+        ])
+        logging.info(
+            f'Wrote {sum(records_written):,} records to "{_workbook_name}" in {len(worksheet_names):,} sheets.'
+        )
+        return sum(records_written)
+
+    async def write_to_gsheets(
+        self,
+        data_lod,
+        workbook_name: str,
+        chunk_size: Optional[int] = 100_000,
+        max_cells_per_sheet: Optional[int] = 3_000_000,
+        max_cells_per_workbook: Optional[int] = 9_000_000,
+        headers: Optional[List[str]] = None,
+        chunk_bytes: Optional[int] = 2_000_000,
+    ):
+        """
+        Write a list of dicts, a pandas DataFrame or a NumPy record array to Google Sheets, split across
+        workbooks and worksheets the same way as GoogleSheetsWriter.write_to_gsheets.  Workbooks and
+        their worksheets are written concurrently, within the writer's concurrency cap and quotas.
+
+        Iterables of unknown length aren't supported, use GoogleSheetsWriter to stream them.
+        """
+
+        if not is_sized(data_lod):
+            raise TypeError('AsyncGoogleSheetsWriter needs a list, DataFrame or record array, not a stream.')
+
+        # Get header names, every row is written in this column order
+        headers = headers or get_headers(data_lod)
+        chunker = AdaptiveChunker(max_rows=chunk_size, target_bytes=chunk_bytes)
+        workbook_partitions = partition_records(
+            n_records=len(data_lod),
+            n_cols=len(headers),
+            max_cells_per_sheet=max_cells_per_sheet,
+            max_cells_per_workbook=max_cells_per_workbook,
+        )
+
+        await asyncio.gather(*[
+            self._write_workbook(data_lod, workbook_name, workbook_name + f'_{i}', worksheet_ranges, headers, chunker)
+            for i, worksheet_ranges in enumerate(workbook_partitions, start=1)
+        ])
+
+        # Remove any extra workbooks from previous runs
+        await self.cleanup(
+            workbook_name=workbook_name,
+            max_objects=len(workbook_partitions) + 1,
+        )
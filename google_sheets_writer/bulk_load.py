@@ -0,0 +1,66 @@
+import csv
+import io
+
+from typing import Iterable, Iterator, List, Optional
+
+# Drive API resumable uploads: https://developers.google.com/drive/api/guides/manage-uploads#resumable
+# Drive API import to Google Docs types: https://developers.google.com/drive/api/guides/manage-uploads#import-docs
+
+UPLOAD_URL = 'https://www.googleapis.com/upload/drive/v3/files'
+SPREADSHEET_MIME_TYPE = 'application/vnd.google-apps.spreadsheet'
+UPLOAD_ALIGNMENT = 256 * 1024  # Every piece of a resumable upload but the last must be a multiple of this size
+
+
+def csv_pieces(
+    chunks: Iterable[List[List[Optional[str]]]],  # chunks of rows, e.g. the header row and then serialized chunks
+    piece_bytes: int = 8 * UPLOAD_ALIGNMENT,  # size of every piece but the last
+) -> Iterator[bytes]:
+    """
+    Encode chunks of rows of strings as UTF-8 CSV and yield it in pieces of exactly piece_bytes bytes,
+    except for the last piece, which holds whatever is left.  None is written as an empty cell.  Only one
+    chunk and one piece are held in memory at a time.
+    """
+
+    if piece_bytes % UPLOAD_ALIGNMENT:
+        raise ValueError(f'piece_bytes must be a multiple of {UPLOAD_ALIGNMENT:,} bytes.')
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    pending = bytearray()
+    for rows in chunks:
+        writer.writerows(rows)
+        pending += buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        while len(pending) >= piece_bytes:
+            yield bytes(pending[:piece_bytes])
+            del pending[:piece_bytes]
+    if pending:
+        yield bytes(pending)
+
+
+def start_upload(client, name: str) -> str:
+    """
+    Start a resumable upload of a CSV file that Drive converts into a spreadsheet with the provided name.
+    Returns the URL of the upload session.
+    """
+
+    response = client.request(
+        'post',
+        UPLOAD_URL,
+        params={'uploadType': 'resumable', 'supportsAllDrives': True},
+        json={'name': name, 'mimeType': SPREADSHEET_MIME_TYPE},
+        headers={'X-Upload-Content-Type': 'text/csv'},
+    )
+    return response.headers['Location']
+
+
+def upload_piece(client, session_url: str, piece: bytes, offset: int, total: Optional[int] = None) -> Optional[dict]:
+    """
+    Upload a piece of a resumable upload, starting at the provided byte offset.  The total size is only
+    known, and must be provided, with the last piece.  Returns the created file ({'id', 'name'}) once
+    the last piece is uploaded, None before that.
+    """
+
+    content_range = f'bytes {offset}-{offset + len(piece) - 1}/{"*" if total is None else total}'
+    response = client.request('put', session_url, data=piece, headers={'Content-Range': content_range})
+    return response.json() if total is not None else None
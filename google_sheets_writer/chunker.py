@@ -0,0 +1,148 @@
+import requests
+import threading
+
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+from google_sheets_writer.serializer import is_sized
+
+# Google recommends a max payload of 2 MB per request: https://developers.google.com/sheets/api/limits
+
+
+def cell_bytes(value) -> int:
+    """
+    Return the size in bytes of a single value in a JSON payload, separator included.
+    """
+
+    if value is None:
+        return 5
+    if isinstance(value, str):
+        return len(value) + 3
+    return len(str(value)) + 1
+
+
+def estimate_payload_bytes(values: List[List], sample_size: Optional[int] = 50) -> int:
+    """
+    Estimate the size in bytes of the JSON payload for the provided rows of values from an evenly
+    spaced sample of rows.  Every cell adds its quotes and separator, every row its brackets.  Typed
+    values (numbers and booleans) have no quotes and count by the length of their text.
+    """
+
+    if not values:
+        return 0
+    step = max(1, len(values) // sample_size) if sample_size else 1
+    sample = values[::step]
+    sample_bytes = sum(sum(cell_bytes(value) for value in row) + 2 for row in sample)
+    return round(sample_bytes * len(values) / len(sample))
+
+
+class AdaptiveChunker:
+    """
+    Splits records into chunks sized by payload bytes rather than by a fixed record count.  The number of
+    records per chunk is worked out from the average serialized record size observed so far, and the
+    byte budget itself is tuned from the latency and failures of the uploads: it shrinks when requests
+    are slow or fail and grows again while they are fast.
+
+    A chunker is thread-safe, so one can be shared by every worksheet of a write.  With a target_bytes
+    of None, every chunk holds max_rows records.
+    """
+
+    def __init__(
+        self,
+        max_rows: Optional[int] = 100_000,  # upper bound on records per chunk (None = no bound)
+        target_bytes: Optional[int] = 2_000_000,  # starting byte budget per request (None = fixed size chunks)
+        min_bytes: int = 100_000,  # lower bound of the byte budget
+        max_bytes: int = 8_000_000,  # upper bound of the byte budget
+        target_latency: float = 10,  # seconds, uploads slower than this shrink the budget
+        initial_rows: int = 1_000,  # records in the first chunk, before any record size is known
+    ):
+        self.max_rows = max_rows
+        self.target_bytes = target_bytes
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.target_latency = target_latency
+        self.initial_rows = initial_rows
+        self._row_bytes = None  # running average of serialized bytes per record
+        self._lock = threading.Lock()
+
+    def next_size(self) -> Optional[int]:
+        """
+        Return the number of records to put in the next chunk.
+        """
+
+        if self.target_bytes is None:
+            return self.max_rows
+
+        with self._lock:
+            if self._row_bytes is None:
+                size = self.initial_rows
+            else:
+                size = max(1, int(self.target_bytes / self._row_bytes))
+        return size if self.max_rows is None else min(size, self.max_rows)
+
+    def chunks(self, data: Iterable, start: int = 0, n_records: Optional[int] = None) -> Iterator:
+        """
+        Yield chunks of records.  Sized data (lists, DataFrames, ...) is sliced from record start onwards,
+        anything else is pulled from as an iterator.  At most n_records records are yielded, so chunks
+        never cross a worksheet boundary.
+        """
+
+        remaining = len(data) - start if is_sized(data) and n_records is None else n_records
+        iterator = None if is_sized(data) else iter(data)
+        while remaining is None or remaining > 0:
+            size = self.next_size()
+            if remaining is not None:
+                size = remaining if size is None else min(size, remaining)
+            if iterator is None:
+                chunk = data[start:start + size] if size is not None else data[start:]
+                start += len(chunk)
+            else:
+                chunk = list(islice(iterator, size))
+            if not len(chunk):
+                return
+            yield chunk
+            if remaining is not None:
+                remaining -= len(chunk)
+
+    def observe_payload(self, n_records: int, values: List[List]) -> int:
+        """
+        Update the average record size from a serialized chunk.  Returns the estimated payload bytes.
+        """
+
+        n_bytes = estimate_payload_bytes(values)
+        if n_records:
+            with self._lock:
+                row_bytes = n_bytes / n_records
+                self._row_bytes = row_bytes if self._row_bytes is None else (self._row_bytes + row_bytes) / 2
+        return n_bytes
+
+    def record_upload(self, n_bytes: int, seconds: float, failed: bool = False):
+        """
+        Tune the byte budget from the outcome of an upload: halve it after a failure, scale it down
+        when the upload was slower than the target latency, and grow it while uploads are fast.
+        """
+
+        if self.target_bytes is None:
+            return
+
+        with self._lock:
+            if failed:
+                target = self.target_bytes / 2
+            elif seconds > self.target_latency:
+                target = self.target_bytes * max(0.5, self.target_latency / seconds)
+            elif seconds < self.target_latency / 2 and n_bytes >= self.target_bytes / 2:
+                target = self.target_bytes * 1.5  # Only grow when the budget was actually used
+            else:
+                return
+            self.target_bytes = int(min(self.max_bytes, max(self.min_bytes, target)))
+
+
+def is_payload_error(error: Exception) -> bool:
+    """
+    Returns a boolean indicating whether a failed upload points at an oversized payload (timeouts,
+    dropped connections, 413 and 5xx responses) rather than at e.g. the quota or bad data.
+    """
+
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+    return isinstance(status_code, int) and (status_code == 413 or status_code >= 500)
@@ -0,0 +1,716 @@
+import collections
+import copy
+import csv
+import io
+import itertools
+import json
+import re
+import threading
+import time
+
+import gspread
+import requests
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional, Tuple
+from urllib.parse import parse_qs, parse_qsl, unquote, urlencode, urlparse
+
+# Google Sheets API Limits: https://developers.google.com/sheets/api/limits
+# Google Sheets Worksheet Size Limits: https://support.google.com/drive/answer/37603
+
+MAX_CELLS_PER_SPREADSHEET = 10_000_000
+SPREADSHEET_MIME_TYPE = 'application/vnd.google-apps.spreadsheet'
+
+
+class FakeAPIError(Exception):
+    """
+    Raised while handling a request to return an error response.
+    """
+
+    STATUS = {400: 'INVALID_ARGUMENT', 404: 'NOT_FOUND', 413: 'PAYLOAD_TOO_LARGE', 429: 'RESOURCE_EXHAUSTED'}
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+    def body(self) -> dict:
+        return {'error': {'code': self.code, 'message': self.message, 'status': self.STATUS.get(self.code, 'UNKNOWN')}}
+
+
+def column_index(letters: str) -> int:
+    """
+    Convert column letters (A, B, ..., AA, ...) into a zero based column index.
+    """
+
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def parse_range(a1_range: str) -> Tuple[str, int, int, Optional[int], Optional[int]]:
+    """
+    Parse an A1 range such as "'Sheet 1'!A5", "Sheet1!A1:C" or "'Sheet1'!A:A" into (sheet title, first
+    column, first row, last column, last row), with zero based columns, one based rows and None for
+    open ends.
+    """
+
+    title, _, cells = a1_range.rpartition('!') if '!' in a1_range else (a1_range, '!', '')
+    if len(title) > 1 and title.startswith("'") and title.endswith("'"):
+        escaped = "'" not in title[1:-1].replace("''", '')  # Quotes inside a quoted title are doubled
+        title = title[1:-1].replace("''", "'")
+    else:
+        escaped = "'" not in title  # Titles with quotes have to be quoted
+    match = re.fullmatch(r'([A-Za-z]*)(\d*)(?::([A-Za-z]*)(\d*))?', cells)
+    if not title or not escaped or not match:
+        raise FakeAPIError(400, f'Unable to parse range: {a1_range}')
+    first_letters, first_digits, last_letters, last_digits = match.groups()
+    if last_letters is None and first_digits:
+        last_letters, last_digits = '', ''  # A single start cell, e.g. "A5", is open ended
+    elif last_letters is None:
+        last_letters, last_digits = first_letters, ''  # A whole column, e.g. "A"
+    return (
+        title,
+        column_index(first_letters) if first_letters else 0,
+        int(first_digits) if first_digits else 1,
+        column_index(last_letters) if last_letters else None,
+        int(last_digits) if last_digits else None,
+    )
+
+
+def strip_empty(values: list) -> list:
+    """
+    Return the values without their trailing empty strings.
+    """
+
+    return values[:max((i + 1 for i, value in enumerate(values) if value != ''), default=0)]
+
+
+def cell_value(cell: dict) -> Any:
+    """
+    Return the value of a CellData of an updateCells request, None if it has none.
+    """
+
+    value = cell.get('userEnteredValue', {})
+    return next((value[kind] for kind in ('stringValue', 'numberValue', 'boolValue') if kind in value), None)
+
+
+class FakeSheetsBackend:
+    """
+    In-memory stand-in for the Google Sheets and Drive APIs, covering the endpoints used by the writers.
+    Spreadsheets are kept in memory and the API's grid, cell and payload limits are enforced, so a writer
+    can be run end to end offline and the number of requests, bytes and cells it costs can be measured.
+
+    Latency, per-minute quotas (answered with a 429 like Google does) and one-off failures (status codes
+    queued in fail_next) can be injected.  Point GoogleSheetsWriter at client(), or AsyncGoogleSheetsWriter
+    at a FakeSheetsServer serving the backend.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0,  # seconds added to every request
+        read_requests_per_minute: Optional[int] = None,  # read quota, None = unlimited
+        write_requests_per_minute: Optional[int] = None,  # write quota, None = unlimited
+        max_request_bytes: Optional[int] = None,  # larger request bodies are answered with a 413
+    ):
+        self.latency = latency
+        self.quotas = {'read': read_requests_per_minute, 'write': write_requests_per_minute}
+        self.max_request_bytes = max_request_bytes
+        self.spreadsheets = {}  # id -> {'title': str, 'sheets': [sheet], 'trashed': bool}
+        self.permissions = []  # (spreadsheet id, permission)
+        self.requests = []  # (method, path)
+        self.fail_next = []  # status codes to return before serving requests
+        self.uploads = {}  # upload id -> {'name': str, 'data': bytearray}, while a resumable upload is in progress
+        self._ids = itertools.count(1)
+        self._request_times = {'read': collections.deque(), 'write': collections.deque()}
+        self._lock = threading.RLock()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        """
+        Reset every metric to zero.
+        """
+
+        with self._lock:
+            self._metrics = {
+                'read_requests': 0,
+                'write_requests': 0,
+                'errors': 0,  # requests answered with an error status
+                'bytes_sent': 0,  # request bodies sent to the backend
+                'bytes_received': 0,  # response bodies sent back
+                'cells_written': 0,
+            }
+
+    def metrics(self) -> dict:
+        """
+        Return a snapshot of the request metrics since the backend was created or last reset.
+        """
+
+        with self._lock:
+            return dict(self._metrics)
+
+    def client(self) -> gspread.Client:
+        """
+        Return a gspread client whose requests are served by this backend.
+        """
+
+        return gspread.Client(auth=None, session=FakeSession(self))
+
+    def spreadsheet_by_title(self, title: str) -> dict:
+        return next(s for s in self.spreadsheets.values() if s['title'] == title)
+
+    def sheet_titles(self, spreadsheet_title: str) -> List[str]:
+        return [sheet['properties']['title'] for sheet in self.spreadsheet_by_title(spreadsheet_title)['sheets']]
+
+    def sheet_values(self, spreadsheet_title: str, sheet_title: str) -> List[list]:
+        """
+        Return the rows of a sheet, in order, as lists of values.
+        """
+
+        spreadsheet = self.spreadsheet_by_title(spreadsheet_title)
+        sheet = next(s for s in spreadsheet['sheets'] if s['properties']['title'] == sheet_title)
+        return [sheet['values'][row] for row in sorted(sheet['values'])]
+
+    def sheet_formats(self, spreadsheet_title: str, sheet_title: str) -> dict:
+        """
+        Return the number formats of the columns of a sheet, as zero based column index -> number format.
+        """
+
+        spreadsheet = self.spreadsheet_by_title(spreadsheet_title)
+        sheet = next(s for s in spreadsheet['sheets'] if s['properties']['title'] == sheet_title)
+        return dict(sheet['formats'])
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        params: dict,
+        payload: bytes,
+        headers: Optional[dict] = None,
+    ) -> Tuple[int, bytes, dict]:
+        """
+        Serve a request.  The path is relative to the API root, e.g. "/spreadsheets/<id>:batchUpdate" or
+        "/files".  Returns the status code, the JSON response body and the response headers.
+        """
+
+        kind = 'read' if method == 'GET' else 'write'
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests.append((method, path))
+            self._metrics[f'{kind}_requests'] += 1
+            self._metrics['bytes_sent'] += len(payload)
+            response_headers = {}
+            try:
+                self._check_limits(kind, payload)
+                if path == '/files' and params.get('uploadType') == 'resumable':
+                    status, body, response_headers = self.upload(method, params, payload, headers or {})
+                else:
+                    status, body = self.route(method, unquote(path), params, json.loads(payload) if payload else {})
+            except FakeAPIError as error:
+                status, body = error.code, error.body()
+            except (KeyError, StopIteration):
+                status, body = 404, FakeAPIError(404, f'Requested entity was not found: {path}').body()
+            if status >= 400:
+                self._metrics['errors'] += 1
+            response = json.dumps(body).encode() if status != 204 else b''
+            self._metrics['bytes_received'] += len(response)
+        return status, response, response_headers
+
+    def _check_limits(self, kind: str, payload: bytes):
+        if self.fail_next:
+            status = self.fail_next.pop(0)
+            raise FakeAPIError(status, 'Injected failure')
+        if self.max_request_bytes is not None and len(payload) > self.max_request_bytes:
+            raise FakeAPIError(413, 'Request payload size exceeds the limit')
+        quota = self.quotas[kind]
+        if quota is not None:
+            now = time.monotonic()
+            request_times = self._request_times[kind]
+            while request_times and now - request_times[0] >= 60:
+                request_times.popleft()
+            if len(request_times) >= quota:
+                raise FakeAPIError(429, f"Quota exceeded for quota metric '{kind.title()} requests' per minute")
+            request_times.append(now)
+
+    def route(self, method: str, path: str, params: dict, body: dict) -> Tuple[int, dict]:
+        # Drive API
+        if path == '/files' and method == 'GET':
+            return 200, {'files': self.list_files(params.get('q', ''))}
+        if path == '/files' and method == 'POST':
+            return 200, {'id': self.create_spreadsheet(body['name']), 'name': body['name']}
+        match = re.fullmatch(r'/files/([^/]+)/permissions', path)
+        if match and method == 'POST':
+            self.spreadsheets[match.group(1)]  # 404 for unknown files
+            self.permissions.append((match.group(1), body))
+            return 200, {'id': f'permission-{next(self._ids)}', 'type': body.get('type'), 'role': body.get('role')}
+        match = re.fullmatch(r'/files/([^/]+)', path)
+        if match and method == 'GET':
+            spreadsheet = self.spreadsheets[match.group(1)]
+            return 200, {'id': match.group(1), 'name': spreadsheet['title'], 'trashed': spreadsheet['trashed']}
+        if match and method == 'DELETE':
+            del self.spreadsheets[match.group(1)]
+            return 204, {}
+
+        # Sheets API
+        if path == '/spreadsheets' and method == 'POST':
+            return 200, self.spreadsheet_response(self.create_spreadsheet(body['properties']['title']))
+        match = re.fullmatch(r'/spreadsheets/([^/:]+)', path)
+        if match and method == 'GET':
+            return 200, self.spreadsheet_response(match.group(1))
+        match = re.fullmatch(r'/spreadsheets/([^/:]+):batchUpdate', path)
+        if match and method == 'POST':
+            return 200, self.batch_update(match.group(1), body)
+        match = re.fullmatch(r'/spreadsheets/([^/:]+)/sheets/(\d+):copyTo', path)
+        if match and method == 'POST':
+            return 200, self.copy_sheet(match.group(1), int(match.group(2)), body['destinationSpreadsheetId'])
+        match = re.fullmatch(r'/spreadsheets/([^/:]+)/values:batchUpdate', path)
+        if match and method == 'POST':
+            responses = [self.values_update(match.group(1), data['range'], data) for data in body.get('data', [])]
+            return 200, {
+                'spreadsheetId': match.group(1),
+                'totalUpdatedCells': sum(response['updatedCells'] for response in responses),
+                'responses': responses,
+            }
+        match = re.fullmatch(r'/spreadsheets/([^/:]+)/values:batchGet', path)
+        if match and method == 'GET':
+            ranges = params.get('ranges', [])
+            return 200, {
+                'spreadsheetId': match.group(1),
+                'valueRanges': [
+                    self.values_get(match.group(1), a1_range, params)
+                    for a1_range in ([ranges] if isinstance(ranges, str) else ranges)
+                ],
+            }
+        match = re.fullmatch(r'/spreadsheets/([^/:]+)/values/(.+)', path)
+        if match and method == 'GET':
+            return 200, self.values_get(match.group(1), match.group(2), params)
+        if match and method == 'PUT':
+            return 200, self.values_update(match.group(1), match.group(2), body)
+
+        raise FakeAPIError(404, f'No route for {method} {path}')
+
+    def list_files(self, query: str) -> List[dict]:
+        # Supports "name = '<name>'", "name contains '<prefix>'", which Drive matches by prefix, and "trashed = false"
+        match = re.search(r"name (=|contains) (['\"])((?:\\.|(?!\2).)*)\2", query)
+        name = re.sub(r'\\(.)', r'\1', match.group(3)) if match else None
+        exact = match is not None and match.group(1) == '='
+        return [
+            {'id': spreadsheet_id, 'name': spreadsheet['title']}
+            for spreadsheet_id, spreadsheet in self.spreadsheets.items()
+            if name is None or (spreadsheet['title'] == name if exact else spreadsheet['title'].startswith(name))
+            if not (spreadsheet['trashed'] and 'trashed = false' in query)
+        ]
+
+    def new_sheet(self, title: str, rows: int = 1000, cols: int = 26, sheet_id: Optional[int] = None) -> dict:
+        return {
+            'properties': {
+                'sheetId': next(self._ids) if sheet_id is None else sheet_id,
+                'title': title,
+                'index': 0,
+                'sheetType': 'GRID',
+                'gridProperties': {'rowCount': rows, 'columnCount': cols},
+            },
+            'values': {},  # row number -> list of values
+            'developerMetadata': [],
+            'formats': {},  # zero based column index -> number format of the column below the header row
+        }
+
+    def create_spreadsheet(self, title: str) -> str:
+        spreadsheet_id = f'spreadsheet-{next(self._ids)}'
+        self.spreadsheets[spreadsheet_id] = {
+            'title': title, 'sheets': [self.new_sheet('Sheet1', sheet_id=0)], 'trashed': False,
+        }
+        return spreadsheet_id
+
+    def spreadsheet_response(self, spreadsheet_id: str) -> dict:
+        spreadsheet = self.spreadsheets[spreadsheet_id]
+        sheets = []
+        for index, sheet in enumerate(spreadsheet['sheets']):
+            sheet['properties']['index'] = index
+            sheets.append({'properties': dict(sheet['properties']), 'developerMetadata': sheet['developerMetadata']})
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'properties': {'title': spreadsheet['title'], 'locale': 'en_US', 'timeZone': 'Etc/GMT'},
+            'sheets': sheets,
+        }
+
+    def find_sheet(self, spreadsheet_id: str, sheet_id: Optional[int] = None, title: Optional[str] = None) -> dict:
+        for sheet in self.spreadsheets[spreadsheet_id]['sheets']:
+            if sheet['properties']['sheetId'] == sheet_id or sheet['properties']['title'] == title:
+                return sheet
+        raise FakeAPIError(400, f'No grid with id: {sheet_id}' if title is None else f'Unable to parse range: {title}')
+
+    def write_cells(self, sheet: dict, first_row: int, first_col: int, rows: List[list]):
+        """
+        Write rows of values into a sheet, enforcing its grid limits.  Rows are replaced rather than
+        mutated, so a batchUpdate can be rolled back from a shallow copy.
+        """
+
+        grid = sheet['properties']['gridProperties']
+        width = max((len(row) for row in rows), default=0)
+        if first_row + len(rows) - 1 > grid['rowCount'] or first_col + width > grid['columnCount']:
+            raise FakeAPIError(400, f"Range ('{sheet['properties']['title']}') exceeds grid limits.")
+        for offset, row in enumerate(rows):
+            current = list(sheet['values'].get(first_row + offset, []))
+            current.extend([None] * (first_col + len(row) - len(current)))
+            current[first_col:first_col + len(row)] = row
+            sheet['values'][first_row + offset] = current
+        self._metrics['cells_written'] += sum(len(row) for row in rows)
+
+    def resize(self, sheet: dict, rows: int, cols: int):
+        sheet['properties']['gridProperties'].update({'rowCount': rows, 'columnCount': cols})
+        for row in [row for row in sheet['values'] if row > rows]:
+            del sheet['values'][row]
+        for row, values in sheet['values'].items():
+            if len(values) > cols:
+                sheet['values'][row] = values[:cols]
+
+    def batch_update(self, spreadsheet_id: str, body: dict) -> dict:
+        """
+        Apply batchUpdate requests atomically: if any request fails, none of them are applied.
+        """
+
+        spreadsheet = self.spreadsheets[spreadsheet_id]
+        snapshot = [
+            (sheet, copy.deepcopy(sheet['properties']), dict(sheet['values']), list(sheet['developerMetadata']),
+             dict(sheet['formats']))
+            for sheet in spreadsheet['sheets']
+        ]
+        sheets_before = list(spreadsheet['sheets'])
+        try:
+            replies = [self.apply_request(spreadsheet, request) for request in body.get('requests', [])]
+            if not spreadsheet['sheets']:
+                raise FakeAPIError(400, 'You can\'t remove all the sheets in a document.')
+            n_cells = sum(
+                sheet['properties']['gridProperties']['rowCount'] * sheet['properties']['gridProperties']['columnCount']
+                for sheet in spreadsheet['sheets']
+            )
+            if n_cells > MAX_CELLS_PER_SPREADSHEET:
+                raise FakeAPIError(
+                    400, f'This action would increase the number of cells in the workbook above the limit of '
+                         f'{MAX_CELLS_PER_SPREADSHEET} cells.'
+                )
+        except Exception:
+            for sheet, properties, values, metadata, formats in snapshot:
+                sheet['properties'], sheet['values'], sheet['developerMetadata'] = properties, values, metadata
+                sheet['formats'] = formats
+            spreadsheet['sheets'] = sheets_before
+            raise
+
+        response = {'spreadsheetId': spreadsheet_id, 'replies': replies}
+        if body.get('includeSpreadsheetInResponse'):
+            response['updatedSpreadsheet'] = self.spreadsheet_response(spreadsheet_id)
+        return response
+
+    def apply_request(self, spreadsheet: dict, request: dict) -> dict:
+        (kind, params), = request.items()
+        spreadsheet_id = next(i for i, s in self.spreadsheets.items() if s is spreadsheet)
+
+        if kind == 'addSheet':
+            properties = params.get('properties', {})
+            title = properties.get('title') or f'Sheet{len(spreadsheet["sheets"]) + 1}'
+            if any(sheet['properties']['title'] == title for sheet in spreadsheet['sheets']):
+                raise FakeAPIError(400, f'A sheet with the name "{title}" already exists.')
+            grid = properties.get('gridProperties', {})
+            rows, cols = grid.get('rowCount', 1000), grid.get('columnCount', 26)
+            sheet = self.new_sheet(title, rows, cols, properties.get('sheetId'))
+            spreadsheet['sheets'].append(sheet)
+            return {'addSheet': {'properties': dict(sheet['properties'])}}
+
+        if kind == 'deleteSheet':
+            sheet = self.find_sheet(spreadsheet_id, sheet_id=params['sheetId'])
+            spreadsheet['sheets'] = [s for s in spreadsheet['sheets'] if s is not sheet]
+            return {}
+
+        if kind == 'updateSheetProperties':
+            properties = params['properties']
+            sheet = self.find_sheet(spreadsheet_id, sheet_id=properties['sheetId'])
+            grid = dict(sheet['properties']['gridProperties'], **properties.get('gridProperties', {}))
+            self.resize(sheet, grid['rowCount'], grid['columnCount'])
+            if 'title' in properties:
+                sheet['properties']['title'] = properties['title']
+            return {}
+
+        if kind == 'updateCells':
+            if 'range' in params:  # Clear a range, only whole sheets are supported
+                self.find_sheet(spreadsheet_id, sheet_id=params['range']['sheetId'])['values'] = {}
+                return {}
+            start = params['start']
+            sheet = self.find_sheet(spreadsheet_id, sheet_id=start['sheetId'])
+            rows = [[cell_value(cell) for cell in row.get('values', [])] for row in params.get('rows', [])]
+            self.write_cells(sheet, start.get('rowIndex', 0) + 1, start.get('columnIndex', 0), rows)
+            return {}
+
+        if kind == 'repeatCell':  # Only number formats of whole columns are supported
+            grid_range = params['range']
+            sheet = self.find_sheet(spreadsheet_id, sheet_id=grid_range['sheetId'])
+            number_format = params['cell'].get('userEnteredFormat', {}).get('numberFormat')
+            for col in range(grid_range.get('startColumnIndex', 0), grid_range['endColumnIndex']):
+                sheet['formats'][col] = number_format
+            return {}
+
+        if kind == 'createDeveloperMetadata':
+            metadata = dict(params['developerMetadata'], metadataId=next(self._ids))
+            sheet = self.find_sheet(spreadsheet_id, sheet_id=metadata['location']['sheetId'])
+            sheet['developerMetadata'].append(metadata)
+            return {'createDeveloperMetadata': {'developerMetadata': metadata}}
+
+        if kind in ('updateDeveloperMetadata', 'deleteDeveloperMetadata'):
+            data_filters = params['dataFilters'] if kind == 'updateDeveloperMetadata' else [params['dataFilter']]
+            lookups = [data_filter['developerMetadataLookup'] for data_filter in data_filters]  # By id or by key
+            for sheet in spreadsheet['sheets']:
+                for i, metadata in enumerate(sheet['developerMetadata']):
+                    if any(
+                        metadata[field] == lookup[field]
+                        for lookup in lookups for field in ('metadataId', 'metadataKey') if field in lookup
+                    ):
+                        if kind == 'updateDeveloperMetadata':
+                            sheet['developerMetadata'][i] = dict(metadata, **params['developerMetadata'])
+                        else:
+                            sheet['developerMetadata'][i] = None
+                sheet['developerMetadata'] = [metadata for metadata in sheet['developerMetadata'] if metadata]
+            return {}
+
+        raise FakeAPIError(400, f'Unsupported request: {kind}')
+
+    def upload(self, method: str, params: dict, payload: bytes, headers: dict) -> Tuple[int, dict, dict]:
+        """
+        Serve a resumable upload of a CSV file converted into a spreadsheet: a POST of the file metadata
+        starts the upload session, PUTs of the pieces (with their Content-Range) follow, and the file is
+        converted once its last piece is received.  Converted values are kept as strings.
+        """
+
+        if method == 'POST':
+            upload_id = f'upload-{next(self._ids)}'
+            self.uploads[upload_id] = {'name': json.loads(payload)['name'], 'data': bytearray()}
+            location = f'https://www.googleapis.com/upload/drive/v3/files?uploadType=resumable&upload_id={upload_id}'
+            return 200, {}, {'Location': location}
+
+        upload = self.uploads[params['upload_id']]
+        match = re.fullmatch(r'bytes (\d+)-(\d+)/(\d+|\*)', headers.get('Content-Range', ''))
+        if not match or int(match.group(1)) != len(upload['data']) or len(payload) != int(match.group(2)) + 1 - len(
+            upload['data']
+        ):
+            raise FakeAPIError(400, f'Invalid Content-Range: {headers.get("Content-Range")}')
+        upload['data'] += payload
+        if match.group(3) == '*' or int(match.group(3)) > len(upload['data']):
+            return 308, {}, {'Range': f'bytes=0-{len(upload["data"]) - 1}'}
+
+        del self.uploads[params['upload_id']]
+        rows = list(csv.reader(io.StringIO(upload['data'].decode())))
+        width = max((len(row) for row in rows), default=1)
+        if len(rows) * width > MAX_CELLS_PER_SPREADSHEET:
+            raise FakeAPIError(400, f'The file exceeds the limit of {MAX_CELLS_PER_SPREADSHEET} cells.')
+        spreadsheet_id = f'spreadsheet-{next(self._ids)}'
+        sheet = self.new_sheet('Sheet1', max(1, len(rows)), width, sheet_id=0)
+        self.spreadsheets[spreadsheet_id] = {'title': upload['name'], 'sheets': [sheet], 'trashed': False}
+        self.write_cells(sheet, 1, 0, [[value if value != '' else None for value in row] for row in rows])
+        return 200, {'id': spreadsheet_id, 'name': upload['name'], 'mimeType': SPREADSHEET_MIME_TYPE}, {}
+
+    def copy_sheet(self, spreadsheet_id: str, sheet_id: int, destination_id: str) -> dict:
+        """
+        Copy a sheet, with its values and formats, to the end of another spreadsheet as "Copy of <title>".
+        """
+
+        source = self.find_sheet(spreadsheet_id, sheet_id=sheet_id)
+        destination = self.spreadsheets[destination_id]
+        grid = source['properties']['gridProperties']
+        n_cells = sum(
+            sheet['properties']['gridProperties']['rowCount'] * sheet['properties']['gridProperties']['columnCount']
+            for sheet in destination['sheets']
+        )
+        if n_cells + grid['rowCount'] * grid['columnCount'] > MAX_CELLS_PER_SPREADSHEET:
+            raise FakeAPIError(
+                400, f'This action would increase the number of cells in the workbook above the limit of '
+                     f'{MAX_CELLS_PER_SPREADSHEET} cells.'
+            )
+        titles = {sheet['properties']['title'] for sheet in destination['sheets']}
+        title = f'Copy of {source["properties"]["title"]}'
+        title = next(name for name in itertools.chain([title], (f'{title} {n}' for n in itertools.count(2)))
+                     if name not in titles)
+        sheet = self.new_sheet(title, grid['rowCount'], grid['columnCount'])
+        sheet['values'], sheet['formats'] = dict(source['values']), dict(source['formats'])
+        destination['sheets'].append(sheet)
+        sheet['properties']['index'] = len(destination['sheets']) - 1
+        return dict(sheet['properties'])
+
+    def values_get(self, spreadsheet_id: str, a1_range: str, params: dict) -> dict:
+        title, first_col, first_row, last_col, last_row = parse_range(a1_range)
+        sheet = self.find_sheet(spreadsheet_id, title=title)
+        grid = sheet['properties']['gridProperties']
+        last_col = grid['columnCount'] - 1 if last_col is None else last_col
+        last_row = grid['rowCount'] if last_row is None else last_row
+        rows = [
+            ['' if value is None else value for value in sheet['values'].get(row, [])[first_col:last_col + 1]]
+            for row in range(first_row, last_row + 1)
+        ]
+
+        # Like the API, leave out trailing empty rows and cells
+        rows = [strip_empty(row) for row in rows]
+        while rows and not rows[-1]:
+            rows.pop()
+        if params.get('majorDimension') == 'COLUMNS':
+            width = max((len(row) for row in rows), default=0)
+            rows = [strip_empty([row[i] if i < len(row) else '' for row in rows]) for i in range(width)]
+        response = {'range': a1_range, 'majorDimension': params.get('majorDimension', 'ROWS')}
+        if rows:
+            response['values'] = rows
+        return response
+
+    def values_update(self, spreadsheet_id: str, a1_range: str, body: dict) -> dict:
+        title, first_col, first_row, _, _ = parse_range(a1_range)
+        sheet = self.find_sheet(spreadsheet_id, title=title)
+        rows = body.get('values', [])
+        self.write_cells(sheet, first_row, first_col, rows)
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'updatedRange': a1_range,
+            'updatedRows': len(rows),
+            'updatedCells': sum(len(row) for row in rows),
+        }
+
+
+class FakeSession:
+    """
+    Stand-in for the requests session of a gspread client, serving every request from a FakeSheetsBackend.
+    Requests and responses are still encoded to JSON, so the bytes on the wire are measured faithfully.
+    """
+
+    API_ROOTS = ('/v4', '/upload/drive/v3', '/drive/v3')  # Sheets and Drive API roots, stripped before routing
+
+    def __init__(self, backend: FakeSheetsBackend):
+        self.backend = backend
+        self.headers = {}
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        path = urlparse(url).path
+        for root in self.API_ROOTS:
+            if path.startswith(root + '/'):
+                path = path[len(root):]
+                break
+        params = dict(parse_qsl(urlparse(url).query), **(kwargs.get('params') or {}))
+        payload = json.dumps(kwargs['json']).encode() if kwargs.get('json') is not None else (kwargs.get('data') or b'')
+        status, body, headers = self.backend.handle(method.upper(), path, params, payload, kwargs.get('headers'))
+
+        response = requests.Response()
+        response.status_code = status
+        response._content = body
+        response.headers['Content-Type'] = 'application/json; charset=UTF-8'
+        response.headers.update(headers)
+        response.url = f'{url.split("?")[0]}?{urlencode(params)}' if params else url
+        response.encoding = 'utf-8'
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+class FakeServerSession(requests.Session):
+    """
+    Requests session of a gspread client whose requests are sent to a FakeSheetsServer instead of Google,
+    so that clients in other processes can share a backend.
+    """
+
+    API_ROOTS = {  # Google API root -> root on the server
+        'https://sheets.googleapis.com/v4': '/sheets',
+        'https://www.googleapis.com/upload/drive/v3': '/drive',
+        'https://www.googleapis.com/drive/v3': '/drive',
+    }
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+
+    def request(self, method: str, url: str, *args, **kwargs) -> requests.Response:
+        for root, server_root in self.API_ROOTS.items():
+            if url.startswith(root + '/'):
+                url = self.url + server_root + url[len(root):]
+                break
+        return super().request(method, url, *args, **kwargs)
+
+
+def server_client(url: str) -> gspread.Client:
+    """
+    Return a gspread client whose requests are served by the FakeSheetsServer at the provided URL.  Being
+    a module level function, functools.partial(server_client, url) can be sent to worker processes.
+    """
+
+    return gspread.Client(auth=None, session=FakeServerSession(url))
+
+
+class FakeSheetsServer(ThreadingHTTPServer):
+    """
+    Local HTTP server for a FakeSheetsBackend, with the Sheets API under /sheets and the Drive API under
+    /drive.  Call serve_forever() from a thread, and shutdown() when done.
+    """
+
+    daemon_threads = True
+    API_ROOTS = ('/sheets', '/drive')
+
+    def __init__(self, backend: Optional[FakeSheetsBackend] = None, port: int = 0):
+        super().__init__(('127.0.0.1', port), FakeSheetsHandler)
+        self.backend = backend or FakeSheetsBackend()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def client(self) -> gspread.Client:
+        """
+        Return a gspread client whose requests are served by this server.
+        """
+
+        return server_client(self.url)
+
+
+class FakeSheetsHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def handle_request(self, method: str):
+        url = urlparse(self.path)
+        path = url.path
+        for root in self.server.API_ROOTS:
+            if path.startswith(root + '/'):
+                path = path[len(root):]
+                break
+        params = {key: values[0] if len(values) == 1 else values for key, values in parse_qs(url.query).items()}
+        payload = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status, body, headers = self.server.backend.handle(method, path, params, payload, dict(self.headers))
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_PUT(self):
+        self.handle_request('PUT')
+
+    def do_PATCH(self):
+        self.handle_request('PATCH')
+
+    def do_DELETE(self):
+        self.handle_request('DELETE')
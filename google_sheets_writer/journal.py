@@ -0,0 +1,168 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from typing import List, Optional
+from google_sheets_writer.serializer import serialize_chunk
+from google_sheets_writer.utils.sync_utils import hash_block
+
+
+def fingerprint_dataset(data, headers: List[str], sample_size: int = 100) -> str:
+    """
+    Return a fingerprint of a sized dataset from its headers, its length and a sample of its records
+    (the first and last sample_size records plus an evenly spaced sample), so it is cheap to compute
+    for millions of records.  It catches a different dataset being resumed, not every edited value.
+    """
+
+    n_records = len(data)
+    step = max(1, n_records // sample_size)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([headers, n_records]).encode())
+    for sample in (data[:sample_size], data[::step], data[-sample_size:]):
+        digest.update(json.dumps(serialize_chunk(sample, headers), separators=(',', ':')).encode())
+    return digest.hexdigest()
+
+
+class ExportJournal:
+    """
+    Append-only, on-disk checkpoint journal of an export.  It holds one JSON line per event: the plan of
+    the export (including the dataset fingerprint), every workbook that was laid out, and every chunk that
+    was uploaded (workbook, worksheet, row range, payload hash).  A resumed export skips what the journal
+    says is done and continues from the first incomplete chunk.
+
+    Every line is flushed to the OS as it is written, while fsync is batched to at most one per
+    fsync_interval seconds, so journaling never becomes the bottleneck of an export.  A journal is
+    thread-safe, so one can be shared by every worksheet of a write.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fsync_interval: float = 1,  # seconds between fsyncs of the journal file
+    ):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._synced_at = 0.0
+        self._laid_out = set()  # workbook names
+        self._records_written = {}  # (workbook name, worksheet name) -> records uploaded
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _load(self) -> List[dict]:
+        """
+        Read the events of the journal file.  A torn last line, left by a crash mid write, is cut off.
+        """
+
+        if not os.path.exists(self.path):
+            return []
+        events = []
+        valid_bytes = 0
+        with open(self.path, 'rb') as file:
+            for line in file:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    break
+                if not line.endswith(b'\n'):
+                    events.pop()
+                    break
+                valid_bytes += len(line)
+        if valid_bytes < os.path.getsize(self.path):
+            os.truncate(self.path, valid_bytes)
+        return events
+
+    def start(self, plan: dict, resume: bool = False) -> bool:
+        """
+        Open the journal for an export with the provided plan.  With resume, the progress of a previous run
+        with the same plan is loaded and the journal is appended to.  Otherwise, or if the plan changed, the
+        journal is started over.  Returns a boolean indicating whether a previous run is being resumed.
+        """
+
+        events = self._load() if resume else []
+        resuming = bool(events) and events[0].get('event') == 'plan' and events[0].get('plan') == plan
+        if events and not resuming:
+            logging.warning(f'Journal "{self.path}" belongs to a different export, starting over.')
+
+        if resuming:
+            for event in events[1:]:
+                if event['event'] == 'layout':
+                    self._laid_out.add(event['workbook'])
+                elif event['event'] == 'chunk':
+                    key = (event['workbook'], event['worksheet'])
+                    self._records_written[key] = self._records_written.get(key, 0) + event['records']
+            self._file = open(self.path, 'a')
+        else:
+            self._file = open(self.path, 'w')
+            self._write({'event': 'plan', 'plan': plan}, sync=True)
+        return resuming
+
+    def _write(self, event: dict, sync: bool = False):
+        with self._lock:
+            self._file.write(json.dumps(event, separators=(',', ':')) + '\n')
+            self._file.flush()
+            now = time.monotonic()
+            if sync or now - self._synced_at >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._synced_at = now
+
+    def is_laid_out(self, workbook_name: str) -> bool:
+        """
+        Returns a boolean indicating whether the layout of the provided workbook was applied by this export.
+        """
+
+        return workbook_name in self._laid_out
+
+    def records_written(self, workbook_name: str, worksheet_name: str) -> int:
+        """
+        Return the number of records already uploaded to the provided worksheet by this export.
+        """
+
+        return self._records_written.get((workbook_name, worksheet_name), 0)
+
+    def record_layout(self, workbook_name: str):
+        """
+        Record that the layout of the provided workbook was applied, so a resumed run doesn't clear it again.
+        """
+
+        self._laid_out.add(workbook_name)
+        self._write({'event': 'layout', 'workbook': workbook_name}, sync=True)
+
+    def record_chunk(self, workbook_name: str, worksheet_name: str, start_row: int, n_records: int, values: List):
+        """
+        Record that a chunk of n_records records was uploaded to the provided worksheet, as rows of values
+        starting at start_row.
+        """
+
+        self._write({
+            'event': 'chunk',
+            'workbook': workbook_name,
+            'worksheet': worksheet_name,
+            'start_row': start_row,
+            'rows': len(values),
+            'records': n_records,
+            'hash': hash_block(values),
+        })
+
+    def close(self, completed: Optional[bool] = None):
+        """
+        Sync and close the journal file.  If completed is True, the export is marked as done.
+        """
+
+        if self._file is None:
+            return
+        if completed:
+            self._write({'event': 'done'})
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
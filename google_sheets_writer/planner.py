@@ -0,0 +1,186 @@
+from typing import Dict, List, Optional, Tuple
+from google_sheets_writer.chunker import estimate_payload_bytes
+from google_sheets_writer.serializer import serialize_chunk
+from google_sheets_writer.utils.layout_utils import partition_records
+
+# Google Sheets API Limits: https://developers.google.com/sheets/api/limits
+
+# Requests a write sends per workbook on top of its uploads, when the workbook has to be created:
+# reads are the existence check and the worksheet metadata, writes are create, share and the layout batchUpdate
+READS_PER_WORKBOOK = 2
+WRITES_PER_WORKBOOK = 3
+CLEANUP_READS = 1  # Drive query for the workbooks of the export, to find and remove stale ones
+FORMAT_WRITES_PER_WORKBOOK = 1  # batchUpdate applying the number formats of date columns, if there are any
+
+
+class WritePlan:
+    """
+    Plan of a write, worked out without touching the API: the workbooks and worksheets the records are split
+    into, the row range of every worksheet, the chunks every worksheet is uploaded in, and the requests,
+    bytes and quota time the write is expected to cost.
+
+    Request counts assume every workbook has to be created, which makes them an upper bound for writes that
+    go to existing workbooks, and don't include deleting stale workbooks left over from a larger write.
+    """
+
+    def __init__(
+        self,
+        workbook_name: str,
+        headers: List[str],
+        n_records: int,
+        workbooks: List[dict],
+        record_bytes: Optional[float],
+        read_requests_per_minute: float = 60,
+        write_requests_per_minute: float = 60,
+        burst: float = 10,
+        number_formats: bool = False,
+    ):
+        self.workbook_name = workbook_name
+        self.headers = list(headers)
+        self.n_records = n_records
+        self.workbooks = workbooks  # [{'name': str, 'worksheets': [{'name', 'first_record', 'n_records', ...}]}]
+        self.record_bytes = record_bytes  # estimated payload bytes per record, None if unknown
+        self.n_chunks = sum(len(ws['chunks']) for wb in workbooks for ws in wb['worksheets'])
+        self.read_requests = READS_PER_WORKBOOK * len(workbooks) + CLEANUP_READS
+        writes_per_workbook = WRITES_PER_WORKBOOK + (FORMAT_WRITES_PER_WORKBOOK if number_formats else 0)
+        self.write_requests = writes_per_workbook * len(workbooks) + self.n_chunks
+        self.bytes = sum(n_bytes for wb in workbooks for ws in wb['worksheets'] for _, _, n_bytes in ws['chunks'])
+        self.duration = self.projected_duration(read_requests_per_minute, write_requests_per_minute, burst)
+
+    @property
+    def partitions(self) -> List[List[Tuple[int, int]]]:
+        """
+        Return the (first record, number of records) ranges of the worksheets of every workbook, in the
+        format of partition_records.
+        """
+
+        return [[(ws['first_record'], ws['n_records']) for ws in wb['worksheets']] for wb in self.workbooks]
+
+    def projected_duration(
+        self,
+        read_requests_per_minute: float = 60,
+        write_requests_per_minute: float = 60,
+        burst: float = 10,
+    ) -> float:
+        """
+        Return the number of seconds the quotas alone hold the write up for: after a burst, requests are
+        paced to the per-minute quota, and reads and writes draw from separate quotas.  This is a lower
+        bound, the time spent on the requests themselves comes on top.
+        """
+
+        read_seconds = max(0, self.read_requests - burst) * 60 / read_requests_per_minute
+        write_seconds = max(0, self.write_requests - burst) * 60 / write_requests_per_minute
+        return max(read_seconds, write_seconds)
+
+    def to_dict(self) -> dict:
+        """
+        Return the plan as a dict of plain values, e.g. to store it or log it as JSON.
+        """
+
+        return {
+            'workbook_name': self.workbook_name,
+            'headers': self.headers,
+            'n_records': self.n_records,
+            'workbooks': self.workbooks,
+            'record_bytes': self.record_bytes,
+            'n_chunks': self.n_chunks,
+            'read_requests': self.read_requests,
+            'write_requests': self.write_requests,
+            'bytes': self.bytes,
+            'duration': self.duration,
+        }
+
+    def summary(self) -> str:
+        """
+        Return a one line summary of the plan.
+        """
+
+        n_worksheets = sum(len(wb['worksheets']) for wb in self.workbooks)
+        return (
+            f'"{self.workbook_name}": {self.n_records:,} records in {len(self.workbooks):,} workbooks and '
+            f'{n_worksheets:,} sheets, {self.n_chunks:,} chunks, {self.read_requests:,} reads and '
+            f'{self.write_requests:,} writes, {self.bytes:,} bytes, at least {self.duration:.0f}s of quota.'
+        )
+
+
+def estimate_record_bytes(
+    data,
+    headers: List[str],
+    sample_size: int = 1_000,
+    schema: Optional[Dict[str, str]] = None,
+) -> Optional[float]:
+    """
+    Estimate the payload bytes per record of a sized dataset from an evenly spaced sample of its records,
+    encoded by the column types of the schema if one is provided.  Returns None for an empty dataset.
+    """
+
+    if not len(data):
+        return None
+    sample = data[::max(1, len(data) // sample_size)][:sample_size]
+    return estimate_payload_bytes(serialize_chunk(sample, headers, schema), sample_size=None) / len(sample)
+
+
+def plan_write(
+    workbook_name: str,
+    headers: List[str],
+    n_records: int,
+    max_cells_per_sheet: int = 3_000_000,
+    max_cells_per_workbook: int = 9_000_000,
+    chunk_size: Optional[int] = 100_000,
+    chunk_bytes: Optional[int] = 2_000_000,
+    record_bytes: Optional[float] = None,
+    read_requests_per_minute: float = 60,
+    write_requests_per_minute: float = 60,
+    burst: float = 10,
+    number_formats: bool = False,
+) -> WritePlan:
+    """
+    Plan writing n_records records with the provided headers, split into workbooks and worksheets like
+    write_to_gsheets does.  Chunks hold chunk_bytes worth of records at record_bytes payload bytes per
+    record, and never more than chunk_size records.  Without a record_bytes estimate, chunks hold chunk_size
+    records and bytes aren't estimated.  Set number_formats when date columns get a number format, which
+    costs a request per workbook.
+
+    Chunks are planned at the size the writer settles on, so the first chunk of a write (sized before any
+    record has been serialized) and the budget tuning during the write can change the actual count a little.
+    """
+
+    n_cols = len(headers)
+    rows_per_chunk = chunk_size
+    if chunk_bytes is not None and record_bytes:
+        rows_per_chunk = max(1, int(chunk_bytes / record_bytes))
+        rows_per_chunk = rows_per_chunk if chunk_size is None else min(rows_per_chunk, chunk_size)
+    header_bytes = estimate_payload_bytes([headers]) if record_bytes else 0
+
+    workbooks = []
+    partitions = partition_records(n_records, n_cols, max_cells_per_sheet, max_cells_per_workbook) if n_cols else []
+    for i, worksheet_ranges in enumerate(partitions, start=1):
+        worksheets = []
+        for j, (start, n_records_to_write) in enumerate(worksheet_ranges, start=1):
+            step = rows_per_chunk or n_records_to_write
+            chunks = []  # (first record, number of records, estimated payload bytes)
+            for first_record in range(start, start + n_records_to_write, step):
+                n_chunk_records = min(step, start + n_records_to_write - first_record)
+                n_bytes = round(n_chunk_records * record_bytes) if record_bytes else 0
+                chunks.append((first_record, n_chunk_records, n_bytes + (header_bytes if not chunks else 0)))
+            worksheets.append({
+                'name': workbook_name + f'_{j}',
+                'first_record': start,
+                'n_records': n_records_to_write,
+                'rows': n_records_to_write + 1,  # Plus one row for the headers
+                'cols': n_cols,
+                'chunks': chunks,
+            })
+        workbooks.append({'name': workbook_name + f'_{i}', 'worksheets': worksheets})
+
+    return WritePlan(
+        workbook_name=workbook_name,
+        headers=headers,
+        n_records=n_records,
+        workbooks=workbooks,
+        record_bytes=record_bytes,
+        read_requests_per_minute=read_requests_per_minute,
+        write_requests_per_minute=write_requests_per_minute,
+        burst=burst,
+        number_formats=number_formats,
+    )
@@ -0,0 +1,54 @@
+import gspread
+
+from typing import Callable, Dict, Literal, Union
+
+# Google Sheets API Limits: https://developers.google.com/sheets/api/limits
+# Quotas are per user, so every service account of a pool brings its own quota.
+
+Credential = Union[str, gspread.Client, Callable[[], gspread.Client]]
+
+
+def make_client(credential: Credential) -> gspread.Client:
+    """
+    Return a gspread client for a credential of a pool: the path of a service account key file, a client,
+    or a callable returning a client.  Paths and module level callables can be sent to worker processes,
+    clients can't.
+    """
+
+    if isinstance(credential, gspread.Client):
+        return credential
+    if isinstance(credential, str):
+        return gspread.service_account(filename=credential)
+    return credential()
+
+
+def assign_workbooks(
+    workbook_cells: Dict[int, int],  # workbook number -> cells to write to it
+    owners: Dict[int, int],  # workbook number -> index of the client that can already open it
+    n_clients: int,
+    strategy: Literal['round_robin', 'least_loaded'] = 'round_robin',
+) -> Dict[int, int]:
+    """
+    Assign every workbook to the index of the client that writes it.  Workbooks that already exist stay
+    with a client that can open them, so reruns never create a second workbook with the same name.  New
+    workbooks are dealt out in turn ("round_robin", by workbook number) or to the client with the fewest
+    cells assigned so far ("least_loaded", counting the existing workbooks it keeps).
+    """
+
+    if strategy not in ('round_robin', 'least_loaded'):
+        raise ValueError(f'Unknown strategy "{strategy}", expected "round_robin" or "least_loaded".')
+
+    assignment = {number: owners[number] for number in workbook_cells if number in owners}
+    loads = [0] * n_clients
+    for number, client_index in assignment.items():
+        loads[client_index] += workbook_cells[number]
+    for number in sorted(workbook_cells):
+        if number in assignment:
+            continue
+        if strategy == 'round_robin':
+            client_index = (number - 1) % n_clients
+        else:
+            client_index = min(range(n_clients), key=lambda index: loads[index])
+        assignment[number] = client_index
+        loads[client_index] += workbook_cells[number]
+    return dict(sorted(assignment.items()))
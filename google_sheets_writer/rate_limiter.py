@@ -0,0 +1,267 @@
+import asyncio
+import gspread
+import logging
+import random
+import requests
+import threading
+import time
+
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Literal, Optional, Tuple
+
+# Google Sheets API Limits: https://developers.google.com/sheets/api/limits
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to keep the rate of API requests under a per-minute quota.  Tokens
+    refill continuously at quota / 60 per second, up to the burst size.  A bucket can be shared by
+    every thread (and every writer) that draws from the same quota.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,  # sustained request rate
+        burst: Optional[float] = 10,  # number of requests that can be sent back to back (None = requests_per_minute)
+    ):
+        self.rate = requests_per_minute / 60
+        self.capacity = requests_per_minute if burst is None else burst
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Take tokens from the bucket without waiting.  Concurrent callers queue up in the order they
+        reserved.  Returns the number of seconds the caller must wait before using the tokens.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Take tokens from the bucket, sleeping until they are available.  Returns the number of seconds waited.
+        """
+
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class RequestScheduler:
+    """
+    Central scheduler that every Google Sheets API request goes through.  Read and write requests draw
+    from separate token buckets so each stays under its per-minute quota, and requests that fail with a
+    429 or 5xx response (or a dropped connection) are retried with jittered exponential backoff,
+    honoring the Retry-After header when one is sent.
+
+    Time spent waiting on the quota or backing off is tracked separately from time spent on the
+    requests themselves, see metrics().  If provided, on_request is called with an event (request
+    kind and type, attempt, seconds, error) after every request, retries included.
+
+    Requests that aren't safe to repeat, such as creating a workbook or adding a worksheet, are called
+    with retry_ambiguous=False.  A 5xx response or a dropped connection doesn't tell whether such a
+    request was applied, so those are only retried on a 429, which Google rejects before applying.
+    """
+
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        read_requests_per_minute: float = 60,  # read quota per user
+        write_requests_per_minute: float = 60,  # write quota per user
+        max_retries: int = 5,  # retries per request before giving up
+        backoff_base: float = 1,  # seconds, doubled on every retry
+        backoff_max: float = 64,  # seconds, upper bound of a single backoff
+        retry_exceptions: Tuple = (requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+        on_request: Optional[Callable[[dict], None]] = None,  # called with an event after every request
+    ):
+        self.buckets = {
+            'read': TokenBucket(read_requests_per_minute),
+            'write': TokenBucket(write_requests_per_minute),
+        }
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_exceptions = retry_exceptions  # transport errors that are worth retrying
+        self.on_request = on_request
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        """
+        Reset every metric to zero.
+        """
+
+        with self._lock:
+            self._metrics = {
+                'read_requests': 0,  # requests sent, including retries
+                'write_requests': 0,
+                'retries': 0,
+                'wait_time': 0.0,  # seconds spent waiting on the quota
+                'backoff_time': 0.0,  # seconds spent backing off before retries
+                'transfer_time': 0.0,  # seconds spent on the requests themselves
+            }
+
+    def metrics(self) -> dict:
+        """
+        Return a snapshot of the request metrics since the scheduler was created or last reset.
+        """
+
+        with self._lock:
+            return dict(self._metrics)
+
+    def _record(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self._metrics[name] += value
+
+    def _emit(self, kind: str, func: Callable, attempt: int, seconds: float, waited: float, error: Optional[Exception]):
+        # Request events carry the request type, e.g. "batch_update", taken from the name of the function called
+        self.on_request({
+            'kind': kind,
+            'name': getattr(func, '__name__', type(func).__name__),
+            'attempt': attempt,  # 0 for the first attempt
+            'seconds': seconds,
+            'wait_time': waited,
+            'error': error,
+        })
+
+    def _retry_delay(self, error: Exception, attempt: int, retry_ambiguous: bool = True) -> Optional[float]:
+        """
+        Return the number of seconds to wait before retrying a failed request, or None if the error
+        isn't worth retrying.  Unless retry_ambiguous is True, only quota errors are worth retrying.
+        """
+
+        if isinstance(error, gspread.exceptions.APIError):
+            response = getattr(error, 'response', None)
+            status_code = getattr(response, 'status_code', None)
+            if status_code not in (self.RETRY_STATUS_CODES if retry_ambiguous else (429,)):
+                return None
+            retry_after = parse_retry_after(getattr(response, 'headers', {}).get('Retry-After'))
+            if retry_after is not None:
+                return retry_after
+        elif not retry_ambiguous or not isinstance(error, self.retry_exceptions):
+            return None
+
+        # Full jitter keeps parallel workers from retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def call(self, kind: Literal['read', 'write'], func: Callable, *args, retry_ambiguous: bool = True, **kwargs):
+        """
+        Call func(*args, **kwargs) once a token of the provided kind is available, retrying on quota
+        and server errors (only quota errors if retry_ambiguous is False).  Returns the result of func.
+        """
+
+        attempt = 0
+        while True:
+            waited = self.buckets[kind].acquire()
+            start = time.monotonic()
+            failure = None
+            try:
+                return func(*args, **kwargs)
+            except Exception as error:
+                failure = error
+                delay = (
+                    self._retry_delay(error, attempt, retry_ambiguous) if attempt < self.max_retries else None
+                )
+                if delay is None:
+                    raise
+                reason = str(error) or type(error).__name__
+            finally:
+                seconds = time.monotonic() - start
+                self._record(**{f'{kind}_requests': 1, 'wait_time': waited, 'transfer_time': seconds})
+                if self.on_request is not None:
+                    self._emit(kind, func, attempt, seconds, waited, failure)
+
+            logging.warning(f'Request failed ({reason}), retrying in {delay:.1f} seconds...')
+            time.sleep(delay)
+            self._record(retries=1, backoff_time=delay)
+            attempt += 1
+
+    async def call_async(
+        self,
+        kind: Literal['read', 'write'],
+        func: Callable[..., Awaitable],
+        *args,
+        retry_ambiguous: bool = True,
+        **kwargs,
+    ):
+        """
+        Asyncio version of call(): await func(*args, **kwargs) once a token of the provided kind is
+        available, retrying on quota and server errors without blocking the event loop.
+        """
+
+        attempt = 0
+        while True:
+            waited = self.buckets[kind].reserve()
+            if waited:
+                await asyncio.sleep(waited)
+            start = time.monotonic()
+            failure = None
+            try:
+                return await func(*args, **kwargs)
+            except Exception as error:
+                failure = error
+                delay = (
+                    self._retry_delay(error, attempt, retry_ambiguous) if attempt < self.max_retries else None
+                )
+                if delay is None:
+                    raise
+                reason = str(error) or type(error).__name__
+            finally:
+                seconds = time.monotonic() - start
+                self._record(**{f'{kind}_requests': 1, 'wait_time': waited, 'transfer_time': seconds})
+                if self.on_request is not None:
+                    self._emit(kind, func, attempt, seconds, waited, failure)
+
+            logging.warning(f'Request failed ({reason}), retrying in {delay:.1f} seconds...')
+            await asyncio.sleep(delay)
+            self._record(retries=1, backoff_time=delay)
+            attempt += 1
+
+    def read(self, func: Callable, *args, **kwargs):
+        """
+        Call func(*args, **kwargs) as a read request, see call().
+        """
+
+        return self.call('read', func, *args, **kwargs)
+
+    def write(self, func: Callable, *args, **kwargs):
+        """
+        Call func(*args, **kwargs) as a write request, see call().
+        """
+
+        return self.call('write', func, *args, **kwargs)
+
+    def write_once(self, func: Callable, *args, **kwargs):
+        """
+        Call func(*args, **kwargs) as a write request that isn't safe to repeat, only retrying on quota
+        errors, see call().
+        """
+
+        return self.call('write', func, *args, retry_ambiguous=False, **kwargs)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header, given either as a number of seconds or as an HTTP date, into a number
+    of seconds.  Returns None if the header is missing or can't be parsed.
+    """
+
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
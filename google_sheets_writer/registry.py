@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+import time
+
+from typing import Dict, Optional
+
+
+class WorkbookRegistry:
+    """
+    Persistent map of workbook names to spreadsheet IDs, kept in a local JSON file so that lookups survive
+    across runs.  A writer with a registry opens known workbooks by ID, a single metadata request, instead
+    of searching Drive for their name.
+
+    Entries are keyed by account, so one file can be shared by exports that run as different users or
+    service accounts.  Entries are only hints: the writer checks the title of every workbook it opens by
+    ID, and repairs the entries of workbooks that were deleted or renamed.  A workbook in the trash still
+    opens by ID, which only Drive tells apart, so that costs a second request and is only checked once
+    every check_interval seconds per entry.  A registry is thread-safe, and every change is saved right
+    away through a temporary file, so an interrupted save never corrupts it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        account: str = 'default',  # user or service account the workbooks belong to
+        check_interval: float = 86_400,  # seconds before a registered workbook is checked for being in the trash
+    ):
+        self.path = path
+        self.account = account
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries = self._load().get(account, {})  # workbook name -> {'id': str, 'checked_at': float}
+
+    def _load(self) -> Dict[str, dict]:
+        """
+        Read the entries of every account from the registry file.  A missing or unreadable file is empty.
+        """
+
+        try:
+            with open(self.path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        """
+        Write the entries of this account to the registry file, keeping the entries of other accounts.
+        """
+
+        all_entries = self._load()
+        all_entries[self.account] = self._entries
+        temp_path = f'{self.path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(all_entries, file)
+        os.replace(temp_path, self.path)
+
+    def get(self, workbook_name: str) -> Optional[str]:
+        """
+        Return the spreadsheet ID registered for the provided workbook name, or None if it isn't known.
+        """
+
+        with self._lock:
+            entry = self._entries.get(workbook_name)
+            return entry['id'] if entry else None
+
+    def is_check_due(self, workbook_name: str) -> bool:
+        """
+        Returns a boolean indicating whether the registered workbook should be checked for being in the
+        trash, i.e. it hasn't been checked in the last check_interval seconds.
+        """
+
+        with self._lock:
+            checked_at = self._entries.get(workbook_name, {}).get('checked_at')
+            return checked_at is None or time.time() - checked_at >= self.check_interval
+
+    def record(self, workbook_name: str, spreadsheet_id: str):
+        """
+        Register the spreadsheet ID of a workbook that was just found or created, so it counts as checked.
+        The registry file is only rewritten if the ID changed.
+        """
+
+        with self._lock:
+            if self._entries.get(workbook_name, {}).get('id') != spreadsheet_id:
+                self._entries[workbook_name] = {'id': spreadsheet_id, 'checked_at': time.time()}
+                self._save()
+
+    def mark_checked(self, workbook_name: str):
+        """
+        Record that the registered workbook was just checked and found to be outside of the trash.
+        """
+
+        with self._lock:
+            if workbook_name in self._entries:
+                self._entries[workbook_name]['checked_at'] = time.time()
+                self._save()
+
+    def forget(self, workbook_name: str):
+        """
+        Drop the entry of a workbook, e.g. once it is deleted or found to be stale.
+        """
+
+        with self._lock:
+            if self._entries.pop(workbook_name, None) is not None:
+                self._save()
@@ -0,0 +1,161 @@
+import threading
+import time
+
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+PHASES = ('lookup', 'layout', 'serialize', 'upload', 'cleanup')
+MERGED_COUNTERS = (
+    'read_requests', 'write_requests', 'retries', 'errors', 'wait_time', 'backoff_time', 'bytes_sent',
+    'records_written', 'chunks_written',
+)
+
+
+class RunReport:
+    """
+    Structured metrics of a single write: the API calls it made by type, its retries, the payload bytes it
+    sent, and the seconds it spent in each phase (lookup, layout, serialize, upload and cleanup).
+
+    Phase times are summed across threads, so with parallel workers they can add up to more than the wall
+    time of the run.  A phase entered while another is being timed on the same thread is counted as part of
+    the outer one, e.g. the worksheets looked up while applying a layout count as layout.
+    """
+
+    def __init__(self, workbook_name: str, mode: str):
+        self.workbook_name = workbook_name
+        self.mode = mode
+        self.started_at = time.time()  # Unix time the run started
+        self.duration = 0.0  # seconds, set when the run finishes
+        self.api_calls = {}  # request type (e.g. "batch_update") -> calls, including retries
+        self.read_requests = 0
+        self.write_requests = 0
+        self.retries = 0
+        self.errors = 0  # failed calls, whether or not they were retried
+        self.wait_time = 0.0  # seconds spent waiting on the quota
+        self.backoff_time = 0.0  # seconds spent backing off before retries
+        self.bytes_sent = 0  # payload bytes of the uploaded values
+        self.records_written = 0
+        self.chunks_written = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)  # phase -> seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def record_request(self, event: dict):
+        """
+        Count an API call, from a request event of the scheduler.
+        """
+
+        with self._lock:
+            self.api_calls[event['name']] = self.api_calls.get(event['name'], 0) + 1
+            if event['kind'] == 'read':
+                self.read_requests += 1
+            else:
+                self.write_requests += 1
+            self.retries += event['attempt'] > 0
+            self.errors += event['error'] is not None
+
+    def record_chunk(self, event: dict):
+        """
+        Count an uploaded chunk, from a chunk event of the writer.
+        """
+
+        with self._lock:
+            self.chunks_written += 1
+            self.records_written += event['records']
+            self.bytes_sent += event['bytes']
+
+    def count(self, **increments):
+        """
+        Add the provided increments to the counters of the report.
+        """
+
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @contextmanager
+    def timer(self, phase: str):
+        """
+        Context manager that adds the time spent in its block to the provided phase.
+        """
+
+        if getattr(self._local, 'phase', None) is not None:
+            yield  # Nested in another phase, which is already being timed
+            return
+        self._local.phase = phase
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._local.phase = None
+            seconds = time.monotonic() - start
+            with self._lock:
+                self.phases[phase] += seconds
+
+    def merge(self, report: dict):
+        """
+        Add the API calls, counters and phase times of another report, as returned by its to_dict(), e.g.
+        the report of the part of a write that ran in a worker process.
+        """
+
+        with self._lock:
+            for name, calls in report['api_calls'].items():
+                self.api_calls[name] = self.api_calls.get(name, 0) + calls
+            for phase, seconds in report['phases'].items():
+                self.phases[phase] += seconds
+            for name in MERGED_COUNTERS:
+                setattr(self, name, getattr(self, name) + report[name])
+
+    def finish(self, scheduler_metrics: Optional[Dict[str, float]] = None):
+        """
+        Mark the run as finished.  If provided, the quota and backoff time of the run are taken from the
+        change in the scheduler's metrics over the run, on top of any merged from other reports.
+        """
+
+        self.duration = time.time() - self.started_at
+        if scheduler_metrics:
+            self.wait_time += scheduler_metrics.get('wait_time', 0.0)
+            self.backoff_time += scheduler_metrics.get('backoff_time', 0.0)
+
+    def to_dict(self) -> dict:
+        """
+        Return the report as a dict of plain values, e.g. to export it or log it as JSON.
+        """
+
+        with self._lock:
+            return {
+                name: dict(value) if isinstance(value, dict) else value
+                for name, value in vars(self).items()
+                if not name.startswith('_')
+            }
+
+    def summary(self) -> str:
+        """
+        Return a one line summary of the report.
+        """
+
+        phases = ', '.join(f'{phase} {seconds:.1f}s' for phase, seconds in self.phases.items())
+        return (
+            f'"{self.workbook_name}" took {self.duration:.1f}s: {sum(self.api_calls.values()):,} API calls, '
+            f'{self.retries:,} retries, {self.records_written:,} records and {self.bytes_sent:,} bytes sent '
+            f'({phases}).'
+        )
+
+
+def timed(phase: str) -> Callable:
+    """
+    Decorator that adds the time spent in a method to the provided phase of the run report held in the
+    _report attribute of its object, if a run is being reported.
+    """
+
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self._report is None:
+                return method(self, *args, **kwargs)
+            with self._report.timer(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+
+    return decorator
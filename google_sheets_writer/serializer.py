@@ -0,0 +1,381 @@
+import datetime
+import math
+import sys
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Sheets API ValueRange: https://developers.google.com/sheets/api/reference/rest/v4/spreadsheets.values
+# Sheets date and number formats: https://developers.google.com/sheets/api/guides/formats
+
+COLUMN_TYPES = ('int', 'float', 'bool', 'date', 'datetime', 'string')
+SHEETS_EPOCH = datetime.datetime(1899, 12, 30)  # Day 0 of Sheets' serial dates
+MAX_SAFE_INTEGER = 2 ** 53  # Larger integers lose precision as JSON numbers, so they are sent as strings
+SCHEMA_SAMPLE_SIZE = 1_000  # Records sampled to infer the type of every column
+NUMBER_FORMATS = {
+    'date': {'type': 'DATE', 'pattern': 'yyyy-mm-dd'},
+    'datetime': {'type': 'DATE_TIME', 'pattern': 'yyyy-mm-dd hh:mm:ss'},
+}
+
+# pandas and NumPy take hundreds of milliseconds to import, so they are only imported by the functions that
+# convert DataFrames and record arrays.  Until they are imported elsewhere, no DataFrame, record array or
+# NumPy scalar can exist, so checking for one never needs to import them.
+NO_NUMPY_TYPES = {'bool': (), 'int': (), 'float': (), 'datetime': ()}
+_numpy_types = None  # NumPy scalar types by column type, once NumPy is imported
+
+
+def numpy_types() -> Dict[str, tuple]:
+    """
+    Return the NumPy scalar types of every column type (bool, int, float and datetime), or no types if
+    NumPy hasn't been imported.
+    """
+
+    global _numpy_types
+    if _numpy_types is None:
+        numpy = sys.modules.get('numpy')
+        if numpy is None:
+            return NO_NUMPY_TYPES
+        _numpy_types = {
+            'bool': (numpy.bool_,),
+            'int': (numpy.integer,),
+            'float': (numpy.floating,),
+            'datetime': (numpy.datetime64,),
+        }
+    return _numpy_types
+
+
+def is_frame(data) -> bool:
+    """
+    Returns a boolean indicating whether a dataset is a pandas DataFrame, without importing pandas.
+    """
+
+    pandas = sys.modules.get('pandas')
+    return pandas is not None and isinstance(data, pandas.DataFrame)
+
+
+def is_array(data) -> bool:
+    """
+    Returns a boolean indicating whether a dataset is a NumPy array, without importing NumPy.
+    """
+
+    numpy = sys.modules.get('numpy')
+    return numpy is not None and isinstance(data, numpy.ndarray)
+
+
+def is_record_array(data) -> bool:
+    """
+    Returns a boolean indicating whether a dataset is a NumPy record array, i.e. an array with named fields.
+    """
+
+    return is_array(data) and bool(data.dtype.names)
+
+
+def record_array_to_frame(data) -> 'pd.DataFrame':
+    """
+    Convert a NumPy record array into a DataFrame with a column per field.
+    """
+
+    import pandas as pd
+
+    return pd.DataFrame({name: data[name] for name in data.dtype.names})
+
+
+def is_sized(data) -> bool:
+    """
+    Returns a boolean indicating whether a dataset has a known length and can be sliced into row ranges.
+    Anything else (generators, DB cursors, ...) is written as a stream.
+    """
+
+    return isinstance(data, (list, tuple)) or is_frame(data) or is_array(data)
+
+
+def get_headers(data) -> List[str]:
+    """
+    Return the column names of a dataset.  Supports a pandas DataFrame, a NumPy record array, a DB-API
+    cursor, or a list of dicts (in which case the keys of the first dict are used).
+    """
+
+    if is_frame(data):
+        return [str(column) for column in data.columns]
+    if is_record_array(data):
+        return list(data.dtype.names)
+    if getattr(data, 'description', None):
+        return [column[0] for column in data.description]
+    return list(data[0].keys())
+
+
+def serialize_value(value: Any) -> Optional[str]:
+    """
+    Convert a single value to the string sent to Google Sheets.  None, NaN, NaT and pandas.NA
+    become None so the cell is left empty.
+    """
+
+    if type(value) is str:
+        return value
+    try:
+        if value is None or value != value:
+            return None
+    except TypeError:  # pandas.NA can't be used as a boolean
+        return None
+    return str(value)
+
+
+def serialize_records(records: List[dict], headers: List[str]) -> List[List[Optional[str]]]:
+    """
+    Project a list of dicts into rows of strings in the order of the provided headers.  Missing keys
+    and missing values become None.  The result can be sent as the "values" of a request as is.
+    """
+
+    return [[serialize_value(record.get(header)) for header in headers] for record in records]
+
+
+def serialize_rows(rows: List[tuple]) -> List[List[Optional[str]]]:
+    """
+    Convert rows that are already in column order (e.g. tuples from a DB cursor) into rows of strings.
+    """
+
+    return [[serialize_value(value) for value in row] for row in rows]
+
+
+def serialize_column(values: 'pd.Series') -> List[Optional[str]]:
+    """
+    Convert a DataFrame column into strings, once per column.  Columns of NumPy numbers and booleans are
+    converted as Python scalars without checking every value, anything else value by value.
+    """
+
+    import pandas as pd
+
+    dtype = values.dtype
+    if pd.api.types.is_extension_array_dtype(dtype) or not (
+        pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)
+    ):
+        return [serialize_value(value) for value in values.tolist()]
+    strings = list(map(str, values.tolist()))
+    if pd.api.types.is_float_dtype(dtype) and values.hasnans:
+        return [None if missing else string for string, missing in zip(strings, values.isna().tolist())]
+    return strings
+
+
+def serialize_frame(frame: 'pd.DataFrame', headers: List[str]) -> List[List[Optional[str]]]:
+    """
+    Convert a DataFrame into rows of strings in the order of the provided headers, converting it column by
+    column and transposing the columns into rows once.  Missing values become None.
+    """
+
+    if [str(column) for column in frame.columns] != headers:
+        frame = frame[headers]
+    columns = [serialize_column(frame.iloc[:, i]) for i in range(frame.shape[1])]
+    return list(map(list, zip(*columns)))
+
+
+def serialize_chunk(chunk, headers: List[str], schema: Optional[Dict[str, str]] = None) -> List[List[Any]]:
+    """
+    Convert a chunk of data into rows of strings in the order of the provided headers.  DataFrames
+    and NumPy record arrays are converted column by column, lists of dicts or tuples row by row.
+
+    If a schema (header -> column type) is provided, values are encoded by type instead, see encode_chunk().
+    """
+
+    if schema is not None:
+        return encode_chunk(chunk, headers, schema)
+    if is_frame(chunk):
+        return serialize_frame(chunk, headers)
+    if is_record_array(chunk):
+        return serialize_frame(record_array_to_frame(chunk), headers)
+    if len(chunk) and not isinstance(chunk[0], dict):
+        return serialize_rows(chunk)
+    return serialize_records(chunk, headers)
+
+
+def is_missing(value: Any) -> bool:
+    """
+    Returns a boolean indicating whether a value is missing: None, NaN, NaT or pandas.NA.
+    """
+
+    try:
+        return value is None or value != value
+    except TypeError:  # pandas.NA can't be used as a boolean
+        return True
+
+
+def infer_value_type(value: Any) -> str:
+    """
+    Return the column type of a single value that isn't missing.
+    """
+
+    types = numpy_types()
+    if isinstance(value, (bool, *types['bool'])):
+        return 'bool'
+    if isinstance(value, (int, *types['int'])):
+        return 'int'
+    if isinstance(value, (float, *types['float'])):
+        return 'float'
+    if isinstance(value, (datetime.datetime, *types['datetime'])):
+        return 'datetime'
+    if isinstance(value, datetime.date):
+        return 'date'
+    return 'string'
+
+
+def infer_schema(data, headers: List[str], sample_size: int = SCHEMA_SAMPLE_SIZE) -> Dict[str, str]:
+    """
+    Infer the type of every column of a dataset (int, float, bool, date, datetime or string), once per
+    dataset.  DataFrame and record array columns are typed from their dtype, other columns from an evenly
+    spaced sample of their values: a column whose values all share a type gets that type, a mix of ints and
+    floats is float, and anything else (or a column with no values) is string.
+    """
+
+    if is_record_array(data):
+        data = record_array_to_frame(data)
+    if is_frame(data):
+        import pandas as pd
+
+        schema = {}
+        for header, column in zip([str(column) for column in data.columns], data.columns):
+            dtype = data[column].dtype
+            if pd.api.types.is_bool_dtype(dtype):
+                schema[header] = 'bool'
+            elif pd.api.types.is_integer_dtype(dtype):
+                schema[header] = 'int'
+            elif pd.api.types.is_float_dtype(dtype):
+                schema[header] = 'float'
+            elif pd.api.types.is_datetime64_any_dtype(dtype):
+                schema[header] = 'datetime'
+            else:
+                schema[header] = infer_schema(data[column].tolist(), [None], sample_size)[None]
+        return {header: schema.get(header, 'string') for header in headers}
+
+    sample = data[::max(1, len(data) // sample_size)][:sample_size] if len(data) else []
+    schema = {}
+    for i, header in enumerate(headers):
+        if header is None:  # A single column of values
+            values = sample
+        elif sample and isinstance(sample[0], dict):
+            values = [record.get(header) for record in sample]
+        else:
+            values = [row[i] for row in sample]
+        types = {infer_value_type(value) for value in values if not is_missing(value)}
+        if types == {'int', 'float'}:
+            types = {'float'}
+        schema[header] = types.pop() if len(types) == 1 else 'string'
+    return schema
+
+
+def to_serial(value: Any) -> float:
+    """
+    Convert a date or datetime into a Sheets serial number: days since 1899-12-30, with the time of day as
+    the fraction.  Timezone aware datetimes are converted at their wall clock time.
+    """
+
+    if isinstance(value, numpy_types()['datetime']):
+        import pandas as pd
+
+        value = pd.Timestamp(value)
+    if isinstance(value, datetime.datetime):
+        delta = value.replace(tzinfo=None) - SHEETS_EPOCH
+        return delta.days + (delta.seconds + delta.microseconds / 1_000_000) / 86_400
+    return (value - SHEETS_EPOCH.date()).days
+
+
+def encode_value(value: Any, column_type: str) -> Any:
+    """
+    Convert a single value to the JSON value sent to Google Sheets for a column of the provided type.
+    Numbers and booleans are sent as native JSON, dates as serial numbers.  Missing values become None,
+    and values that don't fit the column type (or JSON numbers) fall back to strings.
+    """
+
+    if is_missing(value):
+        return None
+    types = numpy_types()
+    try:
+        if column_type == 'int' and abs(int(value)) < MAX_SAFE_INTEGER and int(value) == value:
+            return int(value)
+        if column_type == 'float' and math.isfinite(value) and not isinstance(value, (bool, *types['bool'])):
+            return float(value)
+        if column_type == 'bool' and isinstance(value, (bool, *types['bool'])):
+            return bool(value)
+        if column_type in ('date', 'datetime') and isinstance(value, (datetime.date, *types['datetime'])):
+            return to_serial(value)
+    except (TypeError, ValueError):
+        pass
+    return serialize_value(value)
+
+
+def encode_column(values: 'pd.Series', column_type: str) -> List[Any]:
+    """
+    Convert a DataFrame column to the JSON values sent to Google Sheets, vectorized where the dtype allows.
+    """
+
+    import numpy as np
+    import pandas as pd
+
+    dtype = values.dtype
+    if column_type == 'bool' and pd.api.types.is_bool_dtype(dtype) and not values.hasnans:
+        return values.tolist()
+    native = not pd.api.types.is_extension_array_dtype(dtype)  # NumPy dtype, without pandas.NA
+    if column_type == 'int' and pd.api.types.is_integer_dtype(dtype) and native:
+        if not len(values) or values.abs().max() < MAX_SAFE_INTEGER:
+            return values.tolist()
+    if column_type == 'float' and pd.api.types.is_float_dtype(dtype) and native:
+        values = values.astype(object).where(np.isfinite(values.to_numpy()), None)
+        return values.tolist()
+    if column_type == 'datetime' and pd.api.types.is_datetime64_any_dtype(dtype):
+        if getattr(dtype, 'tz', None) is not None:
+            values = values.dt.tz_localize(None)
+        serials = (values - pd.Timestamp(SHEETS_EPOCH)) / pd.Timedelta(days=1)
+        return serials.astype(object).where(values.notna(), None).tolist()
+    return [encode_value(value, column_type) for value in values.tolist()]
+
+
+def encode_chunk(chunk, headers: List[str], schema: Dict[str, str]) -> List[List[Any]]:
+    """
+    Convert a chunk of data into rows of typed JSON values in the order of the provided headers, by the
+    column types of the provided schema (header -> type).  DataFrames and NumPy record arrays are converted
+    column by column, lists of dicts or tuples value by value.
+    """
+
+    types = [schema.get(header, 'string') for header in headers]
+    if is_record_array(chunk):
+        chunk = record_array_to_frame(chunk)
+    if is_frame(chunk):
+        if [str(column) for column in chunk.columns] != headers:
+            chunk = chunk[headers]
+        columns = [encode_column(chunk.iloc[:, i], column_type) for i, column_type in enumerate(types)]
+        return [list(row) for row in zip(*columns)]
+    if len(chunk) and not isinstance(chunk[0], dict):
+        return [[encode_value(value, column_type) for value, column_type in zip(row, types)] for row in chunk]
+    return [
+        [encode_value(record.get(header), column_type) for header, column_type in zip(headers, types)]
+        for record in chunk
+    ]
+
+
+def resolve_schema(schema, data, headers: List[str]) -> Optional[Dict[str, str]]:
+    """
+    Return the column types to encode a dataset with: None for plain strings, the inferred types for a
+    schema of "infer", or the provided types (header -> type) with string for any column left out.
+    """
+
+    if schema is None:
+        return None
+    if schema == 'infer':
+        return infer_schema(data, headers)
+    unknown = {column_type for column_type in schema.values() if column_type not in COLUMN_TYPES}
+    if unknown:
+        raise ValueError(f'Unknown column types {sorted(unknown)}, expected one of {", ".join(COLUMN_TYPES)}.')
+    return {header: schema.get(header, 'string') for header in headers}
+
+
+def number_formats(headers: List[str], schema: Optional[Dict[str, str]]) -> Dict[int, dict]:
+    """
+    Return the number format of every column (zero based index -> format) that needs one to display its
+    serial numbers as dates.
+    """
+
+    if not schema:
+        return {}
+    return {
+        i: NUMBER_FORMATS[schema[header]] for i, header in enumerate(headers) if schema.get(header) in NUMBER_FORMATS
+    }
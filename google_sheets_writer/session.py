@@ -0,0 +1,297 @@
+import logging
+import math
+import queue
+import threading
+import time
+
+from typing import Dict, Iterable, List, Optional, Union
+from google_sheets_writer.chunker import AdaptiveChunker, cell_bytes
+from google_sheets_writer.report import RunReport
+from google_sheets_writer.serializer import number_formats, resolve_schema
+
+_CLOSE = object()  # Tells the flush thread to stop once the flushes queued before it are written
+
+
+class WriterSession:
+    """
+    Buffered sink for rows that are produced over time.  Rows added with add_row() and add_rows() are
+    buffered and flushed to Google Sheets once the buffer holds max_buffer_rows rows or max_buffer_bytes
+    bytes, or once its oldest row has waited flush_interval seconds.  Flushes are written by a background
+    thread, so producers only block when max_pending_flushes flushes are already queued.
+
+    Rows are written like a stream: every "<name>_<N>" workbook is laid out with full size "<name>_<N>"
+    worksheets, which are filled in order up to the cell limits and trimmed once the workbook is full or
+    the session is closed.  Closing the session flushes the remaining rows and removes the workbooks left
+    over from previous runs.  Sessions are thread-safe, the rows of each producer thread are written in
+    the order they were added.
+
+    Use it as a context manager, or call close() when done.  An error while flushing is re-raised by the
+    next add_row(), add_rows() or close() call, and no further rows are written.  Until the session is
+    closed, its writer can't start another write or session.
+    """
+
+    def __init__(
+        self,
+        writer,  # GoogleSheetsWriter the rows are written with
+        workbook_name: str,
+        headers: Optional[List[str]] = None,  # column names, required when rows are tuples rather than dicts
+        max_buffer_rows: int = 10_000,  # flush once the buffer holds this many rows
+        max_buffer_bytes: int = 2_000_000,  # flush once the buffered rows add up to about this many payload bytes
+        flush_interval: Optional[float] = 5,  # seconds before buffered rows are flushed (None = only on size)
+        max_pending_flushes: int = 2,  # flushes queued for the background thread before producers block
+        chunk_size: Optional[int] = 100_000,
+        chunk_bytes: Optional[int] = 2_000_000,
+        max_cells_per_sheet: int = 3_000_000,
+        max_cells_per_workbook: int = 9_000_000,
+        schema: Union[None, str, Dict[str, str]] = None,
+    ):
+        self.writer = writer
+        self.workbook_name = workbook_name
+        self.headers = headers
+        self.max_buffer_rows = max_buffer_rows
+        self.max_buffer_bytes = max_buffer_bytes
+        self.flush_interval = flush_interval
+        self.max_cells_per_sheet = max_cells_per_sheet
+        self.max_cells_per_workbook = max_cells_per_workbook
+        self.schema = schema
+        self.report = RunReport(workbook_name, 'session')
+        self.records_written = 0
+        self.number_of_workbooks = 0  # Counter for how many workbooks have been written to
+        self._chunker = AdaptiveChunker(max_rows=chunk_size, target_bytes=chunk_bytes)
+        self._lock = threading.Lock()
+        self._order_lock = threading.Lock()  # held from taking the buffer until it's queued, keeps flushes in order
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._buffered_at = None  # monotonic time the oldest buffered row was added
+        self._flushes = queue.Queue(maxsize=max_pending_flushes)
+        self._error = None  # exception raised by the flush thread
+        self._closed = False
+
+        # Position of the next row, only used by the flush thread
+        self._worksheets = {}  # worksheet title -> Worksheet, laid out at full size in the current workbook
+        self._written_sheets = {}  # worksheet title -> (rows, cols) actually used in the current workbook
+        self._worksheet_name = None
+        self._n_filled = 0  # records in the current worksheet
+
+        self.writer._start_report(self.report)  # Raises if the writer is busy with another write or session
+        self._scheduler_before = self.writer.scheduler.metrics()
+        self._thread = threading.Thread(target=self._run, name=f'session-{workbook_name}', daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> 'WriterSession':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add_row(self, row: Union[dict, tuple, list]):
+        """
+        Add a single row to the buffer, see add_rows().
+        """
+
+        self.add_rows([row])
+
+    def add_rows(self, rows: Iterable[Union[dict, tuple, list]]):
+        """
+        Add rows (dicts, or tuples in the order of the headers) to the buffer, and hand the buffer over to
+        the flush thread if it has reached its row or byte threshold.
+        """
+
+        self._raise_error()
+        if self._closed:
+            raise ValueError(f'The session writing to "{self.workbook_name}" is closed.')
+        rows = list(rows)
+        if not rows:
+            return
+        n_bytes = sum(
+            sum(cell_bytes(value) for value in (row.values() if isinstance(row, dict) else row)) + 2 for row in rows
+        )
+        with self._order_lock:
+            with self._lock:
+                if self.headers is None:
+                    if not isinstance(rows[0], dict):
+                        raise ValueError('Headers are required when rows are tuples rather than dicts.')
+                    self.headers = list(rows[0].keys())
+                if not self._buffer:
+                    self._buffered_at = time.monotonic()
+                self._buffer.extend(rows)
+                self._buffer_bytes += n_bytes
+                full = len(self._buffer) >= self.max_buffer_rows or self._buffer_bytes >= self.max_buffer_bytes
+                records = self._take_buffer() if full else None
+            if records:
+                self._flushes.put(records)  # Blocks while max_pending_flushes flushes are waiting
+
+    def flush(self):
+        """
+        Hand the buffered rows over to the flush thread, without waiting for them to be written.
+        """
+
+        with self._order_lock:
+            with self._lock:
+                records = self._take_buffer()
+            if records:
+                self._flushes.put(records)
+
+    def close(self) -> RunReport:
+        """
+        Flush the remaining rows and wait for every flush to be written, then trim the last worksheet and
+        remove any extra workbooks from previous runs.  Returns the RunReport of the session.
+        """
+
+        if self._closed:
+            return self.report
+        self._closed = True
+        try:
+            self.flush()
+            self._flushes.put(_CLOSE)
+            self._thread.join()
+            self._raise_error()
+
+            if not self.number_of_workbooks:
+                logging.warning(f'No records to write to "{self.workbook_name}".')
+                return self.report
+            self._trim_workbook()
+
+            # Remove any extra workbooks from previous runs
+            self.writer.cleanup(
+                workbook_name=self.workbook_name,
+                max_objects=self.number_of_workbooks + 1,
+            )
+        finally:
+            if self.writer._report is self.report:
+                self.writer._report = None
+            scheduler_after = self.writer.scheduler.metrics()
+            self.report.finish({
+                name: scheduler_after[name] - self._scheduler_before[name] for name in scheduler_after
+            })
+        logging.info(f'Finished writing {self.report.summary()}')
+        return self.report
+
+    def _take_buffer(self) -> List:
+        # Swap the buffer for an empty one, the lock must be held
+        records, self._buffer, self._buffer_bytes, self._buffered_at = self._buffer, [], 0, None
+        return records
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        """
+        Write the queued flushes in order, and flush the buffer whenever its oldest row has waited
+        flush_interval seconds.  Once a flush fails, later flushes are dropped.
+        """
+
+        while True:
+            with self._lock:
+                if self.flush_interval is None:
+                    timeout = None
+                elif self._buffered_at is None:
+                    timeout = self.flush_interval
+                else:
+                    timeout = max(0.0, self._buffered_at + self.flush_interval - time.monotonic())
+            try:
+                records = self._flushes.get(timeout=timeout)
+            except queue.Empty:
+                # Flushes queued by producers in the meantime hold older rows, so they have to be written first
+                if not self._order_lock.acquire(blocking=False):
+                    continue
+                try:
+                    with self._lock:
+                        due = (
+                            self._flushes.empty() and self._buffered_at is not None
+                            and time.monotonic() - self._buffered_at >= self.flush_interval
+                        )
+                        records = self._take_buffer() if due else None
+                finally:
+                    self._order_lock.release()
+                if not records:
+                    continue
+            if records is _CLOSE:
+                return
+            if self._error is None:
+                try:
+                    self._write(records)
+                except Exception as error:
+                    logging.error(f'Failed to flush {len(records):,} records to "{self.workbook_name}": {error}')
+                    self._error = error
+
+    def _write(self, records: List):
+        """
+        Write records after the last one written, moving on to the next worksheet or workbook whenever the
+        current one is full.
+        """
+
+        if not self.records_written:
+            self.schema = resolve_schema(self.schema, records, self.headers)  # From the first flush
+        rows_per_worksheet = math.ceil(self.max_cells_per_sheet / len(self.headers))
+        start = 0
+        while start < len(records):
+            if self._worksheet_name is None or self._n_filled == rows_per_worksheet:
+                self._next_worksheet()
+            n_records = min(len(records) - start, rows_per_worksheet - self._n_filled)
+            self.writer._write_chunks(
+                self._worksheets[self._worksheet_name],
+                self._chunker.chunks(records, start=start, n_records=n_records),
+                self.headers,
+                chunker=self._chunker,
+                start_row=self._n_filled + 2 if self._n_filled else 1,  # Below the header row and the records there
+                schema=self.schema,
+            )
+            self._n_filled += n_records
+            self._written_sheets[self._worksheet_name] = (self._n_filled + 1, len(self.headers))
+            self.records_written += n_records
+            start += n_records
+
+    def _next_worksheet(self):
+        """
+        Move on to the next worksheet of the current workbook or, once it is full, to the next workbook,
+        laid out with every worksheet it can hold at full size.
+        """
+
+        self._n_filled = 0
+        titles = list(self._worksheets)
+        if self._worksheet_name is not None and titles.index(self._worksheet_name) + 1 < len(titles):
+            self._worksheet_name = titles[titles.index(self._worksheet_name) + 1]
+            return
+        if self.number_of_workbooks:
+            self._trim_workbook()
+
+        # Define dynamic workbook name
+        self.number_of_workbooks += 1
+        _workbook_name = self.workbook_name + f'_{self.number_of_workbooks}'
+
+        logging.info(f'Starting write to "{_workbook_name}" workbook...')
+
+        # Create workbook if it doesn't exist
+        if not self.writer.check_existence(workbook_name=_workbook_name):
+            self.writer.create_workbook(_workbook_name)
+
+        # Lay out every worksheet the workbook can hold at full size, the total is unknown up front
+        n_cols = len(self.headers)
+        worksheets_per_book = math.ceil(self.max_cells_per_workbook / self.max_cells_per_sheet)
+        full_sheets = {
+            self.workbook_name + f'_{j}': (math.ceil(self.max_cells_per_sheet / n_cols) + 1, n_cols)
+            for j in range(1, worksheets_per_book + 1)
+        }
+        worksheets = self.writer.apply_layout(_workbook_name, full_sheets, prefix=self.workbook_name)
+        formats = number_formats(self.headers, self.schema)
+        if formats:
+            self.writer.apply_number_formats(_workbook_name, [worksheets[title] for title in full_sheets], formats)
+        self._worksheets = {title: worksheets[title] for title in full_sheets}
+        self._written_sheets = {}
+        self._worksheet_name = next(iter(full_sheets))
+
+    def _trim_workbook(self):
+        """
+        Trim the last worksheet of the current workbook and remove the ones that weren't needed.
+        """
+
+        _workbook_name = self.workbook_name + f'_{self.number_of_workbooks}'
+        full_sheets = {title: (ws.row_count, ws.col_count) for title, ws in self._worksheets.items()}
+        if self._written_sheets != full_sheets:
+            self.writer.apply_layout(_workbook_name, self._written_sheets, prefix=self.workbook_name, clear=False)
+        records_written = sum(rows - 1 for rows, _ in self._written_sheets.values())
+        logging.info(
+            f'Wrote {records_written:,} records to "{_workbook_name}" in {len(self._written_sheets):,} sheets.'
+        )
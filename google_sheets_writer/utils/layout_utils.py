@@ -0,0 +1,243 @@
+import math
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from google_sheets_writer.bulk_load import SPREADSHEET_MIME_TYPE
+
+# Sheets API batchUpdate requests: https://developers.google.com/sheets/api/reference/rest/v4/spreadsheets/request
+# Drive API search queries: https://developers.google.com/drive/api/guides/ref-search-terms
+
+DEFAULT_SHEET_TITLE = 'Sheet1'  # Sheet that Google adds to every new workbook
+UNREPEATABLE_REQUESTS = ('addSheet', 'duplicateSheet', 'createDeveloperMetadata')  # Requests that add a new object
+
+
+def is_partition_title(title: str, prefix: str) -> bool:
+    """
+    Returns a boolean indicating whether the provided title is a partition title, i.e. "<prefix>_<N>".
+    """
+
+    base, _, suffix = title.rpartition('_')
+    return base == prefix and suffix.isdigit()
+
+
+def partition_files_query(prefix: str) -> str:
+    """
+    Return the Drive query for the spreadsheets whose name starts with "<prefix>_", so the "<prefix>_<N>"
+    partitions are found without listing every spreadsheet.  Drive matches names by prefix, so the results
+    still have to be filtered with is_partition_title() or stale_partitions().
+    """
+
+    name = quote_query_value(f'{prefix}_')
+    return f"name contains {name} and mimeType = '{SPREADSHEET_MIME_TYPE}' and trashed = false"
+
+
+def workbook_files_query(name: str) -> str:
+    """
+    Return the Drive query for the spreadsheets with exactly the provided name that aren't in the trash.
+    """
+
+    return f"name = {quote_query_value(name)} and mimeType = '{SPREADSHEET_MIME_TYPE}' and trashed = false"
+
+
+def quote_query_value(value: str) -> str:
+    """
+    Quote a string for a Drive query, escaping backslashes and single quotes.
+    """
+
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def stale_partitions(objects: Iterable[Tuple[str, Any]], prefix: str, max_objects: int) -> List[Any]:
+    """
+    Given (title, id) pairs of workbooks or worksheets, return the ids of the "<prefix>_<N>" partitions
+    numbered max_objects or higher, in order of their number.  Every stale partition is selected, including
+    the ones past a gap in the numbering.
+    """
+
+    stale = [
+        (int(title.rpartition('_')[2]), object_id)
+        for title, object_id in objects
+        if is_partition_title(title, prefix) and int(title.rpartition('_')[2]) >= max_objects
+    ]
+    return [object_id for _, object_id in sorted(stale, key=lambda partition: partition[0])]
+
+
+def plan_layout(
+    existing_sheets: Dict[str, int],
+    desired_sheets: Dict[str, Tuple[int, int]],
+    prefix: Optional[str],
+    clear: bool = True,
+) -> List[Dict]:
+    """
+    Given the current sheets of a workbook (title -> sheet id) and the desired sheets (title -> (rows, cols)),
+    return the list of batchUpdate requests that turns the first into the second.
+
+    Desired sheets that already exist are cleared (unless clear is False) and resized, missing ones are
+    added, and the default "Sheet1" plus any "<prefix>_<N>" partitions left over from previous runs are
+    deleted.  With a prefix of None, only "Sheet1" is deleted.  Deletes are placed last so the workbook
+    always keeps at least one sheet.
+    """
+
+    requests = []
+
+    # Clear and resize existing sheets, add missing ones
+    for title, (rows, cols) in desired_sheets.items():
+        grid_properties = {'rowCount': rows, 'columnCount': cols}
+        if title in existing_sheets:
+            sheet_id = existing_sheets[title]
+            if clear:
+                requests.append({
+                    'updateCells': {
+                        'range': {'sheetId': sheet_id},
+                        'fields': 'userEnteredValue',
+                    }
+                })
+            requests.append({
+                'updateSheetProperties': {
+                    'properties': {'sheetId': sheet_id, 'gridProperties': grid_properties},
+                    'fields': 'gridProperties(rowCount,columnCount)',
+                }
+            })
+        else:
+            requests.append({
+                'addSheet': {
+                    'properties': {'title': title, 'gridProperties': grid_properties},
+                }
+            })
+
+    # Delete the default sheet and stale partitions
+    for title, sheet_id in existing_sheets.items():
+        if title in desired_sheets:
+            continue
+        if title == DEFAULT_SHEET_TITLE or (prefix is not None and is_partition_title(title, prefix)):
+            requests.append({'deleteSheet': {'sheetId': sheet_id}})
+
+    return requests
+
+
+def is_repeatable(requests: Iterable[Dict]) -> bool:
+    """
+    Returns a boolean indicating whether the provided batchUpdate requests can safely be sent twice.  A
+    repeated request that adds a sheet fails or adds a duplicate, so it must not be retried blindly.
+    """
+
+    return not any(kind in request for request in requests for kind in UNREPEATABLE_REQUESTS)
+
+
+def partition_records(
+    n_records: int,
+    n_cols: int,
+    max_cells_per_sheet: int,
+    max_cells_per_workbook: int,
+) -> List[List[Tuple[int, int]]]:
+    """
+    Split n_records records of n_cols columns into workbooks and worksheets that respect the provided
+    cell limits.  Returns one list per workbook, holding a (first record, number of records) tuple per
+    worksheet.
+    """
+
+    total_cell_count = n_records * n_cols  # Calculate total number of cells
+    number_of_workbooks = math.ceil(total_cell_count / max_cells_per_workbook)  # Number of workbooks needed
+    number_of_worksheets = math.ceil(total_cell_count / max_cells_per_sheet)  # Number of worksheets needed
+    worksheets_per_book = math.ceil(max_cells_per_workbook / max_cells_per_sheet)  # Worksheets per workbook
+    rows_per_worksheet = math.ceil(max_cells_per_sheet / n_cols)  # Rows per worksheet
+
+    cursor = 0  # Set cursor to 0
+    current_worksheet = 0  # Set current worksheet counter to 0
+    workbooks = []
+    for _ in range(number_of_workbooks):
+        worksheet_ranges = []
+        for _ in range(worksheets_per_book):
+            if current_worksheet < number_of_worksheets and cursor < n_records:
+                n_records_to_write = min(rows_per_worksheet, n_records - cursor)
+                worksheet_ranges.append((cursor, n_records_to_write))
+                cursor += n_records_to_write
+            current_worksheet += 1
+        if worksheet_ranges:
+            workbooks.append(worksheet_ranges)
+
+    return workbooks
+
+
+def partition_append(
+    n_records: int,
+    n_cols: int,
+    max_cells_per_sheet: int,
+    max_cells_per_workbook: int,
+    tail: Tuple[int, int, int] = (0, 0, 0),
+) -> Dict[int, List[Tuple[int, int, int, int]]]:
+    """
+    Plan where n_records new records go when they are appended after the tail of a dataset, given as
+    (workbook number, worksheet number, records in that worksheet), or (0, 0, 0) if nothing was written
+    yet.  The tail worksheet is filled up to the cell limit first, then new worksheets and workbooks are
+    started with the same limits as partition_records.
+
+    Returns a dict of workbook number -> list of (worksheet number, records already in the worksheet,
+    first new record, number of new records) tuples.
+    """
+
+    worksheets_per_book = math.ceil(max_cells_per_workbook / max_cells_per_sheet)  # Worksheets per workbook
+    rows_per_worksheet = math.ceil(max_cells_per_sheet / n_cols)  # Rows per worksheet
+
+    workbook, worksheet, filled = tail
+    workbook = max(workbook, 1)
+    cursor = 0
+    workbooks = {}
+    while cursor < n_records:
+        # Move on to the next worksheet, and the next workbook, once the current one is full
+        if worksheet == 0 or filled >= rows_per_worksheet:
+            worksheet, filled = worksheet + 1, 0
+            if worksheet > worksheets_per_book:
+                workbook, worksheet = workbook + 1, 1
+        n_records_to_write = min(rows_per_worksheet - filled, n_records - cursor)
+        workbooks.setdefault(workbook, []).append((worksheet, filled, cursor, n_records_to_write))
+        cursor += n_records_to_write
+        filled += n_records_to_write
+
+    return workbooks
+
+
+def number_format_requests(sheet_id: int, formats: Dict[int, dict]) -> List[Dict]:
+    """
+    Return the batchUpdate requests that apply the provided number formats (zero based column index ->
+    NumberFormat) to the columns of a worksheet, below the header row.
+    """
+
+    return [
+        {
+            'repeatCell': {
+                'range': {'sheetId': sheet_id, 'startRowIndex': 1, 'startColumnIndex': i, 'endColumnIndex': i + 1},
+                'cell': {'userEnteredFormat': {'numberFormat': number_format}},
+                'fields': 'userEnteredFormat.numberFormat',
+            }
+        }
+        for i, number_format in sorted(formats.items())
+    ]
+
+
+def plan_reads(
+    worksheets: List[Tuple[str, int, int]],
+    rows_per_request: int,
+) -> List[List[Tuple[str, int, int]]]:
+    """
+    Split the data rows of the worksheets of a workbook, given as (title, rows, cols) with the header in
+    the first row, into read requests of at most rows_per_request rows.  Returns one list of A1 ranges per
+    request, as (title, first row, last row) tuples.  A request can span the end of one worksheet and the
+    start of the next, so every request but the last is full.
+    """
+
+    requests = []
+    ranges = []
+    n_rows = 0
+    for title, rows, _ in worksheets:
+        first_row = 2  # Below the header row
+        while first_row <= rows:
+            last_row = min(rows, first_row + rows_per_request - n_rows - 1)
+            ranges.append((title, first_row, last_row))
+            n_rows += last_row - first_row + 1
+            first_row = last_row + 1
+            if n_rows == rows_per_request:
+                requests.append(ranges)
+                ranges, n_rows = [], 0
+    if ranges:
+        requests.append(ranges)
+    return requests
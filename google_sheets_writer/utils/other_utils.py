@@ -1,4 +1,4 @@
-from typing import Optional, List, Union
+from typing import Any, Iterable, Iterator, Optional, List, Tuple, Union
 
 
 def chunk_list(
@@ -19,3 +19,23 @@ def chunk_list(
     else:
         chunked_iter = [iter_obj[x:x+chunk_size] for x in range(0, len(iter_obj), chunk_size)]
         return chunked_iter
+
+
+def batch_by_bytes(
+    items: Iterable[Tuple[Any, int]],
+    max_bytes: int,
+) -> Iterator[List]:
+    """
+    Given an iterable of (item, size in bytes) pairs, this function will yield lists of consecutive items
+    whose sizes add up to at most max_bytes.  An item larger than max_bytes gets a list of its own.
+    """
+
+    batch, batch_bytes = [], 0
+    for item, n_bytes in items:
+        if batch and batch_bytes + n_bytes > max_bytes:
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(item)
+        batch_bytes += n_bytes
+    if batch:
+        yield batch
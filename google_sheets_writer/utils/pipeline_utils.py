@@ -0,0 +1,92 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+
+def prefetch(
+    items: Iterable,
+    func: Callable[[Any], Any],
+    depth: Optional[int] = 2,
+) -> Iterator:
+    """
+    Apply func to each item in a background thread and yield the results in order, keeping at most
+    depth items in flight ahead of the consumer.  This lets the next item be prepared (e.g. serialized)
+    while the consumer is busy with the current one (e.g. uploading it).
+
+    Items are pulled from the iterable in the calling thread and only func runs in the background, so
+    sources that must stay on the thread that created them (e.g. a sqlite3 cursor) can be prefetched.
+    Exceptions raised by func are re-raised in the consumer.  If the consumer stops early, items that
+    haven't started yet are cancelled and no further items are pulled.  A depth of 0 or None disables the
+    background thread.
+    """
+
+    if not depth:
+        yield from map(func, items)
+        return
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch') as executor:
+        futures = deque()
+        try:
+            for item in items:
+                futures.append(executor.submit(func, item))
+                if len(futures) > depth:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def run_in_pool(
+    func: Callable,
+    tasks: Iterable[tuple],
+    max_workers: Optional[int] = None,
+) -> list:
+    """
+    Call func(*task) for every task on a thread pool of max_workers threads and return the results in
+    task order.  If a task fails, tasks that haven't started yet are cancelled and the error is re-raised.
+    A max_workers of 1 or None runs the tasks one after the other in the calling thread.
+    """
+
+    if not max_workers or max_workers == 1:
+        return [func(*task) for task in tasks]
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pool') as executor:
+        futures = [executor.submit(func, *task) for task in tasks]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def map_in_pool(
+    func: Callable[[Any], Any],
+    items: Iterable,
+    max_workers: Optional[int] = None,
+) -> Iterator:
+    """
+    Apply func to each item on a thread pool of max_workers threads and yield the results in order.  At
+    most max_workers items are in flight or waiting to be consumed, so memory stays bounded however many
+    items there are.  If func fails or the consumer stops early, items that haven't started yet are
+    cancelled.  A max_workers of 1 or None applies func in the calling thread.
+    """
+
+    if not max_workers or max_workers == 1:
+        yield from map(func, items)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pool') as executor:
+        futures = deque()
+        try:
+            for item in items:
+                futures.append(executor.submit(func, item))
+                if len(futures) >= max_workers:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+        finally:
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,225 @@
+import base64
+import hashlib
+import json
+import os
+
+from typing import Any, Dict, List, Optional, Tuple
+from google_sheets_writer.utils.layout_utils import is_partition_title
+
+# Sheets API developer metadata: https://developers.google.com/sheets/api/guides/metadata
+
+MANIFEST_KEY = 'google_sheets_writer_manifest'  # Developer metadata key the manifest of a worksheet is kept under
+MAX_MANIFEST_CHARS = 30_000  # Google caps the developer metadata of a sheet at 30,000 characters
+HASH_CHARS = 8  # Characters per block hash (6 byte digest, base64 encoded)
+CELL_OVERHEAD_BYTES = 40  # JSON added around every value of an updateCells request
+
+
+def hash_block(values: List[List[Optional[str]]]) -> str:
+    """
+    Return a short hash of a block of serialized rows.  Blocks are only ever compared with the block at
+    the same position of the previous run, so a 48 bit digest is plenty.
+    """
+
+    payload = json.dumps(values, separators=(',', ':')).encode()
+    return base64.b64encode(hashlib.blake2b(payload, digest_size=6).digest()).decode()
+
+
+def build_manifest(headers: List[str], start: int, n_records: int, block_size: int, hashes: List[str]) -> dict:
+    """
+    Return the manifest of a worksheet: the layout it was written with and the hash of every block of
+    block_size rows, in order.
+    """
+
+    return {
+        'headers': list(headers),
+        'start': start,  # first record of the dataset written to the worksheet
+        'n_records': n_records,
+        'block_size': block_size,
+        'blocks': ''.join(hashes),
+    }
+
+
+def block_hashes(manifest: dict) -> List[str]:
+    """
+    Return the list of block hashes stored in a manifest.
+    """
+
+    blocks = manifest['blocks']
+    return [blocks[i:i + HASH_CHARS] for i in range(0, len(blocks), HASH_CHARS)]
+
+
+def is_compatible(manifest: Optional[dict], headers: List[str], start: int, block_size: int) -> bool:
+    """
+    Returns a boolean indicating whether a worksheet written with the provided manifest can be brought
+    up to date block by block, i.e. the headers, the partition boundary and the block size are unchanged.
+    """
+
+    return (
+        manifest is not None
+        and manifest.get('headers') == list(headers)
+        and manifest.get('start') == start
+        and manifest.get('block_size') == block_size
+    )
+
+
+def extended_value(value: Any) -> dict:
+    """
+    Return the ExtendedValue of a single value: booleans and numbers keep their type, anything else is
+    written as a string.
+    """
+
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, (int, float)):
+        return {'numberValue': value}
+    return {'stringValue': value}
+
+
+def update_cells_request(sheet_id: int, row_index: int, values: List[List[Any]]) -> dict:
+    """
+    Return a batchUpdate request that writes rows of values to a worksheet from the provided (zero based)
+    row onwards.  Values are written as is, like a RAW values update, and None clears the cell.
+    """
+
+    return {
+        'updateCells': {
+            'rows': [
+                {'values': [{'userEnteredValue': extended_value(value)} if value is not None else {} for value in row]}
+                for row in values
+            ],
+            'start': {'sheetId': sheet_id, 'rowIndex': row_index, 'columnIndex': 0},
+            'fields': 'userEnteredValue',
+        }
+    }
+
+
+def estimate_request_bytes(values: List[List[Any]]) -> int:
+    """
+    Estimate the size in bytes of the updateCells request for the provided rows of values.
+    """
+
+    return sum(sum(len(str(value)) if value is not None else 0 for value in row) for row in values) + (
+        sum(len(row) for row in values) * CELL_OVERHEAD_BYTES
+    )
+
+
+def parse_manifests(spreadsheet_metadata: dict) -> Dict[str, Tuple[dict, int]]:
+    """
+    Extract the manifests from the metadata of a spreadsheet, fetched with the developerMetadata of
+    its sheets.  Returns a dict of worksheet title to (manifest, developer metadata id).
+    """
+
+    manifests = {}
+    for sheet in spreadsheet_metadata.get('sheets', []):
+        for metadata in sheet.get('developerMetadata', []):
+            if metadata.get('metadataKey') == MANIFEST_KEY:
+                manifest = json.loads(metadata['metadataValue'])
+                manifests[sheet['properties']['title']] = (manifest, metadata['metadataId'])
+    return manifests
+
+
+def manifest_requests(
+    sheet_ids: Dict[str, int],
+    manifests: Dict[str, dict],
+    existing: Dict[str, Tuple[dict, Optional[int]]],
+) -> Tuple[List[dict], List[str]]:
+    """
+    Return the batchUpdate requests that store the provided manifests (worksheet title -> manifest) as
+    developer metadata on their worksheets, replacing the existing ones.  Manifests that exceed the
+    metadata limit are dropped along with the existing one, so a stale manifest is never left behind.
+    Returns the requests and the titles whose manifest was too large to store.
+    """
+
+    requests = []
+    too_large = []
+    for title, manifest in manifests.items():
+        value = json.dumps(manifest, separators=(',', ':'))
+        metadata_id = existing.get(title, (None, None))[1]
+        if len(value) > MAX_MANIFEST_CHARS:
+            too_large.append(title)
+            if metadata_id is not None:
+                requests.append(delete_manifest_request(metadata_id))
+        elif metadata_id is not None:
+            requests.append({
+                'updateDeveloperMetadata': {
+                    'dataFilters': [{'developerMetadataLookup': {'metadataId': metadata_id}}],
+                    'developerMetadata': {'metadataValue': value},
+                    'fields': 'metadataValue',
+                }
+            })
+        else:
+            requests.append({
+                'createDeveloperMetadata': {
+                    'developerMetadata': {
+                        'metadataKey': MANIFEST_KEY,
+                        'metadataValue': value,
+                        'location': {'sheetId': sheet_ids[title]},
+                        'visibility': 'DOCUMENT',
+                    }
+                }
+            })
+    return requests, too_large
+
+
+def delete_manifest_request(metadata_id: int) -> dict:
+    """
+    Return a batchUpdate request that deletes the manifest with the provided developer metadata id.
+    """
+
+    return {'deleteDeveloperMetadata': {'dataFilter': {'developerMetadataLookup': {'metadataId': metadata_id}}}}
+
+
+def delete_manifests_request() -> dict:
+    """
+    Return a batchUpdate request that deletes the manifests of every worksheet in a workbook.
+    """
+
+    return {'deleteDeveloperMetadata': {'dataFilter': {'developerMetadataLookup': {'metadataKey': MANIFEST_KEY}}}}
+
+
+def load_manifests(path: str) -> Dict[str, Dict[str, dict]]:
+    """
+    Load the manifests kept in a local JSON file, as a dict of workbook name to worksheet title to manifest.
+    Returns an empty dict if the file doesn't exist yet.
+    """
+
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_manifests(path: str, workbook_name: str, manifests: Dict[str, dict]):
+    """
+    Replace the manifests of a workbook in a local JSON file, see dump_manifests().
+    """
+
+    all_manifests = load_manifests(path)
+    all_manifests[workbook_name] = manifests
+    dump_manifests(path, all_manifests)
+
+
+def drop_manifests(path: str, prefix: str):
+    """
+    Remove the manifests of the "<prefix>_<N>" workbooks from a local JSON file, if there are any.
+    """
+
+    all_manifests = load_manifests(path)
+    stale = [name for name in all_manifests if is_partition_title(name, prefix)]
+    if not stale:
+        return
+    for name in stale:
+        del all_manifests[name]
+    dump_manifests(path, all_manifests)
+
+
+def dump_manifests(path: str, all_manifests: Dict[str, Dict[str, dict]]):
+    """
+    Write the manifests of every workbook to a local JSON file.  The file is written to a temporary file
+    first, so an interrupted save never leaves a half written manifest behind.
+    """
+
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump(all_manifests, file)
+    os.replace(temp_path, path)
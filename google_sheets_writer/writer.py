@@ -1,12 +1,62 @@
 import math
-import pandas as pd
-import numpy as np
+import time
 import gspread
 import logging
+import threading
 
-from typing import Optional, Literal
-from google_sheets_writer.utils.other_utils import chunk_list
-from functools import cached_property
+from itertools import chain, islice
+from typing import TYPE_CHECKING, Callable, Collection, Dict, Iterable, Iterator, List, Optional, Literal, Tuple, Union
+from google_sheets_writer.bulk_load import SPREADSHEET_MIME_TYPE, csv_pieces, start_upload, upload_piece
+from google_sheets_writer.chunker import AdaptiveChunker, estimate_payload_bytes, is_payload_error
+from google_sheets_writer.journal import ExportJournal, fingerprint_dataset
+from google_sheets_writer.planner import WritePlan, estimate_record_bytes, plan_write
+from google_sheets_writer.pool import Credential, assign_workbooks, make_client
+from google_sheets_writer.rate_limiter import RequestScheduler
+from google_sheets_writer.registry import WorkbookRegistry
+from google_sheets_writer.report import RunReport, timed
+from google_sheets_writer.serializer import (
+    SCHEMA_SAMPLE_SIZE,
+    get_headers,
+    is_sized,
+    number_formats,
+    resolve_schema,
+    serialize_chunk,
+)
+from google_sheets_writer.session import WriterSession
+from google_sheets_writer.utils.layout_utils import (
+    is_partition_title,
+    is_repeatable,
+    number_format_requests,
+    partition_files_query,
+    partition_append,
+    partition_records,
+    plan_layout,
+    plan_reads,
+    stale_partitions,
+    workbook_files_query,
+)
+from google_sheets_writer.utils.other_utils import batch_by_bytes
+from google_sheets_writer.utils.pipeline_utils import map_in_pool, prefetch, run_in_pool
+from google_sheets_writer.utils.sync_utils import (
+    block_hashes,
+    build_manifest,
+    delete_manifest_request,
+    delete_manifests_request,
+    drop_manifests,
+    estimate_request_bytes,
+    hash_block,
+    is_compatible,
+    load_manifests,
+    manifest_requests,
+    parse_manifests,
+    save_manifests,
+    update_cells_request,
+)
+from contextlib import contextmanager, nullcontext
+from functools import cached_property, partial
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Gspread Documentation: https://docs.gspread.org/en/latest/oauth2.html
 # Google Sheets API Limits: https://developers.google.com/sheets/api/limits
@@ -24,9 +74,44 @@ class GoogleSheetsWriter:
         self,
         user_email: Optional[str] = None,  # all new workbooks will be shared with this email
         auth_type: Literal['oauth', 'service_account'] = 'oauth',  # authorization type
+        cache_ttl: Optional[float] = 300,  # seconds before cached workbook metadata is refetched (None = never)
+        read_requests_per_minute: float = 60,  # read quota shared by every thread of this writer
+        write_requests_per_minute: float = 60,  # write quota shared by every thread of this writer
+        max_retries: int = 5,  # retries of a request that failed with a 429 or 5xx before giving up
+        client: Optional[gspread.Client] = None,  # use this client instead of authorizing, e.g. a fake backend's
+        on_request: Optional[Callable[[dict], None]] = None,  # called with an event after every API request
+        on_chunk_written: Optional[Callable[[dict], None]] = None,  # called with an event after every upload
+        registry: Optional[WorkbookRegistry] = None,  # persistent workbook name -> ID map, shared across runs
+        credentials: Optional[List[Credential]] = None,  # pool of service accounts to shard overwrites across
+        pool_strategy: Literal['round_robin', 'least_loaded'] = 'round_robin',  # how workbooks are dealt out
     ):
         self.user_email = user_email
         self.auth_type = auth_type
+        self.cache_ttl = cache_ttl
+        self.client = client
+        self.on_request = on_request
+        self.on_chunk_written = on_chunk_written
+        self.registry = registry
+        self.credentials = credentials
+        self.pool_strategy = pool_strategy
+        self._pool_options = {  # options every writer of the pool is created with
+            'user_email': user_email,
+            'cache_ttl': cache_ttl,
+            'read_requests_per_minute': read_requests_per_minute,
+            'write_requests_per_minute': write_requests_per_minute,
+            'max_retries': max_retries,
+        }
+        self.scheduler = RequestScheduler(
+            read_requests_per_minute=read_requests_per_minute,
+            write_requests_per_minute=write_requests_per_minute,
+            max_retries=max_retries,
+            on_request=self._record_request,
+        )
+        self.last_report = None  # RunReport of the last write, kept even if it failed
+        self._report = None  # RunReport of the write or session in progress, only one at a time
+        self._report_lock = threading.Lock()
+        self._workbook_cache = {}  # workbook name -> (Spreadsheet, time fetched)
+        self._worksheet_cache = {}  # workbook name -> {worksheet title: Worksheet}
 
     @cached_property
     def gsheets_client(self):
@@ -35,56 +120,448 @@ class GoogleSheetsWriter:
         
         This is a cached property and will only be run once.  Subsequent calls will return the cached value.
         """
-        if self.auth_type == 'oauth':
+        if self.client is not None:
+            return self.client
+        elif self.credentials:
+            return self.pool[0].gsheets_client
+        elif self.auth_type == 'oauth':
             return gspread.oauth()
         elif self.auth_type == 'service_account':
             return gspread.service_account()
 
+    @cached_property
+    def pool(self) -> List['GoogleSheetsWriter']:
+        """
+        Return a writer per credential of the pool, each with its own client and its own scheduler, so that
+        every credential is paced against its own per-user quota.  Empty without credentials.
+
+        This is a cached property and will only be run once.  Subsequent calls will return the cached value.
+        """
+
+        return [
+            GoogleSheetsWriter(
+                client=make_client(credential),
+                on_request=self.on_request,
+                on_chunk_written=self.on_chunk_written,
+                **self._pool_options,
+            )
+            for credential in self.credentials or []
+        ]
+
+    def pool_metrics(self) -> List[dict]:
+        """
+        Return the request metrics of every client of the pool, in the order of the credentials.
+        """
+
+        return [member.scheduler.metrics() for member in self.pool]
+
+    def _scheduler_metrics(self) -> Dict[str, float]:
+        # Metrics of this writer's scheduler plus those of every client of the pool
+        metrics = self.scheduler.metrics()
+        for member_metrics in (self.pool_metrics() if self.credentials else []):
+            for name, value in member_metrics.items():
+                metrics[name] = metrics.get(name, 0) + value
+        return metrics
+
+    def _record_request(self, event: dict):
+        # Count the request in the report of the write in progress and pass it on to the hook
+        if self._report is not None:
+            self._report.record_request(event)
+        if self.on_request is not None:
+            self.on_request(event)
+
+    def _record_chunk(self, event: dict):
+        # Count the upload in the report of the write in progress and pass it on to the hook
+        if self._report is not None:
+            self._report.record_chunk(event)
+        if self.on_chunk_written is not None:
+            self.on_chunk_written(event)
+
+    def _start_report(self, report: RunReport):
+        """
+        Make the provided report the one every request and upload of the writer is counted in.  Requests
+        can't be told apart by the write they belong to, so a writer runs one write or session at a time
+        and raises a ValueError while another one is in progress.
+        """
+
+        with self._report_lock:
+            if self._report is not None:
+                raise ValueError(
+                    f'The writer is busy writing "{self._report.workbook_name}" ({self._report.mode}), use a '
+                    f'writer per concurrent write or session.'
+                )
+            self.last_report = self._report = report
+
+    @contextmanager
+    def _reporting(self, workbook_name: str, mode: str):
+        """
+        Context manager that reports the write in its block: yields the RunReport that every request and
+        upload is counted in, and finishes it on the way out, even if the write fails.
+        """
+
+        report = RunReport(workbook_name, mode)
+        self._start_report(report)
+        scheduler_before = self._scheduler_metrics()
+        try:
+            yield report
+        finally:
+            self._report = None
+            scheduler_after = self._scheduler_metrics()
+            report.finish({name: scheduler_after[name] - scheduler_before[name] for name in scheduler_after})
+        logging.info(f'Finished writing {report.summary()}')
+
+    def _timer(self, phase: str):
+        """
+        Return a context manager that adds the time spent in its block to the provided phase of the write
+        in progress.
+        """
+
+        return self._report.timer(phase) if self._report is not None else nullcontext()
+
+    def _cache_is_fresh(self, fetched_at: float) -> bool:
+        """
+        Returns a boolean indicating whether a cache entry fetched at the provided time is still valid.
+        """
+
+        return self.cache_ttl is None or time.monotonic() - fetched_at < self.cache_ttl
+
+    def invalidate_cache(self, workbook_name: Optional[str] = None):
+        """
+        Drop cached metadata for the provided workbook, or for every workbook if no name is provided.
+        """
+
+        if workbook_name is None:
+            self._workbook_cache.clear()
+            self._worksheet_cache.clear()
+        else:
+            self._workbook_cache.pop(workbook_name, None)
+            self._worksheet_cache.pop(workbook_name, None)
+
+    @timed('lookup')
+    def open_workbook(self, workbook_name: str) -> gspread.Spreadsheet:
+        """
+        Return the workbook with the provided name.  Opening a workbook by name is a Drive search, so
+        the result is cached until it expires or is invalidated.
+
+        With a registry, workbooks it knows are opened by ID instead, and their title is checked.  Whether
+        the workbook is in the trash, which only its Drive metadata tells, is checked once the registry's
+        check_interval has passed since the last check.  If the workbook was deleted, moved to the trash
+        or renamed since it was registered, the entry is dropped and the workbook is searched for by name,
+        skipping the trash.
+        """
+
+        def get_file(spreadsheet_id):
+            # Opening by ID still works once a workbook is in the trash, only Drive tells it apart
+            return self.gsheets_client.request(
+                'get',
+                f'{gspread.urls.DRIVE_FILES_API_V3_URL}/{spreadsheet_id}',
+                params={'fields': 'id,name,trashed', 'supportsAllDrives': True},
+            ).json()
+
+        cached = self._workbook_cache.get(workbook_name)
+        if cached and self._cache_is_fresh(cached[1]):
+            return cached[0]
+
+        # Cache is empty or stale, so drop anything we knew about this workbook and reopen it
+        self.invalidate_cache(workbook_name)
+        wb = None
+        spreadsheet_id = self.registry.get(workbook_name) if self.registry is not None else None
+        if spreadsheet_id:
+            checked = False
+            try:
+                if self.registry.is_check_due(workbook_name):
+                    if self.scheduler.read(get_file, spreadsheet_id).get('trashed'):
+                        raise gspread.exceptions.SpreadsheetNotFound(workbook_name)
+                    checked = True
+                wb = self.scheduler.read(self.gsheets_client.open_by_key, spreadsheet_id)
+            except gspread.exceptions.APIError as error:
+                if getattr(error.response, 'status_code', None) not in (403, 404):
+                    raise
+            except (gspread.exceptions.SpreadsheetNotFound, PermissionError):
+                pass
+            if wb is not None and wb.title == workbook_name:
+                if checked:
+                    self.registry.mark_checked(workbook_name)
+            else:
+                # Search for a workbook of that name outside of the trash, opening by name doesn't skip it
+                logging.info(f'Registry entry of "{workbook_name}" workbook is stale, searching for it by name...')
+                self.registry.forget(workbook_name)
+                files = self.list_workbooks(name=workbook_name)
+                if not files:
+                    raise gspread.exceptions.SpreadsheetNotFound(workbook_name)
+                wb = self.scheduler.read(self.gsheets_client.open_by_key, files[0]['id'])
+                self.registry.record(workbook_name, wb.id)
+        if wb is None:
+            wb = self.scheduler.read(self.gsheets_client.open, workbook_name)
+            if self.registry is not None:
+                self.registry.record(workbook_name, wb.id)
+        self._workbook_cache[workbook_name] = (wb, time.monotonic())
+        return wb
+
+    @timed('lookup')
+    def fetch_sheet_metadata(self, workbook_name: str) -> dict:
+        """
+        Fetch the metadata of every worksheet in the provided workbook with a single API call and
+        cache the worksheets by title.  Returns a dict of worksheet title to worksheet.
+        """
+
+        wb = self.open_workbook(workbook_name)
+        worksheets = {ws.title: ws for ws in self.scheduler.read(wb.worksheets)}
+        self._worksheet_cache[workbook_name] = worksheets
+        return worksheets
+
+    @timed('lookup')
+    def get_worksheets(self, workbook_name: str) -> dict:
+        """
+        Return a dict of worksheet title to worksheet for the provided workbook, fetching the
+        metadata only if it isn't cached.
+        """
+
+        self.open_workbook(workbook_name)  # Expires the worksheet cache along with the workbook
+        worksheets = self._worksheet_cache.get(workbook_name)
+        if worksheets is None:
+            worksheets = self.fetch_sheet_metadata(workbook_name)
+        return worksheets
+
+    def open_worksheet(self, workbook_name: str, worksheet_name: str) -> gspread.Worksheet:
+        """
+        Return the worksheet with the provided name from the cached workbook metadata, fetching the
+        metadata first if it isn't cached.  Raises WorksheetNotFound if the worksheet doesn't exist.
+        """
+
+        worksheets = self.get_worksheets(workbook_name)
+        try:
+            return worksheets[worksheet_name]
+        except KeyError:
+            raise gspread.exceptions.WorksheetNotFound(worksheet_name)
+
+    @timed('layout')
+    def apply_layout(
+        self,
+        workbook_name: str,
+        desired_sheets: Dict[str, Tuple[int, int]],
+        prefix: Optional[str],  # None only deletes "Sheet1"
+        clear: bool = True,
+        keep_manifests: bool = False,  # only a sync, which stores the manifests itself, keeps them
+    ) -> dict:
+        """
+        Bring a workbook to the desired set of worksheets (title -> (rows, cols)) with a single batchUpdate
+        request.  Existing worksheets are cleared (unless clear is False) and resized, missing ones are
+        created, and "Sheet1" plus any "<prefix>_<N>" worksheets that aren't desired are deleted.  Returns
+        a dict of worksheet title to worksheet.
+
+        The sync manifests of the workbook are deleted along the way, unless keep_manifests is True, since
+        the data is about to change without them and the next sync would otherwise trust stale hashes.
+        """
+
+        wb = self.open_workbook(workbook_name)
+        requests = plan_layout(
+            existing_sheets={title: ws.id for title, ws in self.get_worksheets(workbook_name).items()},
+            desired_sheets=desired_sheets,
+            prefix=prefix,
+            clear=clear,
+        )
+        if not keep_manifests:
+            requests.append(delete_manifests_request())
+
+        # Have the response include the updated sheet properties so the cache can be refreshed for free
+        write = self.scheduler.write if is_repeatable(requests) else self.scheduler.write_once
+        response = write(wb.batch_update, {
+            'requests': requests,
+            'includeSpreadsheetInResponse': True,
+            'responseIncludeGridData': False,
+        })
+        worksheets = {
+            sheet['properties']['title']: gspread.Worksheet(wb, sheet['properties'])
+            for sheet in response['updatedSpreadsheet']['sheets']
+        }
+        self._worksheet_cache[workbook_name] = worksheets
+        logging.info(f'Applied {len(requests):,} layout changes to "{workbook_name}" workbook.')
+        return worksheets
+
+    @timed('layout')
+    def apply_number_formats(
+        self,
+        workbook_name: str,
+        worksheets: Iterable[gspread.Worksheet],
+        formats: Dict[int, dict],
+    ):
+        """
+        Apply number formats (zero based column index -> format) to the columns of the provided worksheets,
+        below the header row, with a single batchUpdate request.
+        """
+
+        wb = self.open_workbook(workbook_name)
+        self.scheduler.write(wb.batch_update, {
+            'requests': [request for ws in worksheets for request in number_format_requests(ws.id, formats)],
+        })
+
+    @timed('lookup')
     def get_last_cell(
         self,
         workbook_name: str,
         worksheet_name: str,
     ):
         """
-        Given a workbook and worksheet name, return the cell address of the last cell in the worksheet.
+        Given a workbook and worksheet name, return the cell address of the next empty cell in column A.
+
+        This downloads the whole of column A, so it should only be used to find the starting point when
+        appending to existing data.  Writes that start from a known row should track the next row locally.
         """
 
-        wb = self.gsheets_client.open(workbook_name)
-        ws = wb.worksheet(worksheet_name)
-        last_row_num = len(ws.col_values(1))
+        ws = self.open_worksheet(workbook_name, worksheet_name)
+        last_row_num = len(self.scheduler.read(ws.col_values, 1))
         return f'A{last_row_num + 1}'
 
+    @timed('layout')
     def create_workbook(self, name: str):
         """
         Create a new workbook and share it with the provided user_email.  This is in case a service account was
         used and is the owner of the workbook.
         """
 
-        wb = self.gsheets_client.create(name)
-        wb.share(self.user_email, perm_type='user', role='writer')
+        wb = self.scheduler.write_once(self.gsheets_client.create, name)
+        self.scheduler.write(wb.share, self.user_email, perm_type='user', role='writer')
+        self.invalidate_cache(name)
+        self._workbook_cache[name] = (wb, time.monotonic())
+        if self.registry is not None:
+            self.registry.record(name, wb.id)
         logging.info(f'Created "{name}" workbook.')
 
+    @timed('layout')
     def create_worksheet(self, workbook_name: str, worksheet_name: str, num_rows: int, num_cols: int):
         """
         Create a new worksheet in the provided workbook.  The worksheet will be created with
         the provided number of rows and columns.
         """
 
-        wb = self.gsheets_client.open(workbook_name)
-        wb.add_worksheet(worksheet_name, rows=num_rows, cols=num_cols)
+        wb = self.open_workbook(workbook_name)
+        ws = self.scheduler.write_once(wb.add_worksheet, worksheet_name, rows=num_rows, cols=num_cols)
+        if workbook_name in self._worksheet_cache:
+            self._worksheet_cache[workbook_name][worksheet_name] = ws
         logging.info(f'Created "{worksheet_name}" worksheet in "{workbook_name}" workbook.')
+        return ws
+
+    def upload_csv(self, name: str, rows: Iterable[List[List[Optional[str]]]]) -> Tuple[str, int]:
+        """
+        Upload chunks of rows as a CSV file that Drive converts into a new spreadsheet with the provided
+        name.  The CSV is encoded on the fly and sent with a resumable upload, one piece per request, so
+        only one chunk and one piece are held in memory.  Returns the ID of the spreadsheet and the number
+        of bytes uploaded.
+        """
+
+        session_url = self.scheduler.write_once(start_upload, self.gsheets_client, name)
+        pieces = csv_pieces(rows)
+        piece, offset = next(pieces), 0
+        while True:
+            # Look one piece ahead, the total size has to be sent along with the last piece
+            next_piece = next(pieces, None)
+            total = offset + len(piece) if next_piece is None else None
+            file = self.scheduler.write(upload_piece, self.gsheets_client, session_url, piece, offset, total)
+            offset += len(piece)
+            if next_piece is None:
+                return file['id'], offset
+            piece = next_piece
+
+    def bulk_load_workbook(
+        self,
+        workbook_name: str,
+        worksheet_ranges: Dict[str, Tuple[int, int]],
+        data_lod,
+        headers: List[str],
+        chunker: AdaptiveChunker,
+    ) -> dict:
+        """
+        Create a workbook from CSV uploads instead of values updates.  worksheet_ranges maps every worksheet
+        title to its (first record, number of records).  Drive converts an uploaded CSV into a spreadsheet
+        with a single sheet, so the first worksheet is uploaded as the workbook itself and every other one
+        is uploaded to a temporary spreadsheet, copied into the workbook and deleted.  The sheets are then
+        renamed and sized with a single batchUpdate request, and the workbook is shared with the provided
+        user_email like create_workbook does.  Returns a dict of worksheet title to worksheet.
+        """
+
+        client = self.gsheets_client
+        wb = None
+        sheet_ids = {}  # worksheet title -> sheet ID in the workbook
+        for worksheet_name, (start, n_records) in worksheet_ranges.items():
+            start_time = time.monotonic()
+            rows = chain([[headers]], (serialize_chunk(chunk, headers) for chunk in chunker.chunks(
+                data_lod, start=start, n_records=n_records
+            )))
+            with self._timer('upload'):
+                spreadsheet_id, n_bytes = self.upload_csv(
+                    workbook_name if wb is None else f'{workbook_name} {worksheet_name} import', rows
+                )
+            with self._timer('layout'):
+                if wb is None:
+                    wb = self.scheduler.read(client.open_by_key, spreadsheet_id)
+                    sheet_ids[worksheet_name] = self.scheduler.read(wb.get_worksheet, 0).id
+                else:
+                    try:
+                        imported = self.scheduler.read(client.open_by_key, spreadsheet_id)
+                        ws = self.scheduler.read(imported.get_worksheet, 0)
+                        sheet_ids[worksheet_name] = self.scheduler.write_once(ws.copy_to, wb.id)['sheetId']
+                    finally:
+                        self.scheduler.write(client.del_spreadsheet, spreadsheet_id)
+            self._record_chunk({
+                'workbook': workbook_name,
+                'worksheet': worksheet_name,
+                'start_row': 1,
+                'rows': n_records + 1,
+                'records': n_records,
+                'bytes': n_bytes,
+                'seconds': time.monotonic() - start_time,  # including the conversion and the copy
+            })
+
+        # Name and size the converted sheets after their partitions, and share the workbook
+        with self._timer('layout'):
+            response = self.scheduler.write(wb.batch_update, {
+                'requests': [
+                    {'updateSheetProperties': {
+                        'properties': {
+                            'sheetId': sheet_ids[worksheet_name],
+                            'title': worksheet_name,
+                            'gridProperties': {'rowCount': n_records + 1, 'columnCount': len(headers)},
+                        },
+                        'fields': 'title,gridProperties.rowCount,gridProperties.columnCount',
+                    }}
+                    for worksheet_name, (_, n_records) in worksheet_ranges.items()
+                ],
+                'includeSpreadsheetInResponse': True,
+                'responseIncludeGridData': False,
+            })
+            self.scheduler.write(wb.share, self.user_email, perm_type='user', role='writer')
+        worksheets = {
+            sheet['properties']['title']: gspread.Worksheet(wb, sheet['properties'])
+            for sheet in response['updatedSpreadsheet']['sheets']
+        }
+        self.invalidate_cache(workbook_name)
+        self._workbook_cache[workbook_name] = (wb, time.monotonic())
+        self._worksheet_cache[workbook_name] = worksheets
+        if self.registry is not None:
+            self.registry.record(workbook_name, wb.id)
+        n_records_written = sum(n_records for _, n_records in worksheet_ranges.values())
+        logging.info(
+            f'Bulk loaded {n_records_written:,} records to "{workbook_name}" in {len(worksheet_ranges):,} sheets.'
+        )
+        return worksheets
 
     def delete_object(self, workbook_name: str, worksheet_name: Optional[str] = None):
         """
         Delete a worksheet or a workbook
         """
 
-        wb = self.gsheets_client.open(workbook_name)
+        wb = self.open_workbook(workbook_name)
         if worksheet_name:
-            wb.del_worksheet(wb.worksheet(worksheet_name))
+            self.scheduler.write(wb.del_worksheet, self.open_worksheet(workbook_name, worksheet_name))
+            self._worksheet_cache.get(workbook_name, {}).pop(worksheet_name, None)
         else:
-            self.gsheets_client.del_spreadsheet(file_id=wb.id)
+            self.scheduler.write(self.gsheets_client.del_spreadsheet, file_id=wb.id)
+            self.invalidate_cache(workbook_name)
+            if self.registry is not None:
+                self.registry.forget(workbook_name)
 
+    @timed('lookup')
     def check_existence(
         self,
         workbook_name: str,
@@ -98,8 +575,7 @@ class GoogleSheetsWriter:
         # Try opening worksheet, if one was provided
         if worksheet_name:
             try:
-                workbook = self.gsheets_client.open(workbook_name)
-                workbook.worksheet(worksheet_name)
+                self.open_worksheet(workbook_name, worksheet_name)
                 return True
             except gspread.exceptions.WorksheetNotFound:
                 return False
@@ -109,149 +585,1325 @@ class GoogleSheetsWriter:
         # Else try to just open workbook
         else:
             try:
-                self.gsheets_client.open(workbook_name)
+                self.open_workbook(workbook_name)
                 return True
             except gspread.exceptions.SpreadsheetNotFound:
                 return False
 
+    def list_workbooks(self, prefix: Optional[str] = None, name: Optional[str] = None) -> List[dict]:
+        """
+        Return the metadata ({'id', 'name'}) of the spreadsheets the account can see, one Drive listing request
+        per page of 1,000 spreadsheets.  If a prefix is provided, only spreadsheets named "<prefix>_..." are
+        listed, and if a name is provided only spreadsheets with that name, with a Drive query for just those
+        names.  Spreadsheets in the trash are left out.
+        """
+
+        if name:
+            query = workbook_files_query(name)
+        elif prefix:
+            query = partition_files_query(prefix)
+        else:
+            query = f"mimeType = '{SPREADSHEET_MIME_TYPE}' and trashed = false"
+
+        def list_workbooks(page_token):
+            params = {
+                'q': query,
+                'fields': 'nextPageToken,files(id,name)',
+                'pageSize': 1000,
+                'supportsAllDrives': True,
+                'includeItemsFromAllDrives': True,
+            }
+            if page_token:
+                params['pageToken'] = page_token
+            return self.gsheets_client.request('get', gspread.urls.DRIVE_FILES_API_V3_URL, params=params).json()
+
+        files, page_token = [], None
+        while True:
+            response = self.scheduler.read(list_workbooks, page_token)
+            files.extend(response.get('files', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return files
+
+    @timed('cleanup')
     def cleanup(
         self,
         max_objects: int,
         workbook_name: str,
         worksheet_name: Optional[str] = None,
+        max_workers: Optional[int] = 4,  # workbooks deleted in parallel
     ):
         """
         Delete all worksheets or workbooks that are greater than or equal to the provided max_objects value.
+
+        Stale worksheets are found from the metadata of the workbook and deleted with a single batchUpdate
+        request.  Stale workbooks are found with a Drive query for the "<workbook_name>_..." spreadsheets and
+        deleted in parallel on a pool of max_workers threads.  Every stale object is deleted, including any past
+        a gap.
+        """
+
+        if worksheet_name:
+            try:
+                worksheets = self.get_worksheets(workbook_name)
+            except gspread.exceptions.SpreadsheetNotFound:
+                return
+            sheet_ids = stale_partitions(
+                ((title, ws.id) for title, ws in worksheets.items()), worksheet_name, max_objects
+            )
+            if sheet_ids:
+                wb = self.open_workbook(workbook_name)
+                self.scheduler.write(wb.batch_update, {
+                    'requests': [{'deleteSheet': {'sheetId': sheet_id}} for sheet_id in sheet_ids],
+                })
+                self._worksheet_cache.pop(workbook_name, None)
+                logging.info(f'Deleted {len(sheet_ids):,} stale worksheets from "{workbook_name}" workbook.')
+            return
+
+        files = self.list_workbooks(prefix=workbook_name)
+        stale = stale_partitions(((file['name'], file) for file in files), workbook_name, max_objects)
+
+        def delete_workbook(file):
+            self.scheduler.write(self.gsheets_client.del_spreadsheet, file_id=file['id'])
+            self.invalidate_cache(file['name'])
+            if self.registry is not None:
+                self.registry.forget(file['name'])
+
+        run_in_pool(delete_workbook, [(file,) for file in stale], max_workers=max_workers)
+        if stale:
+            logging.info(f'Deleted {len(stale):,} stale "{workbook_name}" workbooks.')
+
+    @timed('lookup')
+    def fetch_manifests(
+        self,
+        workbook_name: str,
+        manifest_path: Optional[str] = None,
+    ) -> Dict[str, Tuple[dict, Optional[int]]]:
+        """
+        Return the sync manifests of the provided workbook as a dict of worksheet title to (manifest,
+        developer metadata id).  Manifests are read from the developer metadata of the worksheets with a
+        single API call, or from the local JSON file at manifest_path if one is provided.
+        """
+
+        if manifest_path:
+            manifests = load_manifests(manifest_path).get(workbook_name, {})
+            return {title: (manifest, None) for title, manifest in manifests.items()}
+
+        wb = self.open_workbook(workbook_name)
+        metadata = self.scheduler.read(wb.fetch_sheet_metadata, {
+            'fields': 'sheets(properties(sheetId,title),developerMetadata)',
+        })
+        return parse_manifests(metadata)
+
+    @timed('upload')
+    def _store_manifests(
+        self,
+        workbook_name: str,
+        manifests: Dict[str, dict],
+        existing: Dict[str, Tuple[dict, Optional[int]]],
+        manifest_path: Optional[str] = None,
+        requests: Optional[List[dict]] = None,
+    ):
+        """
+        Send the provided batchUpdate requests together with the requests that store the manifests of the
+        workbook, in a single batchUpdate so the data and its manifest are updated atomically.  With a
+        manifest_path, the manifests are saved to that local file once the requests have gone through.
+        """
+
+        requests = list(requests or [])
+        if not manifest_path:
+            sheet_ids = {title: ws.id for title, ws in self.get_worksheets(workbook_name).items()}
+            metadata_requests, too_large = manifest_requests(sheet_ids, manifests, existing)
+            requests.extend(metadata_requests)
+            for title in too_large:
+                logging.warning(
+                    f'Manifest of "{title}" in "{workbook_name}" is too large to store, it will be rewritten in full.'
+                )
+
+        if requests:
+            wb = self.open_workbook(workbook_name)
+            write = self.scheduler.write if is_repeatable(requests) else self.scheduler.write_once
+            write(wb.batch_update, {'requests': requests})
+            self._worksheet_cache.pop(workbook_name, None)  # Worksheets may have been resized
+
+        if manifest_path:
+            save_manifests(manifest_path, workbook_name, manifests)
+
+    def _sync_workbook(
+        self,
+        workbook_name: str,
+        prefix: str,
+        worksheet_ranges: Dict[str, Tuple[int, int]],
+        data_lod,
+        headers: List[str],
+        block_size: int,
+        max_request_bytes: int,
+        manifest_path: Optional[str] = None,
+        schema: Optional[Dict[str, str]] = None,
+    ) -> Optional[Dict[str, dict]]:
         """
+        Bring a workbook up to date by rewriting only the blocks of block_size rows whose hash differs from
+        the manifest of the previous run.  The changed blocks, the resizes and the new manifests are sent in
+        a single batchUpdate.  worksheet_ranges maps worksheet title -> (first record, number of records).
+
+        Returns None once the workbook is synced.  If the workbook can't be diffed (no manifests, or the
+        headers, partition boundaries or block size changed) or the changes would exceed max_request_bytes,
+        the stale manifests are dropped and the new manifests are returned, to be stored after a full rewrite.
+
+        If a schema is provided, values are encoded by column type and the number formats of the columns are
+        sent along with the changes.
+        """
+
+        n_cols = len(headers)
+        existing = self.fetch_manifests(workbook_name, manifest_path)
+        worksheets = self.get_worksheets(workbook_name)
+
+        # Only diff when every worksheet that is kept was written with the same layout
+        kept = [title for title in worksheet_ranges if title in worksheets]
+        can_diff = bool(kept) and all(
+            is_compatible(existing.get(title, (None, None))[0], headers, worksheet_ranges[title][0], block_size)
+            for title in kept
+        )
+        if kept and not can_diff:
+            logging.info(f'Layout of "{workbook_name}" changed, rewriting it in full...')
+
+        # Hash every block, holding on to the values of the blocks that changed
+        block_chunker = AdaptiveChunker(max_rows=block_size, target_bytes=None)
+        manifests = {}  # worksheet title -> manifest
+        changed = []  # (worksheet title, zero based row index, values)
+        changed_bytes = 0
+        n_blocks = 0
+        for title, (start, n_records) in worksheet_ranges.items():
+            previous = block_hashes(existing[title][0]) if can_diff and title in kept else []
+            if can_diff and title not in kept:
+                changed.append((title, 0, [headers]))  # New worksheet, write its headers too
+            hashes = []
+            for i, block in enumerate(block_chunker.chunks(data_lod, start=start, n_records=n_records)):
+                with self._timer('serialize'):
+                    values = serialize_chunk(block, headers, schema)
+                    hashes.append(hash_block(values))
+                if can_diff and (i >= len(previous) or previous[i] != hashes[-1]):
+                    changed.append((title, 1 + i * block_size, values))  # Plus one row for the headers
+                    changed_bytes += estimate_request_bytes(values)
+                    if changed_bytes > max_request_bytes:
+                        logging.info(f'Too many changes to sync "{workbook_name}", rewriting it in full...')
+                        can_diff = False
+                        changed.clear()
+            n_blocks += len(hashes)
+            manifests[title] = build_manifest(headers, start, n_records, block_size, hashes)
 
-        _max_objects = max_objects
+        if not can_diff:
+            # Drop the manifests that will no longer describe the worksheets once they are rewritten
+            if existing and manifest_path:
+                save_manifests(manifest_path, workbook_name, {})
+            elif existing:
+                wb = self.open_workbook(workbook_name)
+                self.scheduler.write(wb.batch_update, {
+                    'requests': [delete_manifest_request(metadata_id) for _, metadata_id in existing.values()],
+                })
+            return manifests
 
-        while self.check_existence(
-                workbook_name=workbook_name if worksheet_name else workbook_name + f'_{_max_objects}',
-                worksheet_name=worksheet_name + f'_{_max_objects}' if worksheet_name else None,
+        desired_sheets = {
+            title: (n_records + 1, n_cols)  # Plus one row for the headers
+            for title, (_, n_records) in worksheet_ranges.items()
+        }
+        layout = plan_layout(
+            existing_sheets={title: ws.id for title, ws in worksheets.items()},
+            desired_sheets=desired_sheets,
+            prefix=prefix,
+            clear=False,
+        )
+        if not changed and not any('deleteSheet' in request for request in layout) and all(
+            manifests[title] == existing[title][0] for title in manifests
         ):
-            self.delete_object(
-                workbook_name=workbook_name if worksheet_name else workbook_name + f'_{_max_objects}',
-                worksheet_name=worksheet_name + f'_{_max_objects}' if worksheet_name else None,
+            logging.info(f'"{workbook_name}" is already up to date.')
+            return None
+        formats = number_formats(headers, schema)
+        if any('addSheet' in request for request in layout):
+            # New worksheets need an id before cells can be written to them
+            worksheets = self.apply_layout(
+                workbook_name, desired_sheets, prefix=prefix, clear=False, keep_manifests=True
             )
-            _max_objects += 1
+            layout = []
+        layout += [
+            request for title in desired_sheets for request in number_format_requests(worksheets[title].id, formats)
+        ]
 
-    def write_to_gsheets(
+        self._store_manifests(
+            workbook_name,
+            manifests,
+            existing,
+            manifest_path=manifest_path,
+            requests=layout + [
+                update_cells_request(worksheets[title].id, row_index, values)
+                for title, row_index, values in changed
+            ],
+        )
+        n_changed = sum(1 for _, row_index, _ in changed if row_index)
+        if self._report is not None:
+            n_rewritten = sum(len(values) for _, row_index, values in changed if row_index)
+            self._report.count(bytes_sent=changed_bytes, records_written=n_rewritten)
+        logging.info(f'Synced "{workbook_name}", rewrote {n_changed:,} of {n_blocks:,} blocks.')
+        return None
+
+    def _write_chunks(
+        self,
+        worksheet: gspread.Worksheet,
+        chunks: Iterable,
+        headers: List[str],
+        chunker: AdaptiveChunker,
+        prefetch_depth: Optional[int] = 2,
+        start_row: int = 1,
+        on_upload: Optional[Callable[[int, int, List], None]] = None,
+        schema: Optional[Dict[str, str]] = None,
+    ) -> int:
+        """
+        Write chunks of records to a worksheet from start_row onwards.  When starting at A1, the headers are
+        folded into the first chunk.  The next row is tracked locally instead of re-reading the sheet.  Up to
+        prefetch_depth chunks are serialized in the background while the current one is uploaded, and the
+        size and latency of every upload is fed back to the chunker.  A chunk that fails as an oversized
+        payload (413, 5xx or a timeout, once retries are exhausted) is split in half and each half uploaded,
+        down to a single row.  Returns the number of records written.
+
+        If provided, on_upload(start row, number of records, values) is called after every upload.  Every
+        upload is also counted in the report of the write in progress and passed on to on_chunk_written.
+
+        If a schema is provided, values are sent as numbers, booleans and date serials by column type.
+        """
+
+        def serialize(chunk):
+            # Convert to rows of strings (or typed values) in header order, missing values become None
+            with self._timer('serialize'):
+                values = serialize_chunk(chunk, headers, schema)
+                return len(chunk), values, chunker.observe_payload(len(chunk), values)
+
+        def upload(start_row, values, n_bytes):
+            start = time.monotonic()
+            try:
+                worksheet.update(f'A{start_row}', values)
+            except Exception as error:
+                chunker.record_upload(n_bytes, time.monotonic() - start, failed=is_payload_error(error))
+                raise
+            chunker.record_upload(n_bytes, time.monotonic() - start)
+
+        def upload_rows(start_row, values, n_bytes):
+            # Halve the rows after an oversized payload and upload each half, down to a single row
+            try:
+                self.scheduler.write(upload, start_row, values, n_bytes)
+            except Exception as error:
+                if len(values) < 2 or not is_payload_error(error):
+                    raise
+                half = len(values) // 2
+                logging.warning(f'Upload of {len(values):,} rows failed ({error}), retrying in two halves...')
+                upload_rows(start_row, values[:half], estimate_payload_bytes(values[:half]))
+                upload_rows(start_row + half, values[half:], estimate_payload_bytes(values[half:]))
+
+        next_row = start_row
+        records_written = 0
+        for n_records, values, n_bytes in prefetch(chunks, serialize, depth=prefetch_depth):
+            if next_row == 1:
+                values = [headers] + values
+
+            # Write data to next available row
+            start = time.monotonic()
+            with self._timer('upload'):
+                upload_rows(next_row, values, n_bytes)
+            if on_upload:
+                on_upload(next_row, n_records, values)
+            self._record_chunk({
+                'workbook': worksheet.spreadsheet.title,
+                'worksheet': worksheet.title,
+                'start_row': next_row,
+                'rows': len(values),
+                'records': n_records,
+                'bytes': n_bytes,
+                'seconds': time.monotonic() - start,  # including the wait on the quota and any retries
+            })
+            next_row += len(values)
+            records_written += n_records
+
+        return records_written
+
+    @timed('lookup')
+    def find_tail(self, workbook_name: str) -> Tuple[int, int, int]:
+        """
+        Find the end of the data written under the provided workbook name, as (workbook number, worksheet
+        number, records in that worksheet), or (0, 0, 0) if nothing was written yet.  The records in the
+        last worksheet are worked out from its row count, since the writer sizes every worksheet to its
+        records plus the header row, so no cell data has to be read.
+        """
+
+        # Find the last "<name>_<N>" workbook
+        number_of_workbooks = 0
+        while self.check_existence(workbook_name=workbook_name + f'_{number_of_workbooks + 1}'):
+            number_of_workbooks += 1
+        if not number_of_workbooks:
+            return 0, 0, 0
+
+        # Find the last "<name>_<N>" worksheet in it
+        worksheets = self.get_worksheets(workbook_name + f'_{number_of_workbooks}')
+        numbers = [int(title.rpartition('_')[2]) for title in worksheets if is_partition_title(title, workbook_name)]
+        if not numbers:
+            return number_of_workbooks, 0, 0
+        last_worksheet = worksheets[workbook_name + f'_{max(numbers)}']
+        return number_of_workbooks, max(numbers), max(0, last_worksheet.row_count - 1)
+
+    def _append_to_gsheets(
         self,
         data_lod,
         workbook_name: str,
-        chunk_size: Optional[int] = 100_000,
-        max_cells_per_sheet: Optional[int] = 3_000_000,
-        max_cells_per_workbook: Optional[int] = 9_000_000,
+        headers: List[str],
+        chunker: AdaptiveChunker,
+        max_cells_per_sheet: int,
+        max_cells_per_workbook: int,
+        prefetch_depth: Optional[int],
+        max_workers: Optional[int],
+        schema: Optional[Dict[str, str]] = None,
     ):
         """
-        Write a list of dicts to Google Sheets.  The max number of cells per sheet and workbook
-        can also be provided.  If the data exceeds these limits, new workbooks will be created
-        with the same name as the original workbook, but with a suffix of "_1", "_2", etc.
+        Append records after the data already written under the provided workbook name.  The tail worksheet
+        is grown and filled up to the cell limit, then new worksheets and workbooks are started with the
+        same naming and limits as a full write.  Nothing already written is read back, cleared or deleted.
+        """
 
-        As of 2/28/2023, Google Sheets only allows 10M "cells" per workbook.
+        n_cols = len(headers)  # Get number of columns
+        tail = self.find_tail(workbook_name)
+        workbook_plans = partition_append(
+            n_records=len(data_lod),
+            n_cols=n_cols,
+            max_cells_per_sheet=max_cells_per_sheet,
+            max_cells_per_workbook=max_cells_per_workbook,
+            tail=tail,
+        )
+        if not workbook_plans:
+            logging.warning(f'No records to append to "{workbook_name}".')
+            return
+        write_tasks = []  # (workbook name, worksheet, first record, number of records, first row)
+
+        for i, worksheet_plans in workbook_plans.items():
+
+            # Define dynamic workbook name
+            _workbook_name = workbook_name + f'_{i}'
+
+            logging.info(f'Starting append to "{_workbook_name}" workbook...')
+
+            # Create workbook if it doesn't exist
+            if not self.check_existence(workbook_name=_workbook_name):
+                self.create_workbook(_workbook_name)
+
+            # Keep the worksheets that are there, grow the tail and add new worksheets in one request
+            desired_sheets = {
+                title: (ws.row_count, ws.col_count)
+                for title, ws in self.get_worksheets(_workbook_name).items()
+                if is_partition_title(title, workbook_name)
+            }
+            for j, n_filled, _, n_records_to_write in worksheet_plans:
+                _worksheet_name = workbook_name + f'_{j}'
+                n_cols_present = desired_sheets.get(_worksheet_name, (0, 0))[1]
+                desired_sheets[_worksheet_name] = (n_filled + n_records_to_write + 1, max(n_cols, n_cols_present))
+            worksheets = self.apply_layout(_workbook_name, desired_sheets, prefix=workbook_name, clear=False)
+            formats = number_formats(headers, schema)
+            if formats:
+                self.apply_number_formats(_workbook_name, [worksheets[title] for title in desired_sheets], formats)
+
+            for j, n_filled, start, n_records_to_write in worksheet_plans:
+                write_tasks.append((
+                    _workbook_name,
+                    worksheets[workbook_name + f'_{j}'],
+                    start,
+                    n_records_to_write,
+                    n_filled + 2 if n_filled else 1,  # Below the header row and the records already there
+                ))
+
+        def write_worksheet(_workbook_name, worksheet, start, n_records_to_write, start_row):
+            # Chunk data and write it after the last row of the worksheet
+            return self._write_chunks(
+                worksheet,
+                chunker.chunks(data_lod, start=start, n_records=n_records_to_write),
+                headers,
+                chunker=chunker,
+                prefetch_depth=prefetch_depth,
+                start_row=start_row,
+                schema=schema,
+            )
+
+        records_written = run_in_pool(write_worksheet, write_tasks, max_workers=max_workers)
+        logging.info(
+            f'Appended {sum(records_written):,} records to "{workbook_name}" in {len(write_tasks):,} sheets.'
+        )
+
+    def _stream_to_gsheets(
+        self,
+        records: Iterator,
+        workbook_name: str,
+        headers: List[str],
+        chunker: AdaptiveChunker,
+        max_cells_per_sheet: int,
+        max_cells_per_workbook: int,
+        prefetch_depth: Optional[int],
+        schema: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Write an iterator of records of unknown length to Google Sheets, pulling one chunk at a time so
+        memory is bounded by the chunk size.  Each workbook is laid out with full size worksheets up front,
+        which are trimmed to the records actually written once the workbook is full or the data runs out.
         """
 
-        n_records = len(data_lod)  # Get number of records
-        n_cols = len(data_lod[0])  # Get number of columns
-        total_cell_count = n_records * n_cols  # Calculate total number of cells
-        number_of_workbooks = math.ceil(total_cell_count / max_cells_per_workbook)  # Number of workbooks needed
-        number_of_worksheets = math.ceil(total_cell_count / max_cells_per_sheet)  # Number of worksheets needed
+        n_cols = len(headers)  # Get number of columns
         worksheets_per_book = math.ceil(max_cells_per_workbook / max_cells_per_sheet)  # Worksheets per workbook
         rows_per_worksheet = math.ceil(max_cells_per_sheet / n_cols)  # Rows per worksheet
 
-        # Get header names
-        headers = [list(data_lod[0].keys())]
+        number_of_workbooks = 0  # Counter for how many workbooks have been written to
+        while True:
 
-        cursor = 0  # Set cursor to 0
-        current_worksheet = 0  # Set current worksheet counter to 0
-
-        # Split data into multiple workbooks, if necessary
-        for i in range(1, number_of_workbooks + 1):
+            # Stop before creating another workbook if the data has run out
+            next_record = next(records, None)
+            if next_record is None:
+                break
+            records = chain([next_record], records)
 
             # Define dynamic workbook name
-            _workbook_name = workbook_name + f'_{i}'
+            number_of_workbooks += 1
+            _workbook_name = workbook_name + f'_{number_of_workbooks}'
 
             logging.info(f'Starting write to "{_workbook_name}" workbook...')
 
             # Create workbook if it doesn't exist
             if not self.check_existence(workbook_name=_workbook_name):
                 self.create_workbook(_workbook_name)
-            
-            # Open workbook
-            workbook = self.gsheets_client.open(_workbook_name)
-
-            sheets_written = 0  # Counter for how many sheets have been written to in this workbook
-            records_written = 0  # Counter for how many records have been written to in this workbook
-
-            # Split data into multiple worksheets, if necessary
-            for j in range(1, worksheets_per_book + 1):
-                if current_worksheet < number_of_worksheets:
-
-                    # Define dynamic worksheet name
-                    _worksheet_name = workbook_name + f'_{j}'
-
-                    # Get number of records to write to worksheet
-                    n_records_to_write = min(rows_per_worksheet, n_records - cursor)
-
-                    # Resize sheet if it already exists
-                    if self.check_existence(workbook_name=_workbook_name, worksheet_name=_worksheet_name):
-                        worksheet = workbook.worksheet(_worksheet_name)
-                        worksheet.clear()
-                        worksheet.resize(rows=n_records_to_write, cols=n_cols)
-                    # Else create the worksheet
-                    else:
-                        self.create_worksheet(
-                            workbook_name=_workbook_name,
-                            worksheet_name=_worksheet_name,
-                            num_rows=n_records_to_write,
-                            num_cols=n_cols,
-                        )
-                        worksheet = workbook.worksheet(_worksheet_name)
-
-                    # Remove "Sheet1" sheet, if it exists
-                    if self.check_existence(workbook_name=_workbook_name, worksheet_name="Sheet1"):
-                        self.delete_object(workbook_name=_workbook_name, worksheet_name="Sheet1")
-
-                    # Write headers to worksheet
-                    worksheet.update('A1', headers)
-
-                    # Chunk data and write to worksheet
-                    worksheet_data = data_lod[cursor:cursor + n_records_to_write]
-                    chunked_data_lod = chunk_list(worksheet_data, chunk_size=chunk_size)
-                    for chunk in chunked_data_lod:
-                        # Convert to pandas dataframe and handle NAs
-                        df = pd.DataFrame(chunk, dtype='string')
-                        df = df.fillna(np.nan).replace([np.nan], [None])
-
-                        # Write data to next available row
-                        worksheet.update(
-                            self.get_last_cell(
-                                workbook_name=_workbook_name,
-                                worksheet_name=_worksheet_name,
-                            ),
-                            df.to_numpy().tolist(),
-                        )
 
-                    # Increment cursor and counters
-                    cursor += n_records_to_write
-                    records_written += n_records_to_write
-                    sheets_written += 1
+            # Lay out every worksheet the workbook can hold at full size, the total is unknown up front
+            full_sheets = {
+                workbook_name + f'_{j}': (rows_per_worksheet + 1, n_cols)  # Plus one row for the headers
+                for j in range(1, worksheets_per_book + 1)
+            }
+            worksheets = self.apply_layout(_workbook_name, full_sheets, prefix=workbook_name)
+            formats = number_formats(headers, schema)
+            if formats:
+                self.apply_number_formats(_workbook_name, [worksheets[title] for title in full_sheets], formats)
 
-                # Increment current worksheet counter
-                current_worksheet += 1
+            # Fill worksheets in order until the workbook is full or the data runs out
+            written_sheets = {}  # worksheet name -> (rows, cols) actually used
+            for _worksheet_name in full_sheets:
+                records_written = self._write_chunks(
+                    worksheets[_worksheet_name],
+                    chunker.chunks(records, n_records=rows_per_worksheet),
+                    headers,
+                    chunker=chunker,
+                    prefetch_depth=prefetch_depth,
+                    schema=schema,
+                )
+                if records_written:
+                    written_sheets[_worksheet_name] = (records_written + 1, n_cols)
+                if records_written < rows_per_worksheet:
+                    break
 
-            logging.info(f'Wrote {records_written:,} records to "{_workbook_name}" in {sheets_written:,} sheets.')
+            # Trim the last worksheet and remove the ones that weren't needed
+            if written_sheets != full_sheets:
+                self.apply_layout(_workbook_name, written_sheets, prefix=workbook_name, clear=False)
 
-            # Remove any extra worksheets from previous runs
-            self.cleanup(
-                workbook_name=_workbook_name,
-                worksheet_name=workbook_name,
-                max_objects=sheets_written + 1,
+            records_written = sum(rows - 1 for rows, _ in written_sheets.values())
+            logging.info(
+                f'Wrote {records_written:,} records to "{_workbook_name}" in {len(written_sheets):,} sheets.'
             )
 
+        if not number_of_workbooks:
+            logging.warning(f'No records to write to "{workbook_name}".')
+            return
+
         # Remove any extra workbooks from previous runs
         self.cleanup(
             workbook_name=workbook_name,
             max_objects=number_of_workbooks + 1,
         )
+
+    def plan(
+        self,
+        data_lod,
+        workbook_name: str,
+        chunk_size: Optional[int] = 100_000,
+        max_cells_per_sheet: Optional[int] = 3_000_000,
+        max_cells_per_workbook: Optional[int] = 9_000_000,
+        headers: Optional[List[str]] = None,
+        chunk_bytes: Optional[int] = 2_000_000,
+        schema: Union[None, str, Dict[str, str]] = None,
+    ) -> WritePlan:
+        """
+        Plan an overwrite of a list of dicts, a pandas DataFrame or a NumPy record array without touching the
+        API.  The payload size of the records is estimated from a sample, and the duration is projected
+        under this writer's quotas.  Returns a WritePlan listing the workbooks, worksheets, row ranges and
+        chunks of the write, and the requests and bytes it is expected to cost.
+
+        A sync costs at most as much as the overwrite of the same data.
+        """
+
+        if not is_sized(data_lod):
+            raise ValueError('Streams can\'t be planned, pass a list, DataFrame or record array.')
+        headers = headers or get_headers(data_lod)
+        schema = resolve_schema(schema, data_lod, headers)
+        return plan_write(
+            workbook_name=workbook_name,
+            headers=headers,
+            n_records=len(data_lod),
+            max_cells_per_sheet=max_cells_per_sheet,
+            max_cells_per_workbook=max_cells_per_workbook,
+            chunk_size=chunk_size,
+            chunk_bytes=chunk_bytes,
+            record_bytes=estimate_record_bytes(data_lod, headers, schema=schema),
+            number_formats=bool(number_formats(headers, schema)),
+            read_requests_per_minute=self.scheduler.buckets['read'].rate * 60,
+            write_requests_per_minute=self.scheduler.buckets['write'].rate * 60,
+            burst=self.scheduler.buckets['write'].capacity,
+        )
+
+    def write_to_gsheets(
+        self,
+        data_lod,
+        workbook_name: str,
+        chunk_size: Optional[int] = 100_000,
+        max_cells_per_sheet: Optional[int] = 3_000_000,
+        max_cells_per_workbook: Optional[int] = 9_000_000,
+        headers: Optional[List[str]] = None,
+        prefetch_depth: Optional[int] = 2,
+        max_workers: Optional[int] = None,
+        chunk_bytes: Optional[int] = 2_000_000,
+        mode: Literal['overwrite', 'sync', 'append'] = 'overwrite',
+        block_size: int = 1_000,
+        manifest_path: Optional[str] = None,
+        journal_path: Optional[str] = None,
+        resume: bool = False,
+        dry_run: bool = False,
+        schema: Union[None, str, Dict[str, str]] = None,
+        engine: Literal['values', 'csv'] = 'values',
+        max_processes: Optional[int] = None,
+    ):
+        """
+        Write a list of dicts, a pandas DataFrame or a NumPy record array to Google Sheets.  The max
+        number of cells per sheet and workbook can also be provided.  If the data exceeds these limits,
+        new workbooks will be created with the same name as the original workbook, but with a suffix of
+        "_1", "_2", etc.
+
+        Any other iterable (generators, DB cursors, ...) is written as a stream: records are pulled one
+        chunk at a time and new worksheets and workbooks are started as the cell limits fill up.  Headers
+        must be provided when records are tuples rather than dicts, unless a DB cursor is passed.
+
+        Chunks are sized to stay around chunk_bytes of payload per request, a budget that is tuned from
+        the latency and failures of the uploads, and never hold more than chunk_size records.  Set
+        chunk_bytes to None to always send chunk_size records per request.
+
+        Up to prefetch_depth chunks are serialized in a background thread while the current chunk is
+        uploaded, set it to 0 to serialize and upload one chunk after the other.
+
+        Once every workbook is laid out, worksheets are written in parallel on a pool of max_workers
+        threads.  All threads share the writer's write quota.  Streams are always written one worksheet
+        at a time, since their row ranges aren't known up front.
+
+        With a mode of "sync", only the blocks of block_size rows that changed since the previous sync are
+        rewritten.  Block hashes are kept in a manifest, stored as hidden developer metadata on every
+        worksheet or in the local JSON file at manifest_path.  Workbooks whose layout changed (headers or
+        partition boundaries) are rewritten in full.  Streams can't be synced.  Writes in any other mode
+        (and sessions and write_many()) delete the manifests, so the sync after them rewrites in full.
+
+        With a mode of "append", records are added after the data already written: the last worksheet of
+        the last workbook is filled up to the cell limit, then new worksheets and workbooks are started.
+        Existing data is never cleared or deleted, so the cost of an append is proportional to the new
+        records only.
+
+        If a journal_path is provided, the plan of the export and every uploaded chunk are recorded in an
+        append-only journal at that path.  Should the export fail, rerunning it with resume set to True
+        skips the workbooks that were already laid out and the chunks that were already uploaded, and
+        continues from the first incomplete chunk.  Only overwrites of sized data can be journaled.
+
+        Returns a RunReport of the write: its API calls by type, retries, bytes sent and the time spent in
+        lookups, layout, serialization, uploads and cleanup.  The report is also kept in last_report, so it
+        is available when a write fails.
+
+        With dry_run set to True, nothing is written and the WritePlan of the write is returned instead,
+        see plan().
+
+        By default every value is sent as a string.  With a schema, a dict of header -> column type (int,
+        float, bool, date, datetime or string) or "infer" to infer the types from the data, numbers and
+        booleans are sent as native values and dates as serial numbers, with a date format applied to
+        their columns.  Values that don't match their column type are still sent as strings.
+
+        With an engine of "csv", workbooks that don't exist yet are bulk loaded: every worksheet is streamed
+        as a CSV file in a resumable upload that Drive converts into a sheet, which is much faster than
+        values updates for large initial loads.  Values are parsed by Sheets as if they were typed in.
+        Workbooks that already exist are still written with the values API.  Only overwrites of sized data
+        without a schema or a journal can be bulk loaded.
+
+        If the writer was created with a pool of credentials, the workbooks of an overwrite are dealt out
+        to the clients of the pool, each paced against its own quota, and written in parallel.  With
+        max_processes, every client writes its workbooks in a worker process, up to max_processes at a
+        time, so serialization also runs on several cores.  The data is then sent to every worker process,
+        and the on_request and on_chunk_written hooks only see the requests of this process.
+
+        As of 2/28/2023, Google Sheets only allows 10M "cells" per workbook.
+        """
+
+        if dry_run:
+            if mode == 'append':
+                raise ValueError('Appends can\'t be planned, their starting point is only known from the API.')
+            return self.plan(
+                data_lod=data_lod,
+                workbook_name=workbook_name,
+                chunk_size=chunk_size,
+                max_cells_per_sheet=max_cells_per_sheet,
+                max_cells_per_workbook=max_cells_per_workbook,
+                headers=headers,
+                chunk_bytes=chunk_bytes,
+                schema=schema,
+            )
+
+        with self._reporting(workbook_name, mode) as report:
+            self._write_to_gsheets(
+                data_lod=data_lod,
+                workbook_name=workbook_name,
+                chunk_size=chunk_size,
+                max_cells_per_sheet=max_cells_per_sheet,
+                max_cells_per_workbook=max_cells_per_workbook,
+                headers=headers,
+                prefetch_depth=prefetch_depth,
+                max_workers=max_workers,
+                chunk_bytes=chunk_bytes,
+                mode=mode,
+                block_size=block_size,
+                manifest_path=manifest_path,
+                journal_path=journal_path,
+                resume=resume,
+                schema=schema,
+                engine=engine,
+                max_processes=max_processes,
+            )
+        return report
+
+    def write_many(
+        self,
+        datasets: Dict[str, object],
+        workbook_name: str,
+        headers: Optional[Dict[str, List[str]]] = None,
+        chunk_size: Optional[int] = 100_000,
+        chunk_bytes: Optional[int] = 2_000_000,
+        max_cells_per_workbook: Optional[int] = 9_000_000,
+        schema: Union[None, str, Dict[str, str]] = None,
+    ) -> RunReport:
+        """
+        Write several datasets (worksheet name -> list of dicts, DataFrame or record array) to worksheets of
+        a single workbook with the provided name, e.g. many small reports that are refreshed together.
+
+        Unlike one write_to_gsheets call per dataset, the workbook is looked up once, every worksheet is
+        created, cleared and resized with a single batchUpdate request, and the values of all datasets are
+        packed into as few values batchUpdate requests as chunk_bytes of payload allows.  Other worksheets
+        of the workbook are left alone and no other workbook is cleaned up.  Every dataset has to fit in
+        the workbook, i.e. all of them together in max_cells_per_workbook cells.
+
+        headers can provide the column names of some datasets, by worksheet name, and the schema applies
+        to every dataset, see write_to_gsheets().  Returns a RunReport of the write.
+        """
+
+        with self._reporting(workbook_name, 'overwrite') as report:
+            self._write_many(
+                datasets=datasets,
+                workbook_name=workbook_name,
+                headers=headers or {},
+                chunk_size=chunk_size,
+                chunk_bytes=chunk_bytes,
+                max_cells_per_workbook=max_cells_per_workbook,
+                schema=schema,
+            )
+        return report
+
+    def _write_many(
+        self,
+        datasets: Dict[str, object],
+        workbook_name: str,
+        headers: Dict[str, List[str]],
+        chunk_size: Optional[int],
+        chunk_bytes: Optional[int],
+        max_cells_per_workbook: Optional[int],
+        schema: Union[None, str, Dict[str, str]],
+    ):
+        """
+        Write several datasets to one workbook, see write_many().
+        """
+
+        if not datasets:
+            raise ValueError('No datasets to write.')
+
+        # Get the header names and column types of every dataset
+        layouts = {}  # worksheet name -> (data, headers, schema)
+        for name, data in datasets.items():
+            if not is_sized(data):
+                raise ValueError(f'Dataset "{name}" must be a list, DataFrame or record array.')
+            if not len(data) and not headers.get(name):
+                raise ValueError(f'Headers are required for the empty dataset "{name}".')
+            _headers = headers.get(name) or get_headers(data)
+            layouts[name] = (data, _headers, resolve_schema(schema, data, _headers))
+        n_cells = sum((len(data) + 1) * len(_headers) for data, _headers, _ in layouts.values())
+        if n_cells > max_cells_per_workbook:
+            raise ValueError(
+                f'The datasets add up to {n_cells:,} cells, more than the {max_cells_per_workbook:,} cells of a '
+                f'workbook, write the largest ones with write_to_gsheets().'
+            )
+
+        # Create workbook if it doesn't exist
+        if not self.check_existence(workbook_name=workbook_name):
+            self.create_workbook(workbook_name)
+
+        # Create, clear and resize the worksheet of every dataset in one request
+        worksheets = self.apply_layout(
+            workbook_name=workbook_name,
+            desired_sheets={
+                name: (len(data) + 1, len(_headers))  # Plus one row for the headers
+                for name, (data, _headers, _) in layouts.items()
+            },
+            prefix=None,  # Other worksheets, even "<workbook_name>_<N>" ones, are left alone
+        )
+        wb = self.open_workbook(workbook_name)
+        format_requests = [
+            request
+            for name, (_, _headers, _schema) in layouts.items()
+            for request in number_format_requests(worksheets[name].id, number_formats(_headers, _schema))
+        ]
+        if format_requests:
+            with self._timer('layout'):
+                self.scheduler.write(wb.batch_update, {'requests': format_requests})
+
+        chunker = AdaptiveChunker(max_rows=chunk_size, target_bytes=chunk_bytes)
+
+        def value_ranges() -> Iterator[Tuple[tuple, int]]:
+            # Serialize every dataset chunk by chunk, as ((worksheet name, start row, values, records, bytes), bytes)
+            for name, (data, _headers, _schema) in layouts.items():
+                next_row, pending = 1, [list(_headers)]  # The headers are folded into the first chunk
+                for chunk in chunker.chunks(data):
+                    with self._timer('serialize'):
+                        values = pending + serialize_chunk(chunk, _headers, _schema)
+                        n_bytes = chunker.observe_payload(len(chunk), values)
+                    yield (name, next_row, values, len(chunk), n_bytes), n_bytes
+                    next_row, pending = next_row + len(values), []
+                if pending:
+                    n_bytes = estimate_payload_bytes(pending)
+                    yield (name, next_row, pending, 0, n_bytes), n_bytes
+
+        # Send the values of every dataset in as few requests as the payload budget allows
+        n_requests = 0
+        for batch in batch_by_bytes(value_ranges(), max_bytes=chunk_bytes or chunker.max_bytes):
+            start = time.monotonic()
+            with self._timer('upload'):
+                self.scheduler.write(wb.values_batch_update, body={
+                    'valueInputOption': 'RAW',
+                    'data': [
+                        {'range': gspread.utils.absolute_range_name(name, f'A{start_row}'), 'values': values}
+                        for name, start_row, values, _, _ in batch
+                    ],
+                })
+            n_requests += 1
+            for name, start_row, values, n_records, n_bytes in batch:
+                self._record_chunk({
+                    'workbook': workbook_name,
+                    'worksheet': name,
+                    'start_row': start_row,
+                    'rows': len(values),
+                    'records': n_records,
+                    'bytes': n_bytes,
+                    'seconds': time.monotonic() - start,  # of the whole request the values were sent in
+                })
+
+        n_records_written = sum(len(data) for data, _, _ in layouts.values())
+        logging.info(
+            f'Wrote {n_records_written:,} records to "{workbook_name}" in {len(layouts):,} sheets '
+            f'with {n_requests:,} values requests.'
+        )
+
+    def session(
+        self,
+        workbook_name: str,
+        headers: Optional[List[str]] = None,
+        max_buffer_rows: int = 10_000,
+        max_buffer_bytes: int = 2_000_000,
+        flush_interval: Optional[float] = 5,
+        max_pending_flushes: int = 2,
+        chunk_size: Optional[int] = 100_000,
+        chunk_bytes: Optional[int] = 2_000_000,
+        max_cells_per_sheet: int = 3_000_000,
+        max_cells_per_workbook: int = 9_000_000,
+        schema: Union[None, str, Dict[str, str]] = None,
+    ) -> WriterSession:
+        """
+        Open a WriterSession to the provided workbook name, to write rows as they are produced instead of
+        all at once.  Rows are buffered and flushed by a background thread once max_buffer_rows rows or
+        max_buffer_bytes bytes are buffered, or once the oldest row has waited flush_interval seconds.  The
+        same workbook and worksheet naming and cell limits as write_to_gsheets apply.
+
+        Use the session as a context manager: on exit, the remaining rows are flushed, the last worksheet is
+        trimmed and the workbooks left over from previous runs are removed.
+        """
+
+        return WriterSession(
+            self,
+            workbook_name=workbook_name,
+            headers=headers,
+            max_buffer_rows=max_buffer_rows,
+            max_buffer_bytes=max_buffer_bytes,
+            flush_interval=flush_interval,
+            max_pending_flushes=max_pending_flushes,
+            chunk_size=chunk_size,
+            chunk_bytes=chunk_bytes,
+            max_cells_per_sheet=max_cells_per_sheet,
+            max_cells_per_workbook=max_cells_per_workbook,
+            schema=schema,
+        )
+
+    def _write_to_gsheets(
+        self,
+        data_lod,
+        workbook_name: str,
+        chunk_size: Optional[int] = 100_000,
+        max_cells_per_sheet: Optional[int] = 3_000_000,
+        max_cells_per_workbook: Optional[int] = 9_000_000,
+        headers: Optional[List[str]] = None,
+        prefetch_depth: Optional[int] = 2,
+        max_workers: Optional[int] = None,
+        chunk_bytes: Optional[int] = 2_000_000,
+        mode: Literal['overwrite', 'sync', 'append'] = 'overwrite',
+        block_size: int = 1_000,
+        manifest_path: Optional[str] = None,
+        journal_path: Optional[str] = None,
+        resume: bool = False,
+        schema: Union[None, str, Dict[str, str]] = None,
+        engine: Literal['values', 'csv'] = 'values',
+        max_processes: Optional[int] = None,
+        workbook_numbers: Optional[Collection[int]] = None,  # only write these workbooks and skip the cleanup
+    ):
+        """
+        Write the data to Google Sheets, see write_to_gsheets().
+        """
+
+        if mode not in ('overwrite', 'sync', 'append'):
+            raise ValueError(f'Unknown mode "{mode}", expected "overwrite", "sync" or "append".')
+        if engine not in ('values', 'csv'):
+            raise ValueError(f'Unknown engine "{engine}", expected "values" or "csv".')
+        if self.credentials and (mode != 'overwrite' or not is_sized(data_lod) or journal_path):
+            raise ValueError('Only overwrites of a list, DataFrame or record array without a journal can be written '
+                             'with a pool of credentials.')
+        if max_processes and not self.credentials:
+            raise ValueError('Worker processes require a pool of credentials.')
+        if engine == 'csv' and (mode != 'overwrite' or not is_sized(data_lod) or journal_path or schema):
+            raise ValueError('Only overwrites of a list, DataFrame or record array without a schema or a journal '
+                             'can be bulk loaded.')
+
+        if resume and not journal_path:
+            raise ValueError('A journal_path is required to resume an export.')
+        if journal_path and (mode != 'overwrite' or not is_sized(data_lod)):
+            raise ValueError('Only overwrites of a list, DataFrame or record array can be journaled.')
+
+        chunker = AdaptiveChunker(max_rows=chunk_size, target_bytes=chunk_bytes)
+
+        # Other modes change the data without storing manifests, so the next sync must not trust the old ones
+        if manifest_path and mode != 'sync':
+            drop_manifests(manifest_path, workbook_name)
+
+        # Write iterables of unknown length as a stream
+        if not is_sized(data_lod):
+            if mode != 'overwrite':
+                raise ValueError(f'Streams can\'t be written in {mode} mode, pass a list, DataFrame or record array.')
+            records = iter(data_lod)
+            first_record = next(records, None)
+            if first_record is None:
+                logging.warning(f'No records to write to "{workbook_name}".')
+                return
+            if headers is None:
+                if getattr(data_lod, 'description', None):
+                    headers = get_headers(data_lod)
+                elif isinstance(first_record, dict):
+                    headers = get_headers([first_record])
+                else:
+                    raise ValueError('Headers are required when records are tuples rather than dicts.')
+            records = chain([first_record], records)
+            if schema == 'infer':
+                # Infer the column types from the first records of the stream
+                head = list(islice(records, SCHEMA_SAMPLE_SIZE))
+                records = chain(head, records)
+                schema = resolve_schema(schema, head, headers)
+            else:
+                schema = resolve_schema(schema, [], headers)
+            return self._stream_to_gsheets(
+                records=records,
+                workbook_name=workbook_name,
+                headers=headers,
+                chunker=chunker,
+                max_cells_per_sheet=max_cells_per_sheet,
+                max_cells_per_workbook=max_cells_per_workbook,
+                prefetch_depth=prefetch_depth,
+                schema=schema,
+            )
+
+        # Get header names, every row is written in this column order
+        headers = headers or get_headers(data_lod)
+        schema = resolve_schema(schema, data_lod, headers)  # Column types, once for the whole dataset
+
+        if mode == 'append':
+            return self._append_to_gsheets(
+                data_lod=data_lod,
+                workbook_name=workbook_name,
+                headers=headers,
+                chunker=chunker,
+                max_cells_per_sheet=max_cells_per_sheet,
+                max_cells_per_workbook=max_cells_per_workbook,
+                prefetch_depth=prefetch_depth,
+                max_workers=max_workers,
+                schema=schema,
+            )
+
+        n_cols = len(headers)  # Get number of columns
+        workbook_partitions = partition_records(
+            n_records=len(data_lod),
+            n_cols=n_cols,
+            max_cells_per_sheet=max_cells_per_sheet,
+            max_cells_per_workbook=max_cells_per_workbook,
+        )
+
+        # Deal the workbooks out to the clients of the pool, which write them with the code below
+        if self.credentials and workbook_numbers is None:
+            return self._write_with_pool(
+                workbook_name=workbook_name,
+                workbook_partitions=workbook_partitions,
+                n_cols=n_cols,
+                max_processes=max_processes,
+                write_options={
+                    'data_lod': data_lod,
+                    'workbook_name': workbook_name,
+                    'chunk_size': chunk_size,
+                    'max_cells_per_sheet': max_cells_per_sheet,
+                    'max_cells_per_workbook': max_cells_per_workbook,
+                    'headers': headers,
+                    'prefetch_depth': prefetch_depth,
+                    'max_workers': max_workers,
+                    'chunk_bytes': chunk_bytes,
+                    'schema': schema,
+                    'engine': engine,
+                },
+            )
+
+        write_tasks = []  # (workbook name, worksheet, first record, number of records)
+        pending_manifests = {}  # workbook name -> manifests to store once its worksheets are rewritten
+
+        # Record the plan and progress of the export, picking up where a previous run left off
+        journal = ExportJournal(journal_path) if journal_path else None
+        try:
+            if journal:
+                resuming = journal.start(
+                    plan={
+                        'workbook_name': workbook_name,
+                        'headers': headers,
+                        'fingerprint': fingerprint_dataset(data_lod, headers),
+                        'partitions': [[list(ranges) for ranges in partition] for partition in workbook_partitions],
+                    },
+                    resume=resume,
+                )
+                if resuming:
+                    logging.info(f'Resuming the export to "{workbook_name}" from journal "{journal_path}"...')
+
+            # Split data into multiple workbooks, if necessary
+            for i, worksheet_ranges in enumerate(workbook_partitions, start=1):
+                if workbook_numbers is not None and i not in workbook_numbers:
+                    continue
+
+                # Define dynamic workbook name
+                _workbook_name = workbook_name + f'_{i}'
+
+                logging.info(f'Starting write to "{_workbook_name}" workbook...')
+
+                worksheet_names = [workbook_name + f'_{j}' for j in range(1, len(worksheet_ranges) + 1)]
+
+                # Create workbook if it doesn't exist, bulk loading it from CSV uploads with the csv engine
+                if not self.check_existence(workbook_name=_workbook_name):
+                    if engine == 'csv':
+                        self.bulk_load_workbook(
+                            workbook_name=_workbook_name,
+                            worksheet_ranges=dict(zip(worksheet_names, worksheet_ranges)),
+                            data_lod=data_lod,
+                            headers=headers,
+                            chunker=chunker,
+                        )
+                        continue
+                    self.create_workbook(_workbook_name)
+
+                # Rewrite only the blocks that changed, unless the workbook has to be rewritten in full
+                if mode == 'sync':
+                    manifests = self._sync_workbook(
+                        workbook_name=_workbook_name,
+                        prefix=workbook_name,
+                        worksheet_ranges=dict(zip(worksheet_names, worksheet_ranges)),
+                        data_lod=data_lod,
+                        headers=headers,
+                        block_size=block_size,
+                        max_request_bytes=chunker.max_bytes,
+                        manifest_path=manifest_path,
+                        schema=schema,
+                    )
+                    if manifests is None:
+                        continue
+                    pending_manifests[_workbook_name] = manifests
+
+                # Create, clear and resize worksheets and remove "Sheet1" and stale worksheets in one request
+                if journal and journal.is_laid_out(_workbook_name):
+                    worksheets = self.get_worksheets(_workbook_name)  # Already laid out by the run being resumed
+                else:
+                    worksheets = self.apply_layout(
+                        workbook_name=_workbook_name,
+                        desired_sheets={
+                            name: (n_records_to_write + 1, n_cols)  # Plus one row for the headers
+                            for name, (_, n_records_to_write) in zip(worksheet_names, worksheet_ranges)
+                        },
+                        prefix=workbook_name,
+                    )
+                    formats = number_formats(headers, schema)
+                    if formats:
+                        worksheets_to_format = [worksheets[name] for name in worksheet_names]
+                        self.apply_number_formats(_workbook_name, worksheets_to_format, formats)
+                    if journal:
+                        journal.record_layout(_workbook_name)
+                for name, (start, n_records_to_write) in zip(worksheet_names, worksheet_ranges):
+                    write_tasks.append((_workbook_name, worksheets[name], start, n_records_to_write))
+
+            def write_worksheet(_workbook_name, worksheet, start, n_records_to_write):
+                # Skip the records that the run being resumed already uploaded
+                n_done = journal.records_written(_workbook_name, worksheet.title) if journal else 0
+
+                # Chunk data and write to the worksheet
+                return n_done + self._write_chunks(
+                    worksheet,
+                    chunker.chunks(data_lod, start=start + n_done, n_records=n_records_to_write - n_done),
+                    headers,
+                    chunker=chunker,
+                    prefetch_depth=prefetch_depth,
+                    start_row=n_done + 2 if n_done else 1,  # Below the header row and the records already there
+                    on_upload=partial(journal.record_chunk, _workbook_name, worksheet.title) if journal else None,
+                    schema=schema,
+                )
+
+            # Worksheets are independent once their row ranges are known, so they can be written in parallel
+            records_written = run_in_pool(write_worksheet, write_tasks, max_workers=max_workers)
+            if journal:
+                journal.close(completed=True)
+        finally:
+            if journal:
+                journal.close()  # Syncs and closes the journal of a failed export, a no-op once completed
+
+        # Store the manifests of workbooks that were rewritten in full, for the next sync to diff against
+        for _workbook_name, manifests in pending_manifests.items():
+            self._store_manifests(_workbook_name, manifests, existing={}, manifest_path=manifest_path)
+
+        # Log records written per workbook
+        workbook_counts = {}  # workbook name -> (records, sheets)
+        for (_workbook_name, *_), n_written in zip(write_tasks, records_written):
+            n_records_written, n_sheets = workbook_counts.get(_workbook_name, (0, 0))
+            workbook_counts[_workbook_name] = (n_records_written + n_written, n_sheets + 1)
+        for _workbook_name, (n_records_written, n_sheets) in workbook_counts.items():
+            logging.info(f'Wrote {n_records_written:,} records to "{_workbook_name}" in {n_sheets:,} sheets.')
+
+        # Remove any extra workbooks from previous runs
+        if workbook_numbers is None:
+            self.cleanup(
+                workbook_name=workbook_name,
+                max_objects=len(workbook_partitions) + 1,
+            )
+
+    def _write_with_pool(
+        self,
+        workbook_name: str,
+        workbook_partitions: List[List[Tuple[int, int]]],
+        n_cols: int,
+        max_processes: Optional[int],
+        write_options: dict,
+    ):
+        """
+        Write the workbooks of an overwrite with the clients of the pool.  Every client lists the files it
+        can open, so existing workbooks stay with a client that can open them and new ones are dealt out by
+        pool_strategy.  Clients write their workbooks in parallel, in threads or in worker processes, and
+        each then removes the extra workbooks it holds from previous runs.
+        """
+
+        # Find the client that can already open each workbook, one Drive query per client
+        owners = {}  # workbook number -> client index
+        with self._timer('lookup'):
+            for index, member in enumerate(self.pool):
+                for file in member.list_workbooks(prefix=workbook_name):
+                    if is_partition_title(file['name'], workbook_name):
+                        owners.setdefault(int(file['name'].rpartition('_')[2]), index)
+        assignment = assign_workbooks(
+            workbook_cells={
+                i: sum(n_records + 1 for _, n_records in worksheet_ranges) * n_cols
+                for i, worksheet_ranges in enumerate(workbook_partitions, start=1)
+            },
+            owners=owners,
+            n_clients=len(self.pool),
+            strategy=self.pool_strategy,
+        )
+        tasks = [
+            (index, [i for i, assigned in assignment.items() if assigned == index])
+            for index in range(len(self.pool))
+        ]
+        tasks = [(index, numbers) for index, numbers in tasks if numbers]
+        logging.info(f'Writing {len(assignment):,} workbooks of "{workbook_name}" with {len(tasks):,} clients...')
+
+        for member in self.pool:
+            member._report = self._report
+        try:
+            if max_processes:
+                from concurrent.futures import ProcessPoolExecutor  # Imports multiprocessing, only needed here
+
+                if any(isinstance(self.credentials[index], gspread.Client) for index, _ in tasks):
+                    raise ValueError('Clients can\'t be sent to worker processes, pass key file paths or callables.')
+                with ProcessPoolExecutor(max_workers=min(max_processes, len(tasks))) as executor:
+                    futures = [
+                        executor.submit(
+                            _write_workbooks, self._pool_options, self.credentials[index], numbers, write_options
+                        )
+                        for index, numbers in tasks
+                    ]
+                    for future in futures:
+                        if self._report is not None:
+                            self._report.merge(future.result())
+                        else:
+                            future.result()
+            else:
+                run_in_pool(
+                    lambda index, numbers: self.pool[index]._write_to_gsheets(
+                        **write_options, workbook_numbers=numbers
+                    ),
+                    tasks,
+                    max_workers=len(tasks),
+                )
+
+            # Remove any extra workbooks from previous runs, from every client
+            for member in self.pool:
+                member.cleanup(workbook_name=workbook_name, max_objects=len(workbook_partitions) + 1)
+        finally:
+            for member in self.pool:
+                member._report = None
+
+    @timed('lookup')
+    def find_partitions(self, workbook_name: str) -> List[Tuple[str, List[gspread.Worksheet]]]:
+        """
+        Find the "<name>_<N>" workbooks written under the provided workbook name and their "<name>_<M>"
+        worksheets, in order, with a Drive query for the "<workbook_name>_..." spreadsheets plus one metadata
+        request per workbook.  Returns a list of (workbook name, worksheets) tuples.
+        """
+
+        files = self.list_workbooks(prefix=workbook_name)
+        partitions = []
+        for file in stale_partitions(((file['name'], file) for file in files), workbook_name, 1):  # Every one
+            if any(name == file['name'] for name, _ in partitions):
+                continue  # Like opening by name, the first of workbooks with the same name is used
+            if file['name'] not in self._workbook_cache:
+                wb = self.scheduler.read(self.gsheets_client.open_by_key, file['id'])
+                self._workbook_cache[file['name']] = (wb, time.monotonic())
+                if self.registry is not None:
+                    self.registry.record(file['name'], wb.id)
+            worksheets = self.get_worksheets(file['name'])
+            titles = stale_partitions(((title, title) for title in worksheets), workbook_name, 1)
+            partitions.append((file['name'], [worksheets[title] for title in titles]))
+        return partitions
+
+    def read_from_gsheets(
+        self,
+        workbook_name: str,
+        chunk_size: int = 100_000,
+        max_workers: Optional[int] = 4,
+        iterator: bool = False,
+        value_render_option: str = 'FORMATTED_VALUE',
+    ):
+        """
+        Read a dataset written by write_to_gsheets back into a pandas DataFrame, with the headers of the
+        first worksheet as its columns.  Every "<name>_<N>" workbook and "<name>_<M>" worksheet is read, in
+        order, so the records come back in the order they were written.  Empty cells are read as None.
+
+        Rows are fetched chunk_size rows at a time, a values batchGet per chunk that can cover the end of one
+        worksheet and the start of the next, with up to max_workers chunks fetched in parallel.  All threads
+        share the writer's read quota.
+
+        With iterator set to True, an iterator of DataFrames of up to chunk_size rows is returned instead,
+        which holds at most max_workers chunks in memory however large the dataset is.
+
+        value_render_option is passed on to the API, e.g. "UNFORMATTED_VALUE" to read numbers written with
+        a schema back as numbers rather than formatted strings.
+        """
+
+        import pandas as pd  # Only imported by the calls that need it, pandas is slow to import
+
+        partitions = self.find_partitions(workbook_name)
+        worksheets = [ws for _, sheets in partitions for ws in sheets]
+        if not worksheets:
+            raise gspread.exceptions.SpreadsheetNotFound(workbook_name)
+
+        tasks = []  # (workbook name, [(A1 range, rows)]), one per values batchGet
+        for wb_name, sheets in partitions:
+            n_cols = {ws.title: ws.col_count for ws in sheets}
+            for ranges in plan_reads([(ws.title, ws.row_count, ws.col_count) for ws in sheets], chunk_size):
+                tasks.append((wb_name, [
+                    (
+                        gspread.utils.absolute_range_name(
+                            title, f'A{first_row}:{gspread.utils.rowcol_to_a1(last_row, n_cols[title])}'
+                        ),
+                        last_row - first_row + 1,
+                    )
+                    for title, first_row, last_row in ranges
+                ]))
+
+        # Read the headers along with the first chunk
+        first_wb_name = next(wb_name for wb_name, sheets in partitions if sheets)
+        header_range = (gspread.utils.absolute_range_name(worksheets[0].title, '1:1'), 1)
+        if tasks and tasks[0][0] == first_wb_name:
+            tasks[0] = (first_wb_name, [header_range] + tasks[0][1])
+        else:
+            tasks.insert(0, (first_wb_name, [header_range]))
+
+        def fetch(task) -> List[list]:
+            wb_name, ranges = task
+            wb = self.open_workbook(wb_name)
+            response = self.scheduler.read(wb.values_batch_get, [a1_range for a1_range, _ in ranges], {
+                'valueRenderOption': value_render_option,
+            })
+            rows = []
+            for (_, n_rows), value_range in zip(ranges, response.get('valueRanges', [])):
+                values = value_range.get('values', [])
+                rows.extend(values + [[]] * (n_rows - len(values)))  # The API leaves out trailing empty rows
+            return rows
+
+        def chunks() -> Iterator['pd.DataFrame']:
+            headers = None
+            for rows in map_in_pool(fetch, tasks, max_workers=max_workers):
+                if headers is None:
+                    headers = rows.pop(0)
+                n_cols = len(headers)
+                yield pd.DataFrame(
+                    [[None if value == '' else value for value in row[:n_cols]] + [None] * (n_cols - len(row))
+                     for row in rows],
+                    columns=headers,
+                )
+
+        if iterator:
+            return chunks()
+        frame = pd.concat(list(chunks()), ignore_index=True)
+        logging.info(f'Read {len(frame):,} records from "{workbook_name}" in {len(worksheets):,} sheets.')
+        return frame
+
+
+def _write_workbooks(options: dict, credential: Credential, workbook_numbers: List[int], write_options: dict) -> dict:
+    """
+    Write some of the workbooks of an overwrite with a writer of its own, in a worker process of a pool.
+    Returns the report of the part written, as a dict.
+    """
+
+    writer = GoogleSheetsWriter(client=make_client(credential), **options)
+    report = RunReport(write_options['workbook_name'], 'overwrite')
+    writer._report = report
+    scheduler_before = writer.scheduler.metrics()
+    try:
+        writer._write_to_gsheets(**write_options, workbook_numbers=workbook_numbers)
+    finally:
+        writer._report = None
+        scheduler_after = writer.scheduler.metrics()
+        report.finish({name: scheduler_after[name] - scheduler_before[name] for name in scheduler_after})
+    return report.to_dict()
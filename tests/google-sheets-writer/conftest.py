@@ -0,0 +1,17 @@
+import pytest
+import threading
+
+from google_sheets_writer.fake import FakeSheetsServer
+
+
+@pytest.fixture
+def sheets_server():
+    """
+    Fixture is used to run a local stand-in for the Sheets and Drive REST APIs for the duration of a test.
+    """
+    server = FakeSheetsServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
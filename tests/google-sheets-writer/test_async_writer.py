@@ -0,0 +1,166 @@
+import asyncio
+import gspread
+import pytest
+import time
+
+from unittest.mock import Mock, patch
+
+httpx = pytest.importorskip('httpx')
+
+from google_sheets_writer.async_writer import AsyncGoogleSheetsWriter  # noqa: E402
+
+
+def make_writer(server, **kwargs):
+    """
+    Return an async writer pointed at the local stand-in server, with static credentials.
+    """
+    return AsyncGoogleSheetsWriter(
+        user_email='test@test.com',
+        credentials=Mock(valid=True, token='test-token'),
+        sheets_api_url=f'{server.url}/sheets',
+        drive_api_url=f'{server.url}/drive',
+        **kwargs,
+    )
+
+
+def test_workbook_methods(sheets_server):
+    async def run():
+        async with make_writer(sheets_server) as writer:
+            # Test creating and finding workbooks and worksheets
+            assert await writer.check_existence('test_workbook') is False
+            await writer.create_workbook('test_workbook')
+            assert await writer.check_existence('test_workbook') is True
+            assert await writer.check_existence('test_workbook', 'Sheet1') is True
+            await writer.create_worksheet('test_workbook', 'test_worksheet', num_rows=10, num_cols=2)
+            writer.invalidate_cache()
+            assert await writer.check_existence('test_workbook', 'test_worksheet') is True
+            assert await writer.get_last_cell('test_workbook', 'test_worksheet') == 'A1'
+
+            # Test deleting worksheets and workbooks
+            await writer.delete_object('test_workbook', 'test_worksheet')
+            assert await writer.check_existence('test_workbook', 'test_worksheet') is False
+            await writer.delete_object('test_workbook')
+            assert await writer.check_existence('test_workbook') is False
+
+    asyncio.run(run())
+    permission = {'type': 'user', 'role': 'writer', 'emailAddress': 'test@test.com'}
+    assert sheets_server.backend.permissions[0][1] == permission
+
+
+def test_credentials_refreshed_once(sheets_server):
+    credentials = Mock(valid=False, token='test-token')
+
+    def refresh(request):
+        time.sleep(0.05)  # Long enough for every request to be waiting on the refresh
+        credentials.valid = True
+
+    credentials.refresh.side_effect = refresh
+
+    async def run():
+        async with make_writer(sheets_server) as writer:
+            writer.credentials = credentials
+            await asyncio.gather(*(writer.check_existence(f'test_{n}') for n in range(5)))
+
+    # Test concurrent requests share a single refresh of expired credentials
+    asyncio.run(run())
+    assert credentials.refresh.call_count == 1
+
+
+def test_cleanup(sheets_server):
+    backend = sheets_server.backend
+    for n in (1, 2, 4):  # Leftovers past a gap in the numbering
+        backend.create_spreadsheet(f'test_{n}')
+    spreadsheet_id = backend.create_spreadsheet('test_sheets')
+    backend.batch_update(spreadsheet_id, {'requests': [
+        {'addSheet': {'properties': {'title': f'test_{n}'}}} for n in (1, 3, 4)
+    ]})
+
+    async def run():
+        async with make_writer(sheets_server) as writer:
+            await writer.cleanup(max_objects=2, workbook_name='test_sheets', worksheet_name='test')
+            await writer.cleanup(max_objects=2, workbook_name='test')
+            return writer.scheduler.metrics()
+
+    metrics = asyncio.run(run())
+    assert backend.sheet_titles('test_sheets') == ['Sheet1', 'test_1']
+    assert sorted(s['title'] for s in backend.spreadsheets.values()) == ['test_1', 'test_sheets']
+    assert metrics['write_requests'] == 3  # One batchUpdate of worksheets, one Drive delete per workbook
+
+
+def test_write_to_gsheets(sheets_server):
+    example_data = [{'Header_1': f'a_{i}', 'Header_2': i if i % 3 else None} for i in range(1, 8)]
+
+    async def run():
+        async with make_writer(sheets_server) as writer:
+            await writer.write_to_gsheets(
+                data_lod=example_data,
+                workbook_name='test',
+                chunk_size=2,
+                max_cells_per_sheet=6,  # 3 records per worksheet
+                max_cells_per_workbook=12,  # 2 worksheets per workbook
+            )
+            return writer.scheduler.metrics()
+
+    metrics = asyncio.run(run())
+    expected = [['Header_1', 'Header_2']] + [[f'a_{i}', str(i) if i % 3 else None] for i in range(1, 8)]
+    assert sheets_server.backend.sheet_values('test_1', 'test_1') == [expected[0]] + expected[1:4]
+    assert sheets_server.backend.sheet_values('test_1', 'test_2') == [expected[0]] + expected[4:7]
+    assert sheets_server.backend.sheet_values('test_2', 'test_1') == [expected[0]] + expected[7:8]
+    assert sheets_server.backend.sheet_titles('test_2') == ['test_1']
+    assert metrics['write_requests'] > 0
+
+    # Test a rerun with less data overwrites the first workbook and removes the second one
+    async def rerun():
+        async with make_writer(sheets_server) as writer:
+            await writer.write_to_gsheets(data_lod=example_data[:2], workbook_name='test')
+
+    asyncio.run(rerun())
+    assert sheets_server.backend.sheet_values('test_1', 'test_1') == expected[:3]
+    assert sheets_server.backend.sheet_titles('test_1') == ['test_1']
+    assert [s['title'] for s in sheets_server.backend.spreadsheets.values()] == ['test_1']
+
+
+def test_write_to_gsheets_oversized_payload(sheets_server):
+    sheets_server.backend.max_request_bytes = 50_000
+    example_data = [{'A': f'a_{i}', 'B': 'b' * 500} for i in range(2000)]
+
+    # Test chunks rejected as too large are split in half until they fit, in place of failing the export
+    async def run():
+        async with make_writer(sheets_server, write_requests_per_minute=60_000) as writer:
+            await writer.write_to_gsheets(data_lod=example_data, workbook_name='test', chunk_bytes=200_000)
+
+    asyncio.run(run())
+    expected = [['A', 'B']] + [[record['A'], record['B']] for record in example_data]
+    assert sheets_server.backend.sheet_values('test_1', 'test_1') == expected
+
+
+@patch('google_sheets_writer.rate_limiter.random.uniform', Mock(return_value=0))
+def test_concurrent_exports(sheets_server):
+    # Test many exports share one writer, its connection pool and concurrency cap
+    sheets_server.backend.fail_next = [429, 503]  # Retried by the scheduler
+
+    async def run():
+        async with make_writer(sheets_server, max_concurrency=2, write_requests_per_minute=6000) as writer:
+            await asyncio.gather(*[
+                writer.write_to_gsheets(data_lod=[{'id': n, 'export': f'export_{n}'}], workbook_name=f'export_{n}')
+                for n in range(5)
+            ])
+            return writer.scheduler.metrics()
+
+    metrics = asyncio.run(run())
+    assert metrics['retries'] == 2
+    for n in range(5):
+        expected = [['id', 'export'], [str(n), f'export_{n}']]
+        assert sheets_server.backend.sheet_values(f'export_{n}_1', f'export_{n}_1') == expected
+
+
+def test_errors(sheets_server):
+    async def run():
+        async with make_writer(sheets_server, max_retries=0) as writer:
+            with pytest.raises(gspread.exceptions.APIError):
+                sheets_server.backend.fail_next = [400]
+                await writer.create_workbook('test_workbook')
+            with pytest.raises(TypeError):
+                await writer.write_to_gsheets(data_lod=iter([{'a': 1}]), workbook_name='test')
+
+    asyncio.run(run())
@@ -0,0 +1,124 @@
+import os
+import pytest
+import subprocess
+import sys
+
+from google_sheets_writer.fake import FakeSheetsBackend
+from google_sheets_writer.writer import GoogleSheetsWriter
+
+# End to end benchmarks of GoogleSheetsWriter against the in-memory fake backend.  Besides the wall time,
+# every benchmark reports the requests, bytes and cells the export cost in its extra info, e.g.:
+#   pytest tests/google-sheets-writer/test_benchmark.py --benchmark-only --benchmark-json=benchmark.json
+# Exports of 1M cells and more only run when the BENCHMARK_LARGE environment variable is set.
+
+# Import time budget of the package's own modules, in microseconds, without its dependencies
+IMPORT_BUDGET_US = 50_000
+
+large = pytest.mark.skipif(not os.environ.get('BENCHMARK_LARGE'), reason='set BENCHMARK_LARGE to run')
+
+SIZES = [
+    pytest.param(1_000, id='1k'),
+    pytest.param(100_000, id='100k'),
+    pytest.param(1_000_000, id='1M', marks=large),
+    pytest.param(9_000_000, id='9M', marks=large),
+]
+WIDTHS = [pytest.param(n_cols, id=f'{n_cols}cols') for n_cols in (5, 26, 100)]
+
+
+def make_records(n_cells: int, n_cols: int) -> list:
+    """
+    Return records of mixed types filling about n_cells cells, n_cols columns wide.
+    """
+    values = [lambda i: i, lambda i: f'name_{i}', lambda i: i / 7, lambda i: i % 2 == 0, lambda i: None]
+    headers = [f'column_{j}' for j in range(n_cols)]
+    return [{header: values[j % len(values)](i) for j, header in enumerate(headers)} for i in range(n_cells // n_cols)]
+
+
+def make_writer(backend: FakeSheetsBackend) -> GoogleSheetsWriter:
+    """
+    Return a writer whose requests are served by the provided fake backend, without pacing.
+    """
+    return GoogleSheetsWriter(
+        client=backend.client(), read_requests_per_minute=1_000_000, write_requests_per_minute=1_000_000
+    )
+
+
+def run_benchmark(benchmark, records: list, prepare=None, **kwargs) -> FakeSheetsBackend:
+    """
+    Benchmark writing the records to a fresh fake backend per round, optionally prepared by an untimed call
+    of prepare(writer), and report the requests, bytes and cells the last round cost.
+    """
+    rounds = []
+
+    def setup():
+        backend = FakeSheetsBackend()
+        writer = make_writer(backend)
+        if prepare is not None:
+            prepare(writer)
+        backend.reset_metrics()
+        rounds.append(backend)
+        return (writer,), {}
+
+    def write(writer):
+        writer.write_to_gsheets(records, 'benchmark', **kwargs)
+
+    n_cells = len(records) * len(records[0])
+    benchmark.pedantic(write, setup=setup, rounds=3 if n_cells <= 100_000 else 1)
+    backend = rounds[-1]
+    benchmark.extra_info.update(backend.metrics(), cells=n_cells)
+    assert backend.metrics()['errors'] == 0
+    return backend
+
+
+@pytest.mark.benchmark(group='overwrite')
+@pytest.mark.parametrize('n_cols', WIDTHS)
+@pytest.mark.parametrize('n_cells', SIZES)
+def test_overwrite_benchmark(benchmark, n_cells, n_cols):
+    records = make_records(n_cells, n_cols)
+    backend = run_benchmark(benchmark, records)
+    assert backend.metrics()['cells_written'] >= len(records) * n_cols
+
+
+@pytest.mark.benchmark(group='sync')
+@pytest.mark.parametrize('n_cols', WIDTHS)
+@pytest.mark.parametrize('n_cells', SIZES)
+def test_sync_benchmark(benchmark, n_cells, n_cols):
+    records = make_records(n_cells, n_cols)
+    changed = [dict(records[0], column_1='changed')] + records[1:]
+
+    def prepare(writer):
+        writer.write_to_gsheets(records, 'benchmark', mode='sync', block_size=100)
+
+    # Only the first block of 100 rows changed
+    backend = run_benchmark(benchmark, changed, prepare=prepare, mode='sync', block_size=100)
+    assert backend.metrics()['cells_written'] <= 100 * n_cols
+
+
+def import_times(module: str) -> dict:
+    """
+    Return the self import time in microseconds of every module a fresh interpreter imports to import the
+    provided module, as reported by python -X importtime.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        self_time, _, name = line.partition(':')[2].split('|')
+        if self_time.strip().isdigit():
+            times[name.strip()] = int(self_time)
+    return times
+
+
+@pytest.mark.parametrize('module', ['google_sheets_writer.writer', 'google_sheets_writer.session'])
+def test_import_time(module):
+    own_times = []
+    for _ in range(3):  # The fastest of a few fresh interpreters, so a busy machine doesn't fail the test
+        times = import_times(module)
+
+        # Test pandas, NumPy and multiprocessing are only imported by the calls that need them
+        assert not {'pandas', 'numpy', 'multiprocessing'} & set(times)
+        own_times.append(sum(time for name, time in times.items() if name.startswith('google_sheets_writer')))
+
+    # Test the package's own modules stay cheap to import
+    assert min(own_times) < IMPORT_BUDGET_US
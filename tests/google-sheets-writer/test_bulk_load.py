@@ -0,0 +1,45 @@
+import csv
+import io
+import pytest
+
+from google_sheets_writer.bulk_load import UPLOAD_ALIGNMENT, csv_pieces, start_upload, upload_piece
+from google_sheets_writer.fake import FakeSheetsBackend
+
+
+def test_csv_pieces():
+    rows = [[f'value {i}', None, 'with, comma', 'with "quotes"\nand a newline'] for i in range(20_000)]
+    pieces = list(csv_pieces([[['A', 'B', 'C', 'D']], rows[:10_000], rows[10_000:]], piece_bytes=UPLOAD_ALIGNMENT))
+
+    # Test every piece but the last is exactly piece_bytes long
+    assert len(pieces) > 2
+    assert all(len(piece) == UPLOAD_ALIGNMENT for piece in pieces[:-1])
+    assert 0 < len(pieces[-1]) <= UPLOAD_ALIGNMENT
+
+    # Test the pieces join into valid CSV, with None as empty cells
+    parsed = list(csv.reader(io.StringIO(b''.join(pieces).decode())))
+    assert parsed[0] == ['A', 'B', 'C', 'D']
+    assert parsed[1:] == [[row[0], '', row[2], row[3]] for row in rows]
+
+    assert list(csv_pieces([])) == []
+    with pytest.raises(ValueError):
+        list(csv_pieces([rows], piece_bytes=1_000))
+
+
+def test_resumable_upload():
+    backend = FakeSheetsBackend()
+    client = backend.client()
+    rows = [['A', 'B']] + [[str(i), f'b_{i}'] for i in range(100_000)]
+    pieces = list(csv_pieces([rows], piece_bytes=UPLOAD_ALIGNMENT))
+    assert len(pieces) > 1
+
+    # Test the file is only converted once its last piece is received
+    session_url = start_upload(client, 'test_1')
+    offset = 0
+    for piece in pieces[:-1]:
+        assert upload_piece(client, session_url, piece, offset) is None
+        offset += len(piece)
+    assert backend.spreadsheets == {}
+    file = upload_piece(client, session_url, pieces[-1], offset, total=offset + len(pieces[-1]))
+
+    assert list(backend.spreadsheets) == [file['id']]
+    assert backend.sheet_values('test_1', 'Sheet1') == rows
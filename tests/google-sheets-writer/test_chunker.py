@@ -0,0 +1,80 @@
+import gspread
+import pandas as pd
+import requests
+
+from google_sheets_writer.chunker import AdaptiveChunker, estimate_payload_bytes, is_payload_error
+from unittest.mock import Mock
+
+
+def test_estimate_payload_bytes():
+    assert estimate_payload_bytes([]) == 0
+    assert estimate_payload_bytes([['ab', None]]) == (2 + 3) + 5 + 2
+    assert estimate_payload_bytes([['ab', 'cd']] * 1000) == 12 * 1000
+
+    # Test typed values have no quotes
+    assert estimate_payload_bytes([[12, 1.5, True]]) == (2 + 1) + (3 + 1) + (4 + 1) + 2
+
+
+def test_chunks():
+    records = list(range(10))
+
+    # Test fixed size chunks of sized data and iterators
+    chunker = AdaptiveChunker(max_rows=3, target_bytes=None)
+    assert list(chunker.chunks(records)) == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    assert list(chunker.chunks(iter(records))) == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+
+    # Test chunks stay within a row range
+    assert list(chunker.chunks(records, start=2, n_records=4)) == [[2, 3, 4], [5]]
+    iterator = iter(records)
+    assert list(chunker.chunks(iterator, n_records=4)) == [[0, 1, 2], [3]]
+    assert list(chunker.chunks(iterator, n_records=4)) == [[4, 5, 6], [7]]
+
+    # Test DataFrames are sliced
+    frame = pd.DataFrame({'a': records})
+    assert [len(chunk) for chunk in chunker.chunks(frame, start=1)] == [3, 3, 3]
+
+    # Test no bound on rows
+    chunker = AdaptiveChunker(max_rows=None, target_bytes=None)
+    assert list(chunker.chunks(records)) == [records]
+    assert list(chunker.chunks(iter(records))) == [records]
+
+
+def test_adaptive_sizing():
+    chunker = AdaptiveChunker(max_rows=1_000, target_bytes=10_000, min_bytes=1_000, initial_rows=10)
+
+    # Test the first chunk uses the initial size, later ones are sized from the observed record size
+    assert chunker.next_size() == 10
+    chunker.observe_payload(10, [['x' * 95]] * 10)  # 100 bytes per record
+    assert chunker.next_size() == 100
+
+    # Test the row bound always applies
+    chunker.observe_payload(10, [['']] * 10)  # 5 bytes per record, averaged to 52.5
+    assert chunker.next_size() == 190
+    chunker.max_rows = 50
+    assert chunker.next_size() == 50
+    chunker.max_rows = 1_000
+
+    # Test the budget grows after fast uploads that used it, shrinks after slow or failed ones
+    chunker.record_upload(n_bytes=10_000, seconds=1)
+    assert chunker.target_bytes == 15_000
+    chunker.record_upload(n_bytes=1_000, seconds=1)  # Budget wasn't used, so there is no reason to grow
+    assert chunker.target_bytes == 15_000
+    chunker.record_upload(n_bytes=15_000, seconds=20)
+    assert chunker.target_bytes == 7_500
+    chunker.record_upload(n_bytes=7_500, seconds=1, failed=True)
+    assert chunker.target_bytes == 3_750
+
+    # Test the budget stays within its bounds
+    for _ in range(10):
+        chunker.record_upload(n_bytes=0, seconds=1, failed=True)
+    assert chunker.target_bytes == 1_000
+
+
+def test_is_payload_error():
+    assert is_payload_error(requests.exceptions.Timeout()) is True
+    assert is_payload_error(requests.exceptions.ConnectionError()) is True
+    for status_code, expected in [(413, True), (503, True), (429, False), (400, False)]:
+        response = Mock(status_code=status_code)
+        response.json.return_value = {'error': {'code': status_code}}
+        assert is_payload_error(gspread.exceptions.APIError(response)) is expected
+    assert is_payload_error(ValueError()) is False
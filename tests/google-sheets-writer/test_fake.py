@@ -0,0 +1,105 @@
+import gspread
+import pytest
+
+from unittest.mock import patch
+from google_sheets_writer.fake import FakeAPIError, FakeSheetsBackend, parse_range
+from google_sheets_writer.writer import GoogleSheetsWriter
+
+
+def make_writer(backend, **kwargs):
+    """
+    Return a writer whose requests are served by the provided fake backend, without pacing.
+    """
+    return GoogleSheetsWriter(
+        user_email='test@test.com',
+        client=backend.client(),
+        read_requests_per_minute=60_000,
+        write_requests_per_minute=60_000,
+        **kwargs,
+    )
+
+
+def test_parse_range():
+    assert parse_range("'Sheet 1'!A5") == ('Sheet 1', 0, 5, None, None)
+    assert parse_range("'It''s'!A1:B") == ("It's", 0, 1, 1, None)
+    assert parse_range('Sheet1!B:B') == ('Sheet1', 1, 1, 1, None)
+    assert parse_range('Sheet1!AA2:AB3') == ('Sheet1', 26, 2, 27, 3)
+    assert parse_range('Sheet1') == ('Sheet1', 0, 1, None, None)
+
+    # Test quotes in a title have to be escaped, the same as with Google
+    for a1_range in ("'It's'!A1", "It's!A1", "It''s!A1"):
+        with pytest.raises(FakeAPIError, match='Unable to parse range'):
+            parse_range(a1_range)
+
+
+def test_write_to_gsheets():
+    backend = FakeSheetsBackend()
+    writer = make_writer(backend)
+    example_records = [
+        {'Header_1': i, 'Header_2': f'value_{i}', 'Header_3': i / 2 if i % 3 else None} for i in range(8)
+    ]
+    expected = [['Header_1', 'Header_2', 'Header_3']] + [
+        [str(v) if v is not None else None for v in record.values()] for record in example_records
+    ]
+    writer.write_to_gsheets(example_records, 'test', max_cells_per_sheet=9, max_cells_per_workbook=18, chunk_size=2)
+
+    assert backend.sheet_titles('test_1') == ['test_1', 'test_2']
+    assert backend.sheet_titles('test_2') == ['test_1']
+    assert backend.sheet_values('test_1', 'test_1') == expected[:4]
+    assert backend.sheet_values('test_2', 'test_1') == [expected[0]] + expected[7:9]
+    assert writer.get_last_cell('test_1', 'test_1') == 'A5'
+    assert backend.metrics()['errors'] == 0
+    assert backend.metrics()['cells_written'] == 3 * (len(example_records) + 3)
+
+    # Nothing changed, so a sync only reads
+    writer.write_to_gsheets(example_records, 'test', max_cells_per_sheet=9, max_cells_per_workbook=18, mode='sync')
+    backend.reset_metrics()
+    writer.write_to_gsheets(example_records, 'test', max_cells_per_sheet=9, max_cells_per_workbook=18, mode='sync')
+    assert backend.metrics()['write_requests'] == 0
+    assert backend.sheet_values('test_2', 'test_1') == [expected[0]] + expected[7:9]
+
+
+def test_limits():
+    backend = FakeSheetsBackend(max_request_bytes=1_000)
+    client = backend.client()
+    wb = client.create('test')
+    ws = wb.sheet1
+
+    with pytest.raises(gspread.exceptions.APIError, match='above the limit of 10000000 cells'):
+        wb.add_worksheet('large', rows=400_000, cols=26)
+    assert [ws.title for ws in wb.worksheets()] == ['Sheet1']  # A failed batchUpdate is not applied
+
+    with pytest.raises(gspread.exceptions.APIError, match='exceeds grid limits'):
+        ws.update('A1000', [['1'], ['2']])
+    with pytest.raises(gspread.exceptions.APIError, match='payload size'):
+        ws.update('A1', [['x' * 1_000]])
+
+    ws.update('A1', [['1', '2'], ['3']])
+    assert ws.col_values(1) == ['1', '3']
+    assert backend.sheet_values('test', 'Sheet1') == [['1', '2'], ['3']]
+
+
+@patch('google_sheets_writer.fake.time.sleep')
+def test_injected_failures(mock_sleep):
+    backend = FakeSheetsBackend(latency=0.5, write_requests_per_minute=2)
+    client = backend.client()
+    client.create('test')
+    mock_sleep.assert_called_with(0.5)
+
+    client.create('test_2')
+    with pytest.raises(gspread.exceptions.APIError, match='Quota exceeded'):
+        client.create('test_3')
+
+    backend.quotas['write'] = None
+    backend.fail_next = [503]
+    with pytest.raises(gspread.exceptions.APIError, match='Injected failure'):
+        client.create('test_3')
+    client.create('test_3')
+    assert backend.metrics()['errors'] == 2
+
+    # The writer retries 429s and 5xxs
+    writer = make_writer(backend, max_retries=2)
+    writer.scheduler.backoff_base = 0
+    backend.fail_next = [429, 503]
+    assert writer.check_existence('test') is True
+    assert writer.scheduler.metrics()['retries'] == 2
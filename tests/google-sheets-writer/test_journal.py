@@ -0,0 +1,53 @@
+import pandas as pd
+
+from google_sheets_writer.journal import ExportJournal, fingerprint_dataset
+
+
+def test_fingerprint_dataset():
+    records = [{'A': i, 'B': f'b_{i}'} for i in range(1_000)]
+    fingerprint = fingerprint_dataset(records, ['A', 'B'])
+    assert fingerprint == fingerprint_dataset(list(records), ['A', 'B'])
+    assert fingerprint == fingerprint_dataset(pd.DataFrame(records), ['A', 'B'])
+    assert fingerprint != fingerprint_dataset(records[:-1], ['A', 'B'])
+    assert fingerprint != fingerprint_dataset(records, ['B', 'A'])
+    assert fingerprint != fingerprint_dataset(records[:999] + [{'A': 0, 'B': 'changed'}], ['A', 'B'])
+    assert fingerprint_dataset([], ['A']) == fingerprint_dataset([], ['A'])
+
+
+def test_journal(tmp_path):
+    path = str(tmp_path / 'export.journal')
+    plan = {'workbook_name': 'test', 'partitions': [[[0, 5]]]}
+
+    # Test a new journal records layouts and chunks
+    with ExportJournal(path) as journal:
+        assert journal.start(plan, resume=True) is False  # Nothing to resume yet
+        journal.record_layout('test_1')
+        journal.record_chunk('test_1', 'test_1', 1, 2, [['A'], ['a_1'], ['a_2']])
+        journal.record_chunk('test_1', 'test_1', 4, 2, [['a_3'], ['a_4']])
+
+    # Test a resumed journal picks up the progress, ignoring a line torn by a crash
+    with open(path, 'a') as file:
+        file.write('{"event":"chunk","workb')
+    with ExportJournal(path) as journal:
+        assert journal.start(plan, resume=True) is True
+        assert journal.is_laid_out('test_1') is True
+        assert journal.is_laid_out('test_2') is False
+        assert journal.records_written('test_1', 'test_1') == 4
+        assert journal.records_written('test_1', 'test_2') == 0
+        journal.record_chunk('test_1', 'test_1', 6, 1, [['a_5']])
+        journal.close(completed=True)
+    with open(path) as file:
+        lines = file.read().splitlines()
+    assert [line.split(',')[0] for line in lines] == [
+        '{"event":"plan"', '{"event":"layout"', '{"event":"chunk"', '{"event":"chunk"', '{"event":"chunk"',
+        '{"event":"done"}',
+    ]
+
+    # Test a different plan, or not resuming, starts the journal over
+    with ExportJournal(path) as journal:
+        assert journal.start({'workbook_name': 'other'}, resume=True) is False
+        assert journal.records_written('test_1', 'test_1') == 0
+    with ExportJournal(path) as journal:
+        assert journal.start(plan) is False
+    with open(path) as file:
+        assert len(file.read().splitlines()) == 1
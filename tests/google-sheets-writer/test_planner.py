@@ -0,0 +1,40 @@
+import pytest
+
+from google_sheets_writer.planner import estimate_record_bytes, plan_write
+from google_sheets_writer.utils.layout_utils import partition_records
+
+
+def test_plan_write():
+    plan = plan_write('test', ['A', 'B'], n_records=7, max_cells_per_sheet=6, max_cells_per_workbook=12, chunk_size=2)
+    assert [wb['name'] for wb in plan.workbooks] == ['test_1', 'test_2']
+    assert [ws['name'] for ws in plan.workbooks[0]['worksheets']] == ['test_1', 'test_2']
+    assert plan.partitions == partition_records(7, 2, 6, 12) == [[(0, 3), (3, 3)], [(6, 1)]]
+    assert plan.workbooks[0]['worksheets'][0]['chunks'] == [(0, 2, 0), (2, 1, 0)]
+    assert plan.workbooks[0]['worksheets'][0]['rows'] == 4
+    assert plan.n_chunks == 5
+    assert plan.read_requests == 2 * 2 + 1
+    assert plan.write_requests == 3 * 2 + 5
+    assert plan.bytes == 0  # Unknown without a record size
+
+
+def test_plan_write_bytes():
+    # Test chunks are sized by bytes, and capped at chunk_size
+    plan = plan_write('test', ['A'], n_records=100, chunk_size=30, chunk_bytes=200, record_bytes=10)
+    assert [chunk[1] for chunk in plan.workbooks[0]['worksheets'][0]['chunks']] == [20] * 5
+    assert plan.bytes == 100 * 10 + 6  # Plus the header row
+    plan = plan_write('test', ['A'], n_records=100, chunk_size=15, chunk_bytes=200, record_bytes=10)
+    assert plan.n_chunks == 7
+
+    # Test the duration is projected from the quotas past the burst
+    plan = plan_write('test', ['A'], n_records=100, chunk_size=1, chunk_bytes=None)
+    assert plan.write_requests == 103
+    assert plan.duration == pytest.approx((103 - 10) * 60 / 60)
+    assert plan.projected_duration(write_requests_per_minute=120, burst=3) == pytest.approx(50)
+    assert 'at least 93s of quota' in plan.summary()
+    assert plan.to_dict()['write_requests'] == 103
+
+
+def test_estimate_record_bytes():
+    records = [{'A': 'x' * 10, 'B': None} for _ in range(5_000)]
+    assert estimate_record_bytes(records, ['A', 'B']) == 10 + 3 + 5 + 2
+    assert estimate_record_bytes([], ['A']) is None
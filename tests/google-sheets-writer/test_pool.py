@@ -0,0 +1,31 @@
+import gspread
+import pytest
+
+from google_sheets_writer.fake import FakeSheetsBackend
+from google_sheets_writer.pool import assign_workbooks, make_client
+
+
+def test_assign_workbooks():
+    cells = {1: 100, 2: 100, 3: 100, 4: 50, 5: 10}
+
+    # Test new workbooks are dealt out in turn or to the least loaded client
+    assert assign_workbooks(cells, owners={}, n_clients=2) == {1: 0, 2: 1, 3: 0, 4: 1, 5: 0}
+    assert assign_workbooks(cells, owners={}, n_clients=3, strategy='least_loaded') == {
+        1: 0, 2: 1, 3: 2, 4: 0, 5: 1
+    }
+
+    # Test existing workbooks stay with a client that can open them, and count towards its load
+    assert assign_workbooks(cells, owners={1: 1, 2: 1, 9: 0}, n_clients=2) == {1: 1, 2: 1, 3: 0, 4: 1, 5: 0}
+    assert assign_workbooks(cells, owners={1: 1, 2: 1}, n_clients=2, strategy='least_loaded') == {
+        1: 1, 2: 1, 3: 0, 4: 0, 5: 0
+    }
+
+    with pytest.raises(ValueError):
+        assign_workbooks(cells, owners={}, n_clients=2, strategy='random')
+
+
+def test_make_client():
+    client = FakeSheetsBackend().client()
+    assert make_client(client) is client
+    assert make_client(lambda: client) is client
+    assert isinstance(make_client(FakeSheetsBackend().client), gspread.Client)
@@ -0,0 +1,137 @@
+import asyncio
+import gspread
+import pytest
+import requests
+import time
+
+from email.utils import formatdate
+from google_sheets_writer.rate_limiter import RequestScheduler, TokenBucket, parse_retry_after
+from unittest.mock import Mock, patch
+
+
+@patch('google_sheets_writer.rate_limiter.time.sleep')
+@patch('google_sheets_writer.rate_limiter.time.monotonic')
+def test_token_bucket(mock_monotonic, mock_sleep):
+    mock_monotonic.return_value = 0
+    bucket = TokenBucket(requests_per_minute=60, burst=2)  # 1 request per second
+
+    # Test the burst is available straight away
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    mock_sleep.assert_not_called()
+
+    # Test callers wait once the bucket is empty, and reserve their place in line
+    assert bucket.acquire() == 1
+    assert bucket.acquire() == 2
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [1, 2]
+
+    # Test tokens refill over time, up to the burst size
+    mock_monotonic.return_value = 100
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 1
+
+
+def api_error(status_code, retry_after=None):
+    """
+    Return a gspread APIError for a response with the provided status code and Retry-After header.
+    """
+    response = Mock(status_code=status_code, headers={'Retry-After': retry_after} if retry_after else {})
+    response.json.return_value = {'error': {'code': status_code, 'message': 'error'}}
+    return gspread.exceptions.APIError(response)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('7') == 7
+    assert parse_retry_after('not a date') is None
+    assert 55 < parse_retry_after(formatdate(time.time() + 60, usegmt=True)) <= 60
+
+
+@patch('google_sheets_writer.rate_limiter.random.uniform')
+@patch('google_sheets_writer.rate_limiter.time.sleep')
+def test_request_scheduler(mock_sleep, mock_uniform):
+    mock_uniform.side_effect = lambda low, high: high  # No jitter
+    scheduler = RequestScheduler(max_retries=3, backoff_base=1)
+
+    # Test successful requests are counted by kind
+    assert scheduler.read(lambda: 'read') == 'read'
+    assert scheduler.write(lambda x, y=0: x + y, 1, y=2) == 3
+    metrics = scheduler.metrics()
+    assert metrics['read_requests'] == 1
+    assert metrics['write_requests'] == 1
+    assert metrics['retries'] == 0
+
+    # Test quota and server errors are retried, honoring Retry-After and backing off exponentially
+    scheduler.reset_metrics()
+    func = Mock(side_effect=[api_error(429, retry_after='7'), api_error(503), api_error(500), 'done'])
+    assert scheduler.write(func) == 'done'
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [7, 2, 4]
+    metrics = scheduler.metrics()
+    assert metrics['write_requests'] == 4
+    assert metrics['retries'] == 3
+    assert metrics['backoff_time'] == 13
+
+    # Test dropped connections are retried
+    func = Mock(side_effect=[requests.exceptions.ConnectionError(), 'done'])
+    assert scheduler.read(func) == 'done'
+
+    # Test requests are given up on after max_retries
+    func = Mock(side_effect=api_error(429))
+    with pytest.raises(gspread.exceptions.APIError):
+        scheduler.write(func)
+    assert func.call_count == 4
+
+    # Test other errors are raised straight away
+    func = Mock(side_effect=api_error(400))
+    with pytest.raises(gspread.exceptions.APIError):
+        scheduler.write(func)
+    func = Mock(side_effect=gspread.exceptions.SpreadsheetNotFound)
+    with pytest.raises(gspread.exceptions.SpreadsheetNotFound):
+        scheduler.read(func)
+    assert func.call_count == 1
+
+
+@patch('google_sheets_writer.rate_limiter.asyncio.sleep')
+@patch('google_sheets_writer.rate_limiter.time.sleep')
+def test_request_scheduler_write_once(mock_sleep, mock_async_sleep):
+    scheduler = RequestScheduler(max_retries=3, backoff_base=0)
+
+    # Test requests that aren't safe to repeat are retried on quota errors only
+    func = Mock(side_effect=[api_error(429), 'done'])
+    assert scheduler.write_once(func) == 'done'
+    for error in (api_error(503), requests.exceptions.ConnectionError(), requests.exceptions.Timeout()):
+        func = Mock(side_effect=[error, 'done'])
+        with pytest.raises(type(error)):
+            scheduler.write_once(func)
+        assert func.call_count == 1
+
+    # Test the same goes for asyncio requests
+    func = Mock(side_effect=[api_error(429), 'done', api_error(503), 'done'])
+
+    async def send():
+        return func()
+
+    assert asyncio.run(scheduler.call_async('write', send, retry_ambiguous=False)) == 'done'
+    with pytest.raises(gspread.exceptions.APIError):
+        asyncio.run(scheduler.call_async('write', send, retry_ambiguous=False))
+    assert func.call_count == 3
+
+
+@patch('google_sheets_writer.rate_limiter.time.sleep')
+def test_request_scheduler_on_request(mock_sleep):
+    events = []
+    scheduler = RequestScheduler(max_retries=1, on_request=events.append)
+
+    def batch_update():
+        return 'done'
+
+    # Test an event is emitted for every attempt, named after the function called
+    error = api_error(503)
+    assert scheduler.write(Mock(side_effect=[error, 'done'], __name__='update')) == 'done'
+    assert scheduler.read(batch_update) == 'done'
+    assert [(e['kind'], e['name'], e['attempt'], e['error']) for e in events] == [
+        ('write', 'update', 0, error),
+        ('write', 'update', 1, None),
+        ('read', 'batch_update', 0, None),
+    ]
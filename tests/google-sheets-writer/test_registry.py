@@ -0,0 +1,44 @@
+import time
+
+from google_sheets_writer.registry import WorkbookRegistry
+from unittest.mock import patch
+
+
+def test_registry(tmp_path):
+    path = str(tmp_path / 'registry.json')
+    registry = WorkbookRegistry(path, account='exports')
+    assert registry.get('test_1') is None
+
+    # Test entries are kept across instances, by account
+    registry.record('test_1', 'id-1')
+    registry.record('test_2', 'id-2')
+    assert WorkbookRegistry(path, account='exports').get('test_1') == 'id-1'
+    assert WorkbookRegistry(path, account='other').get('test_1') is None
+    WorkbookRegistry(path, account='other').record('test_1', 'id-9')
+    assert WorkbookRegistry(path, account='exports').get('test_1') == 'id-1'
+
+    # Test entries are due a check once check_interval has passed since they were recorded or checked
+    now = time.time()
+    with patch('google_sheets_writer.registry.time.time') as mock_time:
+        mock_time.return_value = now + 100
+        assert WorkbookRegistry(path, account='exports', check_interval=200).is_check_due('test_1') is False
+        assert WorkbookRegistry(path, account='exports', check_interval=50).is_check_due('test_1') is True
+        registry.mark_checked('test_1')
+        mock_time.return_value += 100
+        assert WorkbookRegistry(path, account='exports', check_interval=200).is_check_due('test_1') is False
+    assert registry.is_check_due('missing') is True
+
+    # Test forgetting entries
+    registry.forget('test_1')
+    registry.forget('missing')
+    assert WorkbookRegistry(path, account='exports').get('test_1') is None
+    assert WorkbookRegistry(path, account='exports').get('test_2') == 'id-2'
+
+
+def test_registry_unreadable(tmp_path):
+    path = tmp_path / 'registry.json'
+    path.write_text('{"exports": {"test_1": ')  # Torn write
+    registry = WorkbookRegistry(str(path), account='exports')
+    assert registry.get('test_1') is None
+    registry.record('test_1', 'id-1')
+    assert WorkbookRegistry(str(path), account='exports').get('test_1') == 'id-1'
@@ -0,0 +1,93 @@
+import threading
+
+from google_sheets_writer.report import RunReport, timed
+from unittest.mock import patch
+
+
+class Timed:
+    """
+    Object with a _report attribute, to test the timed decorator with.
+    """
+    def __init__(self, report=None):
+        self._report = report
+
+    @timed('layout')
+    def layout(self):
+        return self.lookup()
+
+    @timed('lookup')
+    def lookup(self):
+        return 'found'
+
+
+def test_record_request():
+    report = RunReport('test', 'overwrite')
+    report.record_request({'kind': 'read', 'name': 'open', 'attempt': 0, 'error': None})
+    report.record_request({'kind': 'write', 'name': 'update', 'attempt': 0, 'error': ValueError()})
+    report.record_request({'kind': 'write', 'name': 'update', 'attempt': 1, 'error': None})
+    assert report.api_calls == {'open': 1, 'update': 2}
+    assert (report.read_requests, report.write_requests, report.retries, report.errors) == (1, 2, 1, 1)
+
+    report.record_chunk({'records': 10, 'bytes': 100})
+    report.record_chunk({'records': 5, 'bytes': 50})
+    report.count(bytes_sent=25)
+    assert (report.chunks_written, report.records_written, report.bytes_sent) == (2, 15, 175)
+
+
+@patch('google_sheets_writer.report.time.monotonic')
+def test_timer(mock_monotonic):
+    mock_monotonic.side_effect = [0, 2, 10, 13]
+    report = RunReport('test', 'overwrite')
+
+    # Test nested phases are counted as part of the outer phase
+    assert Timed(report).layout() == 'found'
+    assert report.phases['layout'] == 2
+    assert report.phases['lookup'] == 0
+    assert Timed(report).lookup() == 'found'
+    assert report.phases['lookup'] == 3
+
+    # Test nothing is timed without a report
+    assert Timed().layout() == 'found'
+    assert mock_monotonic.call_count == 4
+
+    # Test phases are timed separately on every thread
+    mock_monotonic.side_effect = None
+    mock_monotonic.return_value = 0
+    with report.timer('upload'):
+        thread = threading.Thread(target=Timed(report).lookup)
+        thread.start()
+        thread.join()
+    assert mock_monotonic.call_count == 8  # Both the upload and the lookup on the other thread were timed
+
+
+def test_to_dict():
+    report = RunReport('test', 'sync')
+    report.record_request({'kind': 'read', 'name': 'open', 'attempt': 0, 'error': None})
+    report.finish({'wait_time': 1.5, 'backoff_time': 2.0})
+    report_dict = report.to_dict()
+    assert report_dict['workbook_name'] == 'test'
+    assert report_dict['mode'] == 'sync'
+    assert report_dict['api_calls'] == {'open': 1}
+    assert report_dict['wait_time'] == 1.5
+    assert report_dict['backoff_time'] == 2.0
+    assert set(report_dict['phases']) == {'lookup', 'layout', 'serialize', 'upload', 'cleanup'}
+    assert not any(name.startswith('_') for name in report_dict)
+    assert '1 API calls' in report.summary()
+
+
+def test_merge():
+    report = RunReport('test', 'overwrite')
+    report.record_request({'kind': 'read', 'name': 'fetch_sheet_metadata', 'attempt': 0, 'error': None})
+    other = RunReport('test', 'overwrite')
+    other.record_request({'kind': 'read', 'name': 'fetch_sheet_metadata', 'attempt': 1, 'error': None})
+    other.record_chunk({'records': 10, 'bytes': 500})
+    other.phases['upload'] = 2.0
+    other.wait_time = 1.5
+
+    # Test the calls, counters and phases of another report are added, and the wait time is kept on finish
+    report.merge(other.to_dict())
+    report.finish({'wait_time': 0.5, 'backoff_time': 0.0})
+    assert report.api_calls == {'fetch_sheet_metadata': 2}
+    assert (report.read_requests, report.retries, report.records_written, report.bytes_sent) == (2, 1, 10, 500)
+    assert report.phases['upload'] == 2.0
+    assert report.wait_time == 2.0
@@ -0,0 +1,187 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+import timeit
+
+from google_sheets_writer.serializer import (
+    encode_value,
+    get_headers,
+    infer_schema,
+    number_formats,
+    resolve_schema,
+    serialize_chunk,
+    serialize_records,
+    serialize_value,
+)
+
+
+@pytest.fixture
+def example_records():
+    """
+    Fixture is used to provide example records with missing values for testing.
+    """
+    return [
+        {'Header_1': 'a', 'Header_2': 1, 'Header_3': 1.5},
+        {'Header_1': None, 'Header_2': 2, 'Header_3': np.nan},
+        {'Header_2': 3, 'Header_1': 'c', 'Header_3': 3.0},  # Keys in a different order
+        {'Header_1': 'd', 'Header_2': pd.NA},  # Missing key
+    ]
+
+
+@pytest.fixture
+def benchmark_records():
+    """
+    Fixture is used to provide a realistically sized chunk for benchmarking the serializers.
+    """
+    return [
+        {'id': i, 'name': f'name_{i}', 'score': i / 3 if i % 10 else np.nan, 'flag': i % 2 == 0, 'note': None}
+        for i in range(20_000)
+    ]
+
+
+def legacy_serialize(chunk):
+    """
+    The previous per-chunk conversion, kept to benchmark against.
+    """
+    df = pd.DataFrame(chunk, dtype='string')
+    df = df.fillna(np.nan).replace([np.nan], [None])
+    return df.to_numpy().tolist()
+
+
+def test_get_headers(example_records):
+    assert get_headers(example_records) == ['Header_1', 'Header_2', 'Header_3']
+    assert get_headers(pd.DataFrame(example_records)) == ['Header_1', 'Header_2', 'Header_3']
+    assert get_headers(np.rec.fromrecords([(1, 2.0)], names='a,b')) == ['a', 'b']
+
+
+def test_serialize_value():
+    assert serialize_value('text') == 'text'
+    assert serialize_value(1) == '1'
+    assert serialize_value(1.5) == '1.5'
+    assert serialize_value(True) == 'True'
+    assert serialize_value(None) is None
+    assert serialize_value(np.nan) is None
+    assert serialize_value(pd.NA) is None
+    assert serialize_value(pd.NaT) is None
+
+
+def test_serialize_records(example_records):
+    headers = get_headers(example_records)
+    expected = [
+        ['a', '1', '1.5'],
+        [None, '2', None],
+        ['c', '3', '3.0'],
+        ['d', None, None],
+    ]
+    assert serialize_records(example_records, headers) == expected
+    assert serialize_chunk(example_records, headers) == expected
+
+    # Matches the previous pandas conversion
+    assert serialize_chunk(example_records, headers) == legacy_serialize(example_records)
+
+
+def test_serialize_frame():
+    frame = pd.DataFrame({'a': ['x', None, 'z'], 'b': [1.5, np.nan, 3.0]})
+    assert serialize_chunk(frame, ['a', 'b']) == [['x', '1.5'], [None, None], ['z', '3.0']]
+    assert serialize_chunk(frame, ['b', 'a']) == [['1.5', 'x'], [None, None], ['3.0', 'z']]
+
+    # Test every dtype converts like the same rows as records
+    frame = pd.DataFrame({
+        'int': [1, 2, 3], 'bool': [True, False, True], 'nullable': pd.array([1, None, 3], dtype='Int64'),
+        'datetime': pd.to_datetime(['2020-01-01', None, '2020-01-03']), 'mixed': [1, 'b', None],
+    })
+    headers = list(frame.columns)
+    assert serialize_chunk(frame, headers) == serialize_chunk(frame.to_dict('records'), headers)
+    assert serialize_chunk(frame, headers)[1] == ['2', 'False', None, None, 'b']
+
+    # Test NumPy record arrays
+    records = np.rec.fromrecords([(1, 1.5), (2, np.nan)], names='a,b')
+    assert serialize_chunk(records, ['a', 'b']) == [['1', '1.5'], ['2', None]]
+
+
+def test_infer_schema():
+    headers = ['int', 'float', 'bool', 'date', 'datetime', 'text', 'mixed', 'empty']
+    records = [
+        {'int': 1, 'float': 1.5, 'bool': True, 'date': datetime.date(2020, 1, 1),
+         'datetime': datetime.datetime(2020, 1, 1, 12), 'text': 'a', 'mixed': 1, 'empty': None},
+        {'int': None, 'float': 2, 'bool': False, 'date': None,
+         'datetime': datetime.datetime(2020, 1, 2), 'text': 'b', 'mixed': 'x', 'empty': None},
+    ]
+    expected = ['int', 'float', 'bool', 'date', 'datetime', 'string', 'string', 'string']
+    assert infer_schema(records, headers) == dict(zip(headers, expected))
+
+    # Test DataFrames are typed from their dtypes, object columns from their values
+    frame = pd.DataFrame(records)
+    frame['int'] = frame['int'].astype('Int64')
+    assert infer_schema(frame, headers) == dict(zip(headers, expected))
+
+    # Test tuples and provided schemas
+    assert infer_schema([(1, 'a')], ['a', 'b']) == {'a': 'int', 'b': 'string'}
+    assert resolve_schema({'a': 'int'}, [], ['a', 'b']) == {'a': 'int', 'b': 'string'}
+    assert resolve_schema(None, records, headers) is None
+    with pytest.raises(ValueError):
+        resolve_schema({'a': 'integer'}, [], ['a'])
+
+
+def test_encode_value():
+    assert encode_value(None, 'int') is None
+    assert encode_value(np.nan, 'float') is None
+    assert encode_value(np.int64(3), 'int') == 3 and type(encode_value(np.int64(3), 'int')) is int
+    assert encode_value(2 ** 60, 'int') == str(2 ** 60)  # Too large for a JSON number
+    assert encode_value(float('inf'), 'float') == 'inf'
+    assert encode_value(np.bool_(True), 'bool') is True
+    assert encode_value(datetime.date(1900, 1, 1), 'date') == 2
+    assert encode_value(datetime.datetime(2020, 1, 1, 6), 'datetime') == 43831.25
+    assert encode_value('x', 'int') == 'x'  # Values that don't match their column type stay strings
+    assert encode_value(5, 'string') == '5'
+
+
+def test_serialize_typed():
+    headers = ['a', 'b', 'c', 'd']
+    schema = {'a': 'int', 'b': 'float', 'c': 'bool', 'd': 'datetime'}
+    frame = pd.DataFrame({
+        'a': [1, 2], 'b': [1.5, np.nan], 'c': [True, False], 'd': pd.to_datetime(['2020-01-01', None]),
+    })
+    expected = [[1, 1.5, True, 43831.0], [2, None, False, None]]
+    assert serialize_chunk(frame, headers, schema) == expected
+    assert serialize_chunk(frame.to_dict('records'), headers, schema) == expected
+    assert serialize_chunk(frame.to_records(index=False), headers, schema) == expected
+    assert serialize_chunk([tuple(row) for row in frame.itertuples(index=False)], headers, schema) == expected
+
+    assert number_formats(headers, schema) == {3: {'type': 'DATE_TIME', 'pattern': 'yyyy-mm-dd hh:mm:ss'}}
+    assert number_formats(headers, None) == {}
+
+
+@pytest.mark.benchmark(group='serialize')
+def test_serialize_benchmark_legacy(benchmark, benchmark_records):
+    benchmark(legacy_serialize, benchmark_records)
+
+
+@pytest.mark.benchmark(group='serialize')
+def test_serialize_benchmark_records(benchmark, benchmark_records):
+    headers = get_headers(benchmark_records)
+    result = benchmark(serialize_chunk, benchmark_records, headers)
+    assert result == legacy_serialize(benchmark_records)
+
+
+@pytest.mark.benchmark(group='serialize')
+def test_serialize_benchmark_frame(benchmark, benchmark_records):
+    frame = pd.DataFrame(benchmark_records)
+    headers = get_headers(frame)
+    result = benchmark(serialize_chunk, frame, headers)
+    assert result == serialize_chunk(benchmark_records, headers)
+
+    # Test the column by column conversion beats converting the same rows as records, timed alternately
+    frame_times, records_times = [], []
+    for _ in range(10):
+        frame_times.append(timeit.timeit(lambda: serialize_chunk(frame, headers), number=1))
+        records_times.append(timeit.timeit(lambda: serialize_chunk(benchmark_records, headers), number=1))
+    assert min(frame_times) < min(records_times)
+
+
+@pytest.mark.benchmark(group='serialize')
+def test_serialize_benchmark_typed(benchmark, benchmark_records):
+    frame = pd.DataFrame(benchmark_records)
+    headers = get_headers(frame)
+    benchmark(serialize_chunk, frame, headers, infer_schema(frame, headers))
@@ -0,0 +1,139 @@
+import gspread
+import pytest
+import threading
+import time
+
+from google_sheets_writer.fake import FakeSheetsBackend
+from google_sheets_writer.writer import GoogleSheetsWriter
+
+
+def fast_writer(backend):
+    """
+    Return a writer whose requests are served by the provided backend, without any quota wait.
+    """
+    return GoogleSheetsWriter(
+        client=backend.client(), read_requests_per_minute=60_000, write_requests_per_minute=60_000
+    )
+
+
+def test_session():
+    backend = FakeSheetsBackend()
+    writer = fast_writer(backend)
+    writer.write_to_gsheets([{'A': 'old', 'B': 'old'}] * 20, 'test', max_cells_per_sheet=6, max_cells_per_workbook=12)
+    assert len(backend.spreadsheets) == 4
+
+    # Test rows from several producers roll over worksheets and workbooks and replace the previous run
+    rows = [{'A': f'a_{i}', 'B': str(i)} for i in range(14)]
+    with writer.session('test', max_buffer_rows=3, flush_interval=None, max_cells_per_sheet=6,
+                        max_cells_per_workbook=12) as session:
+        threads = [threading.Thread(target=session.add_rows, args=(rows[i::2],)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    report = session.report
+
+    # 3 rows per worksheet and 2 worksheets per workbook, the last worksheet is trimmed
+    assert sorted(spreadsheet['title'] for spreadsheet in backend.spreadsheets.values()) == [
+        'test_1', 'test_2', 'test_3'
+    ]
+    assert [backend.sheet_titles(f'test_{i}') for i in range(1, 4)] == [['test_1', 'test_2']] * 2 + [['test_1']]
+    written = []
+    for i in range(1, 4):
+        for sheet in backend.spreadsheet_by_title(f'test_{i}')['sheets']:
+            values = backend.sheet_values(f'test_{i}', sheet['properties']['title'])
+            assert values[0] == ['A', 'B']
+            assert len(values) == sheet['properties']['gridProperties']['rowCount']
+            written.extend(values[1:])
+    assert sorted(written) == sorted([row['A'], row['B']] for row in rows)
+    assert report.records_written == len(rows)
+    assert writer.last_report is report
+
+    with pytest.raises(ValueError):
+        session.add_row({'A': 'late', 'B': 'late'})
+
+
+def test_session_flushes_in_background():
+    backend = FakeSheetsBackend()
+    writer = fast_writer(backend)
+
+    # Test buffered rows are flushed once they have waited flush_interval seconds
+    session = writer.session('test', headers=['A', 'B'], flush_interval=0.05)
+    session.add_row(('a', 'b'))
+    deadline = time.monotonic() + 5
+    while session.records_written < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert backend.sheet_values('test_1', 'test_1') == [['A', 'B'], ['a', 'b']]
+
+    # Test the byte threshold and the final flush on close
+    session.flush_interval = None
+    session.max_buffer_bytes = 20
+    session.add_rows([('c', 'd'), ('e', 'f')])
+    session.add_row(('g', 'h'))
+    session.close()
+    assert backend.sheet_values('test_1', 'test_1') == [['A', 'B'], ['a', 'b'], ['c', 'd'], ['e', 'f'], ['g', 'h']]
+    assert backend.spreadsheet_by_title('test_1')['sheets'][0]['properties']['gridProperties']['rowCount'] == 5
+
+    with pytest.raises(ValueError):
+        writer.session('test').add_row(('a', 'b'))
+
+
+def test_session_keeps_flushes_in_order():
+    backend = FakeSheetsBackend()
+    writer = fast_writer(backend)
+
+    # Test a flush that is slow to be queued still lands before the flushes taken after it
+    with writer.session('test', max_buffer_rows=1, flush_interval=None) as session:
+        put = session._flushes.put
+
+        def slow_put(records, *args, **kwargs):
+            if isinstance(records, list) and records[0]['A'] == 'first':
+                time.sleep(0.2)
+            put(records, *args, **kwargs)
+
+        session._flushes.put = slow_put
+        thread = threading.Thread(target=session.add_row, args=({'A': 'first'},))
+        thread.start()
+        time.sleep(0.05)  # The first row has been taken from the buffer and is being queued
+        session.add_row({'A': 'second'})
+        thread.join()
+    assert backend.sheet_values('test_1', 'test_1') == [['A'], ['first'], ['second']]
+
+
+def test_session_owns_writer():
+    backend = FakeSheetsBackend()
+    writer = fast_writer(backend)
+
+    # Test the writer of an open session can't start another write or session, which would share its report
+    session = writer.session('test', headers=['A', 'B'], flush_interval=None)
+    session.add_row(('a', 'b'))
+    with pytest.raises(ValueError, match='busy writing "test"'):
+        writer.write_to_gsheets([{'A': 'x', 'B': 'y'}], 'other')
+    with pytest.raises(ValueError, match='busy writing "test"'):
+        writer.session('other')
+    assert writer.last_report is session.report
+    report = session.close()
+    assert report.records_written == 1
+    assert 'other_1' not in [spreadsheet['title'] for spreadsheet in backend.spreadsheets.values()]
+
+    # Test the writer is free again once the session is closed
+    assert writer.write_to_gsheets([{'A': 'x', 'B': 'y'}], 'other').records_written == 1
+    assert report.records_written == 1
+
+
+def test_session_error():
+    backend = FakeSheetsBackend()
+    writer = fast_writer(backend)
+
+    # Test a failed flush is re-raised to the producer, and no further rows are written
+    session = writer.session('test', max_buffer_rows=1, flush_interval=None)
+    backend.fail_next = [400]
+    session.add_row({'A': 'a'})
+    deadline = time.monotonic() + 5
+    while session._error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with pytest.raises(gspread.exceptions.APIError):
+        session.add_row({'A': 'b'})
+    with pytest.raises(gspread.exceptions.APIError):
+        session.close()
+    assert writer._report is None
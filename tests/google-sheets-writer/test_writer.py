@@ -1,8 +1,30 @@
+import datetime
 import gspread
+import json
+import pandas as pd
+import pytest
+import sqlite3
+import threading
+import time
+
+from functools import partial
+from google_sheets_writer.fake import FakeSheetsBackend, server_client
+from google_sheets_writer.journal import ExportJournal
+from google_sheets_writer.registry import WorkbookRegistry
+from google_sheets_writer.utils.sync_utils import delete_manifests_request
 from google_sheets_writer.writer import GoogleSheetsWriter
 from unittest.mock import Mock, call, patch
 
 
+def mock_worksheet(title):
+    """
+    Return a mock worksheet with the provided title, as listed in a workbook's metadata.
+    """
+    worksheet = Mock()
+    worksheet.title = title
+    return worksheet
+
+
 @patch('google_sheets_writer.writer.gspread')
 def test_writer_init(mock_gspread):
     # Test service account auth_type
@@ -35,7 +57,9 @@ def test_get_last_cell(mock_client):
     )
 
     # Test a worksheet with data
-    mock_client().open().worksheet().col_values.return_value = example_data
+    mock_ws = mock_worksheet('test_worksheet')
+    mock_client().open().worksheets.return_value = [mock_ws]
+    mock_ws.col_values.return_value = example_data
     result = example_writer.get_last_cell(
         workbook_name='test_workbook',
         worksheet_name='test_worksheet',
@@ -43,7 +67,7 @@ def test_get_last_cell(mock_client):
     assert result == 'A4'
 
     # Test a worksheet with no data
-    mock_client().open().worksheet().col_values.return_value = []
+    mock_ws.col_values.return_value = []
     result = example_writer.get_last_cell(
         workbook_name='test_workbook',
         worksheet_name='test_worksheet',
@@ -96,18 +120,22 @@ def test_delete_object():
 
     # Test 2: Delete a worksheet
     with patch('google_sheets_writer.writer.gspread.oauth') as mock_client:
+        mock_ws = mock_worksheet('test_worksheet')
+        mock_client().open.return_value.worksheets.return_value = [mock_ws]
         example_writer = GoogleSheetsWriter(
             user_email='test@test.com',
             auth_type='oauth',
         )
         example_writer.delete_object(workbook_name='test_workbook', worksheet_name='test_worksheet')
         mock_client().open.assert_called_once_with('test_workbook')
-        mock_client().open().del_worksheet.assert_called_once_with(mock_client().open().worksheet('test_worksheet'))
+        mock_client().open().del_worksheet.assert_called_once_with(mock_ws)
+        assert example_writer.check_existence('test_workbook', 'test_worksheet') is False
 
 
 def test_check_existence():
     # Test 1: Check existence of a worksheet
     with patch('google_sheets_writer.writer.gspread.oauth') as mock_client:
+        mock_client().open.return_value.worksheets.return_value = [mock_worksheet('test_worksheet')]
         example_writer = GoogleSheetsWriter(
             user_email='test@test.com',
             auth_type='oauth',
@@ -117,7 +145,7 @@ def test_check_existence():
             worksheet_name='test_worksheet',
         )
         mock_client().open.assert_called_once_with('test_workbook')
-        mock_client().open().worksheet.assert_called_once_with('test_worksheet')
+        mock_client().open().worksheets.assert_called_once_with()
         assert result is True
 
     # Test 2: Check spreadsheet does not exist exception
@@ -139,7 +167,7 @@ def test_check_existence():
             user_email='test@test.com',
             auth_type='oauth',
         )
-        mock_client().open().worksheet.side_effect = gspread.exceptions.WorksheetNotFound
+        mock_client().open().worksheets.return_value = [mock_worksheet('other_worksheet')]
         result = example_writer.check_existence(
             workbook_name='test_workbook',
             worksheet_name='test_worksheet',
@@ -171,55 +199,58 @@ def test_check_existence():
         assert result is False
 
 
-@patch('google_sheets_writer.writer.GoogleSheetsWriter.check_existence')
-def test_cleanup(mock_check_existence):
-    # Test 1: Check that cleanup deletes worksheets
-    with patch('google_sheets_writer.writer.gspread.oauth') as mock_client:
-        example_writer = GoogleSheetsWriter(
-            user_email='test@test.com',
-            auth_type='oauth',
-        )
-        mock_check_existence.side_effect = [True, True, False]  # 2 extra worksheets
-        example_writer.cleanup(
-            max_objects=5,
-            workbook_name='test_workbook',
-            worksheet_name='test_worksheet',
-        )
-        calls = [
-            call(mock_client().open().worksheet('test_worksheet_5')),
-            call(mock_client().open().worksheet('test_worksheet_6'))
-        ]
-        mock_client().open().del_worksheet.assert_has_calls(calls)
+def test_cleanup():
+    backend = FakeSheetsBackend()
+    writer = GoogleSheetsWriter(client=backend.client())
+    for n in (1, 2, 3, 5, 6):  # Leftovers past a gap in the numbering
+        backend.create_spreadsheet(f'test_workbook_{n}')
+    backend.create_spreadsheet('other_workbook_3')
+    spreadsheet_id = backend.create_spreadsheet('test_sheets')
+    backend.batch_update(spreadsheet_id, {'requests': [
+        {'addSheet': {'properties': {'title': f'test_worksheet_{n}'}}} for n in (1, 2, 4, 5)
+    ]})
 
-    # Test 2: Check that cleanup deletes workbooks
-    with patch('google_sheets_writer.writer.gspread.oauth') as mock_client:
-        example_writer = GoogleSheetsWriter(
-            user_email='test@test.com',
-            auth_type='oauth',
-        )
-        mock_check_existence.side_effect = [True, True, False]  # 2 extra workbooks
-        mock_wb_1 = Mock()
-        mock_wb_1.id = 1234
-        mock_wb_2 = Mock()
-        mock_wb_2.id = 5678
-        mock_client().open.side_effect = [mock_wb_1, mock_wb_2]
+    # Test 1: Check that cleanup deletes worksheets in a single batchUpdate
+    backend.reset_metrics()
+    writer.cleanup(max_objects=2, workbook_name='test_sheets', worksheet_name='test_worksheet')
+    assert backend.sheet_titles('test_sheets') == ['Sheet1', 'test_worksheet_1']
+    assert backend.metrics()['write_requests'] == 1
 
-        example_writer.cleanup(
-            max_objects=5,
-            workbook_name='test_workbook',
-        )
+    # Test 2: Check that cleanup deletes every stale workbook from a single query for the workbook's partitions
+    assert sorted(file['name'] for file in writer.list_workbooks(prefix='test_workbook')) == [
+        f'test_workbook_{n}' for n in (1, 2, 3, 5, 6)
+    ]
+    backend.reset_metrics()
+    writer.cleanup(max_objects=2, workbook_name='test_workbook', max_workers=2)
+    titles = sorted(spreadsheet['title'] for spreadsheet in backend.spreadsheets.values())
+    assert titles == ['other_workbook_3', 'test_sheets', 'test_workbook_1']
+    assert backend.metrics()['read_requests'] == 1
+    assert backend.metrics()['write_requests'] == 4  # One Drive delete per workbook
+
+    # Test 3: Check that nothing is deleted when there are no leftovers
+    backend.reset_metrics()
+    writer.cleanup(max_objects=2, workbook_name='test_workbook')
+    writer.cleanup(max_objects=1, workbook_name='missing_workbook', worksheet_name='test_worksheet')
+    assert backend.metrics()['write_requests'] == 0
 
-        calls = [
-            call(file_id=1234),
-            call(file_id=5678)
-        ]
-        mock_client().del_spreadsheet.assert_has_calls(calls)
 
+def mock_layout_response(*titles):
+    """
+    Return a batchUpdate response listing sheets with the provided titles, as returned by apply_layout.
+    """
+    return {
+        'updatedSpreadsheet': {
+            'sheets': [{'properties': {'title': title, 'sheetId': i}} for i, title in enumerate(titles)]
+        }
+    }
 
+
+@patch('google_sheets_writer.writer.gspread.Worksheet')
 @patch('google_sheets_writer.writer.GoogleSheetsWriter.cleanup')
 @patch('google_sheets_writer.writer.GoogleSheetsWriter.get_last_cell')
 @patch('google_sheets_writer.writer.GoogleSheetsWriter.check_existence')
-def test_write_to_gsheets(mock_check_existence, mock_get_last_cell, mock_cleanup):
+def test_write_to_gsheets(mock_check_existence, mock_get_last_cell, mock_cleanup, mock_worksheet_cls):
+    # The next row is tracked locally, so get_last_cell is never needed when overwriting
     example_data = [
         {'Header_1': 'test_data_1', 'Header_2': 'test_data_1'},
         {'Header_1': 'test_data_2', 'Header_2': 'test_data_2'},
@@ -228,15 +259,23 @@ def test_write_to_gsheets(mock_check_existence, mock_get_last_cell, mock_cleanup
         {'Header_1': 'test_data_5', 'Header_2': 'test_data_5'},
     ]
 
-    # Normal test run (1 workbook, 1 worksheet)
+    # Normal test run (1 workbook, 1 existing worksheet)
     with patch('google_sheets_writer.writer.gspread.oauth') as mock_client:
-        # mock_check_existence.side_effect = [True, True, True]
-        mock_get_last_cell.return_value = 'A2'
-        mock_check_existence.side_effect = [False, True, True, True]
+        mock_get_last_cell.side_effect = AssertionError('get_last_cell should not be called')
+        mock_check_existence.return_value = False
         mock_cleanup.return_value = None
+        mock_ws = Mock()
+        mock_worksheet_cls.return_value = mock_ws
+        mock_existing_ws = mock_worksheet('test_workbook_1')
+        mock_existing_ws.id = 11
+        mock_sheet1 = mock_worksheet('Sheet1')
+        mock_sheet1.id = 0
+        mock_stale_ws = mock_worksheet('test_workbook_4')  # Left over from a previous run
+        mock_stale_ws.id = 44
         mock_wb_1 = Mock()
-        mock_wb_1.worksheet.return_value = Mock()
-        mock_client().open.side_effect = mock_wb_1
+        mock_wb_1.worksheets.return_value = [mock_existing_ws, mock_sheet1, mock_stale_ws]
+        mock_wb_1.batch_update.return_value = mock_layout_response('test_workbook_1')
+        mock_client().create.return_value = mock_wb_1
 
         example_writer = GoogleSheetsWriter(
             user_email='test@test.com',
@@ -246,30 +285,53 @@ def test_write_to_gsheets(mock_check_existence, mock_get_last_cell, mock_cleanup
             data_lod=example_data,
             workbook_name='test_workbook',
         )
-        calls = [
-            call('A1', [['Header_1', 'Header_2']]),
-            call(
-                'A2',
-                [
-                    ['test_data_1', 'test_data_1'],
-                    ['test_data_2', 'test_data_2'],
-                    ['test_data_3', 'test_data_3'],
-                    ['test_data_4', 'test_data_4'],
-                    ['test_data_5', 'test_data_5'],
-                ]
-            )
-        ]
-        mock_client().open().worksheet().update.assert_has_calls(calls)
 
-    # Test chunk sizes (chunk size of 2)
+        # Layout is applied with a single batchUpdate
+        mock_wb_1.batch_update.assert_called_once_with({
+            'requests': [
+                {'updateCells': {'range': {'sheetId': 11}, 'fields': 'userEnteredValue'}},
+                {
+                    'updateSheetProperties': {
+                        'properties': {'sheetId': 11, 'gridProperties': {'rowCount': 6, 'columnCount': 2}},
+                        'fields': 'gridProperties(rowCount,columnCount)',
+                    }
+                },
+                {'deleteSheet': {'sheetId': 0}},
+                {'deleteSheet': {'sheetId': 44}},
+                delete_manifests_request(),  # The data no longer matches the manifests of a previous sync
+            ],
+            'includeSpreadsheetInResponse': True,
+            'responseIncludeGridData': False,
+        })
+
+        # Headers are folded into the first data write
+        mock_ws.update.assert_called_once_with(
+            'A1',
+            [
+                ['Header_1', 'Header_2'],
+                ['test_data_1', 'test_data_1'],
+                ['test_data_2', 'test_data_2'],
+                ['test_data_3', 'test_data_3'],
+                ['test_data_4', 'test_data_4'],
+                ['test_data_5', 'test_data_5'],
+            ]
+        )
+        mock_wb_1.worksheets.assert_called_once_with()  # Worksheet metadata is only fetched once
+        mock_client().open.assert_not_called()  # The created workbook is cached
+
+    # Test chunk sizes (chunk size of 2, new worksheet)
     with patch('google_sheets_writer.writer.gspread.oauth') as mock_client:
-        # mock_check_existence.side_effect = [True, True, True]
-        mock_get_last_cell.side_effect = ['A2', 'A4', 'A6']
-        mock_check_existence.side_effect = [False, False, True, True]
+        mock_get_last_cell.side_effect = AssertionError('get_last_cell should not be called')
+        mock_check_existence.return_value = False
         mock_cleanup.return_value = None
+        mock_ws = Mock()
+        mock_worksheet_cls.return_value = mock_ws
+        mock_sheet1 = mock_worksheet('Sheet1')
+        mock_sheet1.id = 0
         mock_wb_1 = Mock()
-        mock_wb_1.worksheet.return_value = Mock()
-        mock_client().open.side_effect = mock_wb_1
+        mock_wb_1.worksheets.return_value = [mock_sheet1]
+        mock_wb_1.batch_update.return_value = mock_layout_response('test_workbook_1')
+        mock_client().create.return_value = mock_wb_1
 
         example_writer = GoogleSheetsWriter(
             user_email='test@test.com',
@@ -280,11 +342,23 @@ def test_write_to_gsheets(mock_check_existence, mock_get_last_cell, mock_cleanup
             workbook_name='test_workbook',
             chunk_size=2,
         )
+        assert mock_wb_1.batch_update.call_args[0][0]['requests'] == [
+            {
+                'addSheet': {
+                    'properties': {
+                        'title': 'test_workbook_1',
+                        'gridProperties': {'rowCount': 6, 'columnCount': 2},
+                    }
+                }
+            },
+            {'deleteSheet': {'sheetId': 0}},
+            delete_manifests_request(),
+        ]
         calls = [
-            call('A1', [['Header_1', 'Header_2']]),
             call(
-                'A2',
+                'A1',
                 [
+                    ['Header_1', 'Header_2'],
                     ['test_data_1', 'test_data_1'],
                     ['test_data_2', 'test_data_2'],
                 ]
@@ -303,4 +377,848 @@ def test_write_to_gsheets(mock_check_existence, mock_get_last_cell, mock_cleanup
                 ]
             )
         ]
-        mock_client().open().worksheet().update.assert_has_calls(calls)
\ No newline at end of file
+        mock_ws.update.assert_has_calls(calls)
+        mock_cleanup.assert_called_with(workbook_name='test_workbook', max_objects=2)
+
+
+@patch('google_sheets_writer.writer.time.monotonic')
+@patch('google_sheets_writer.writer.gspread.oauth')
+def test_cache(mock_client, mock_monotonic):
+    mock_monotonic.return_value = 0
+    mock_wb = mock_client().open.return_value
+    mock_wb.worksheets.return_value = [mock_worksheet('test_worksheet')]
+    example_writer = GoogleSheetsWriter(
+        user_email='test@test.com',
+        auth_type='oauth',
+        cache_ttl=60,
+    )
+
+    # Test repeated lookups are served from cache
+    for _ in range(3):
+        assert example_writer.check_existence('test_workbook', 'test_worksheet') is True
+        assert example_writer.check_existence('test_workbook', 'missing_worksheet') is False
+    mock_client().open.assert_called_once_with('test_workbook')
+    mock_wb.worksheets.assert_called_once_with()
+    assert example_writer.scheduler.metrics()['read_requests'] == 2  # Every request goes through the scheduler
+
+    # Test workbooks and worksheets created by the writer are added to the cache
+    mock_new_ws = mock_worksheet('new_worksheet')
+    mock_wb.add_worksheet.return_value = mock_new_ws
+    example_writer.create_worksheet('test_workbook', 'new_worksheet', num_rows=10, num_cols=2)
+    assert example_writer.open_worksheet('test_workbook', 'new_worksheet') is mock_new_ws
+    mock_wb.worksheets.assert_called_once_with()
+
+    # Test explicit invalidation refetches the workbook
+    example_writer.invalidate_cache('test_workbook')
+    example_writer.check_existence('test_workbook', 'test_worksheet')
+    assert mock_client().open.call_count == 2
+
+    # Test expired entries are refetched
+    mock_monotonic.return_value = 61
+    example_writer.check_existence('test_workbook', 'test_worksheet')
+    assert mock_client().open.call_count == 3
+    assert mock_wb.worksheets.call_count == 3
+
+
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.cleanup')
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.apply_layout')
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.check_existence')
+@patch('google_sheets_writer.writer.gspread.oauth')
+def test_write_to_gsheets_stream(mock_client, mock_check_existence, mock_apply_layout, mock_cleanup):
+    mock_check_existence.return_value = True
+    worksheets = {}  # (workbook, worksheet) -> mock worksheet
+
+    def apply_layout(workbook_name, desired_sheets, prefix, clear=True):
+        return {name: worksheets.setdefault((workbook_name, name), Mock()) for name in desired_sheets}
+
+    mock_apply_layout.side_effect = apply_layout
+    pulled = []
+
+    def generate_records():
+        for i in range(1, 6):
+            pulled.append(i)
+            yield (f'a_{i}', f'b_{i}')
+
+    example_writer = GoogleSheetsWriter(
+        user_email='test@test.com',
+        auth_type='oauth',
+    )
+    example_writer.write_to_gsheets(
+        data_lod=generate_records(),
+        workbook_name='test',
+        headers=['A', 'B'],
+        chunk_size=1,
+        max_cells_per_sheet=4,  # 2 records per worksheet
+        max_cells_per_workbook=8,  # 2 worksheets per workbook
+    )
+
+    # Workbooks are laid out at full size, and the last one is trimmed to the records written
+    assert mock_apply_layout.call_args_list == [
+        call('test_1', {'test_1': (3, 2), 'test_2': (3, 2)}, prefix='test'),
+        call('test_2', {'test_1': (3, 2), 'test_2': (3, 2)}, prefix='test'),
+        call('test_2', {'test_1': (2, 2)}, prefix='test', clear=False),
+    ]
+    assert worksheets[('test_1', 'test_1')].update.call_args_list == [
+        call('A1', [['A', 'B'], ['a_1', 'b_1']]),
+        call('A3', [['a_2', 'b_2']]),
+    ]
+    assert worksheets[('test_1', 'test_2')].update.call_args_list == [
+        call('A1', [['A', 'B'], ['a_3', 'b_3']]),
+        call('A3', [['a_4', 'b_4']]),
+    ]
+    assert worksheets[('test_2', 'test_1')].update.call_args_list == [
+        call('A1', [['A', 'B'], ['a_5', 'b_5']]),
+    ]
+    worksheets[('test_2', 'test_2')].update.assert_not_called()
+    mock_cleanup.assert_called_once_with(workbook_name='test', max_objects=3)
+
+    # Records are pulled lazily, one chunk at a time
+    pulled.clear()
+    mock_apply_layout.reset_mock()
+    records = generate_records()
+    mock_apply_layout.side_effect = lambda *args, **kwargs: (
+        pulled.append('layout'), apply_layout(*args, **kwargs)
+    )[1]
+    example_writer.write_to_gsheets(
+        data_lod=records,
+        workbook_name='test',
+        headers=['A', 'B'],
+        chunk_size=1,
+        max_cells_per_sheet=4,
+        max_cells_per_workbook=8,
+    )
+    assert pulled == [1, 'layout', 2, 3, 4, 5, 'layout', 'layout']
+
+
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.cleanup')
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.apply_layout')
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.check_existence')
+@patch('google_sheets_writer.writer.gspread.oauth')
+def test_write_to_gsheets_parallel(mock_client, mock_check_existence, mock_apply_layout, mock_cleanup):
+    mock_check_existence.return_value = True
+    worksheets = {}  # (workbook, worksheet) -> mock worksheet
+    threads = set()
+
+    def update(*args):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.05)  # Keep workers busy long enough to overlap
+
+    def apply_layout(workbook_name, desired_sheets, prefix, clear=True):
+        return {
+            name: worksheets.setdefault((workbook_name, name), Mock(update=Mock(side_effect=update)))
+            for name in desired_sheets
+        }
+
+    mock_apply_layout.side_effect = apply_layout
+    example_data = [{'A': f'a_{i}', 'B': f'b_{i}'} for i in range(1, 8)]
+
+    example_writer = GoogleSheetsWriter(
+        user_email='test@test.com',
+        auth_type='oauth',
+    )
+    example_writer.write_to_gsheets(
+        data_lod=example_data,
+        workbook_name='test',
+        max_cells_per_sheet=4,  # 2 records per worksheet
+        max_cells_per_workbook=8,  # 2 worksheets per workbook
+        max_workers=4,
+    )
+
+    # Deterministic naming is preserved and every worksheet gets its own row range
+    assert sorted(worksheets) == [
+        ('test_1', 'test_1'), ('test_1', 'test_2'), ('test_2', 'test_1'), ('test_2', 'test_2')
+    ]
+    worksheets[('test_1', 'test_1')].update.assert_called_once_with('A1', [['A', 'B'], ['a_1', 'b_1'], ['a_2', 'b_2']])
+    worksheets[('test_1', 'test_2')].update.assert_called_once_with('A1', [['A', 'B'], ['a_3', 'b_3'], ['a_4', 'b_4']])
+    worksheets[('test_2', 'test_1')].update.assert_called_once_with('A1', [['A', 'B'], ['a_5', 'b_5'], ['a_6', 'b_6']])
+    worksheets[('test_2', 'test_2')].update.assert_called_once_with('A1', [['A', 'B'], ['a_7', 'b_7']])
+    mock_cleanup.assert_called_once_with(workbook_name='test', max_objects=3)
+    assert len(threads) > 1
+
+    # Errors in a worker are raised
+    worksheets[('test_2', 'test_1')].update.side_effect = ValueError('upload failed')
+    with pytest.raises(ValueError, match='upload failed'):
+        example_writer.write_to_gsheets(
+            data_lod=example_data,
+            workbook_name='test',
+            max_cells_per_sheet=4,
+            max_cells_per_workbook=8,
+            max_workers=4,
+        )
+
+
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.cleanup')
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.apply_layout')
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.check_existence')
+@patch('google_sheets_writer.writer.gspread.oauth')
+def test_write_to_gsheets_sync(mock_client, mock_check_existence, mock_apply_layout, mock_cleanup, tmp_path):
+    mock_check_existence.return_value = True
+    mock_wb = mock_client().open.return_value
+    mock_ws = mock_worksheet('test_1')
+    mock_ws.id = 7
+    mock_wb.worksheets.return_value = [mock_worksheet('Sheet1')]  # A new workbook
+    mock_apply_layout.side_effect = lambda workbook_name, desired_sheets, prefix, clear=True: {'test_1': mock_ws}
+    manifest_path = str(tmp_path / 'manifests.json')
+    example_data = [{'A': f'a_{i}', 'B': f'b_{i}'} for i in range(1, 6)]
+
+    def sync(data, **kwargs):
+        mock_ws.reset_mock()
+        mock_wb.batch_update.reset_mock()
+        mock_apply_layout.reset_mock()
+        example_writer = GoogleSheetsWriter(user_email='test@test.com', auth_type='oauth')
+        example_writer.write_to_gsheets(
+            data_lod=data,
+            workbook_name='test',
+            mode='sync',
+            block_size=2,
+            manifest_path=manifest_path,
+            **kwargs
+        )
+
+    # Test the first sync writes everything and stores the manifest
+    sync(example_data)
+    mock_apply_layout.assert_called_once_with(workbook_name='test_1', desired_sheets={'test_1': (6, 2)}, prefix='test')
+    mock_ws.update.assert_called_once()
+    mock_wb.batch_update.assert_not_called()
+    mock_wb.worksheets.return_value = [mock_ws]
+
+    # Test an unchanged dataset sends no write requests
+    sync(example_data)
+    mock_ws.update.assert_not_called()
+    mock_wb.batch_update.assert_not_called()
+
+    # Test only the changed block is rewritten, in one batchUpdate
+    example_data[2] = {'A': 'changed', 'B': 'b_3'}
+    sync(example_data)
+    mock_ws.update.assert_not_called()
+    mock_apply_layout.assert_not_called()
+    mock_wb.batch_update.assert_called_once_with({'requests': [
+        {
+            'updateSheetProperties': {
+                'properties': {'sheetId': 7, 'gridProperties': {'rowCount': 6, 'columnCount': 2}},
+                'fields': 'gridProperties(rowCount,columnCount)',
+            }
+        },
+        {
+            'updateCells': {
+                'rows': [
+                    {'values': [
+                        {'userEnteredValue': {'stringValue': 'changed'}},
+                        {'userEnteredValue': {'stringValue': 'b_3'}},
+                    ]},
+                    {'values': [
+                        {'userEnteredValue': {'stringValue': 'a_4'}},
+                        {'userEnteredValue': {'stringValue': 'b_4'}},
+                    ]},
+                ],
+                'start': {'sheetId': 7, 'rowIndex': 3, 'columnIndex': 0},
+                'fields': 'userEnteredValue',
+            }
+        },
+    ]})
+
+    # Test growth resizes the worksheet and writes the partial and new blocks
+    sync(example_data + [{'A': 'a_6', 'B': 'b_6'}, {'A': 'a_7', 'B': 'b_7'}])
+    requests = mock_wb.batch_update.call_args[0][0]['requests']
+    assert requests[0]['updateSheetProperties']['properties']['gridProperties'] == {'rowCount': 8, 'columnCount': 2}
+    assert [request['updateCells']['start']['rowIndex'] for request in requests[1:]] == [5, 7]
+
+    # Test shrinkage only resizes the worksheet
+    sync(example_data)
+    requests = mock_wb.batch_update.call_args[0][0]['requests']
+    assert requests[0]['updateSheetProperties']['properties']['gridProperties'] == {'rowCount': 6, 'columnCount': 2}
+    assert [request['updateCells']['start']['rowIndex'] for request in requests[1:]] == [5]
+
+    # Test changed headers fall back to a full rewrite
+    sync([{'A': record['A'], 'C': record['B']} for record in example_data])
+    mock_apply_layout.assert_called_once()
+    mock_ws.update.assert_called_once()
+    mock_wb.batch_update.assert_not_called()
+
+    # Test streams can't be synced
+    with pytest.raises(ValueError):
+        sync(iter(example_data))
+
+
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.cleanup')
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.create_workbook')
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.apply_layout')
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.check_existence')
+@patch('google_sheets_writer.writer.gspread.oauth')
+def test_write_to_gsheets_append(
+    mock_client, mock_check_existence, mock_apply_layout, mock_create_workbook, mock_cleanup
+):
+    # An existing dataset of 3 records: "test_1" holds "test_1" (full) and "test_2" (1 record)
+    workbooks = {'test_1'}
+    mock_check_existence.side_effect = lambda workbook_name: workbook_name in workbooks
+    mock_create_workbook.side_effect = workbooks.add
+    mock_tail_ws = mock_worksheet('test_2')
+    mock_tail_ws.row_count, mock_tail_ws.col_count = 2, 2
+    mock_full_ws = mock_worksheet('test_1')
+    mock_full_ws.row_count, mock_full_ws.col_count = 3, 2
+    mock_wbs = {
+        'test_1': Mock(worksheets=Mock(return_value=[mock_full_ws, mock_tail_ws])),
+        'test_2': Mock(worksheets=Mock(return_value=[mock_worksheet('Sheet1')])),
+    }
+    mock_client().open.side_effect = mock_wbs.get
+    worksheets = {}  # (workbook, worksheet) -> mock worksheet
+
+    def apply_layout(workbook_name, desired_sheets, prefix, clear=True):
+        return {name: worksheets.setdefault((workbook_name, name), Mock()) for name in desired_sheets}
+
+    mock_apply_layout.side_effect = apply_layout
+    example_writer = GoogleSheetsWriter(
+        user_email='test@test.com',
+        auth_type='oauth',
+    )
+    example_writer.write_to_gsheets(
+        data_lod=[{'A': f'a_{i}', 'B': f'b_{i}'} for i in range(4, 8)],
+        workbook_name='test',
+        mode='append',
+        max_cells_per_sheet=4,  # 2 records per worksheet
+        max_cells_per_workbook=8,  # 2 worksheets per workbook
+    )
+
+    # The tail worksheet is grown and filled, then a new workbook is started
+    assert mock_apply_layout.call_args_list == [
+        call('test_1', {'test_1': (3, 2), 'test_2': (3, 2)}, prefix='test', clear=False),
+        call('test_2', {'test_1': (3, 2), 'test_2': (2, 2)}, prefix='test', clear=False),
+    ]
+    mock_wbs['test_1'].worksheets.assert_called_once_with()  # The tail is found from cached metadata
+    worksheets[('test_1', 'test_1')].update.assert_not_called()
+    worksheets[('test_1', 'test_2')].update.assert_called_once_with('A3', [['a_4', 'b_4']])
+    worksheets[('test_2', 'test_1')].update.assert_called_once_with('A1', [['A', 'B'], ['a_5', 'b_5'], ['a_6', 'b_6']])
+    worksheets[('test_2', 'test_2')].update.assert_called_once_with('A1', [['A', 'B'], ['a_7', 'b_7']])
+    mock_create_workbook.assert_called_once_with('test_2')
+    mock_cleanup.assert_not_called()  # Nothing is ever deleted when appending
+
+    # Test the tail is found from the worksheet sizes
+    workbooks.discard('test_2')
+    mock_tail_ws.row_count = 3
+    example_writer.invalidate_cache()
+    assert example_writer.find_tail('test') == (1, 2, 2)
+    assert example_writer.find_tail('other') == (0, 0, 0)
+
+
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.cleanup')
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.apply_layout')
+@patch('google_sheets_writer.writer.GoogleSheetsWriter.check_existence')
+@patch('google_sheets_writer.writer.gspread.oauth')
+def test_write_to_gsheets_resume(mock_client, mock_check_existence, mock_apply_layout, mock_cleanup, tmp_path):
+    mock_check_existence.return_value = True
+    worksheets = {}  # (workbook, worksheet) -> mock worksheet
+
+    def apply_layout(workbook_name, desired_sheets, prefix, clear=True):
+        return {name: worksheets.setdefault((workbook_name, name), mock_worksheet(name)) for name in desired_sheets}
+
+    mock_apply_layout.side_effect = apply_layout
+    mock_client().open.side_effect = lambda name: Mock(worksheets=Mock(
+        return_value=[ws for (workbook, _), ws in worksheets.items() if workbook == name]
+    ))
+    journal_path = str(tmp_path / 'export.journal')
+    example_data = [{'A': f'a_{i}', 'B': f'b_{i}'} for i in range(1, 8)]
+
+    def export(**kwargs):
+        example_writer = GoogleSheetsWriter(user_email='test@test.com', auth_type='oauth')
+        example_writer.write_to_gsheets(
+            data_lod=example_data,
+            workbook_name='test',
+            chunk_size=1,
+            max_cells_per_sheet=6,  # 3 records per worksheet
+            max_cells_per_workbook=12,  # 2 worksheets per workbook
+            journal_path=journal_path,
+            **kwargs
+        )
+
+    # Test a run that dies in the middle of the second worksheet
+    uploads = []
+
+    def update(cell, values):
+        if len(uploads) == 5:
+            raise ConnectionError('connection lost')
+        uploads.append(values)
+
+    for name in ('test_1', 'test_2'):
+        apply_layout('test_1', {name: None}, prefix='test')[name].update.side_effect = update
+    with pytest.raises(ConnectionError):
+        export(chunk_bytes=None)
+    assert uploads[-1] == [['a_5', 'b_5']]
+    assert mock_apply_layout.call_count == 2  # Every workbook is laid out before writing starts
+
+    # Test resuming skips the layouts and chunks that were done
+    mock_apply_layout.reset_mock()
+    for ws in worksheets.values():
+        ws.update.reset_mock()
+        ws.update.side_effect = None
+    export(chunk_bytes=None, resume=True)
+    mock_apply_layout.assert_not_called()
+    worksheets[('test_1', 'test_1')].update.assert_not_called()
+    worksheets[('test_1', 'test_2')].update.assert_called_once_with('A4', [['a_6', 'b_6']])
+    worksheets[('test_2', 'test_1')].update.assert_called_once_with('A1', [['A', 'B'], ['a_7', 'b_7']])
+
+    # Test resuming a journal of another export starts over
+    mock_apply_layout.reset_mock()
+    example_data.append({'A': 'a_8', 'B': 'b_8'})
+    export(chunk_bytes=None, resume=True)
+    assert mock_apply_layout.call_count == 2
+    assert worksheets[('test_1', 'test_1')].update.call_count == 3
+
+
+def test_write_to_gsheets_journal_closed_on_failure(tmp_path):
+    backend = FakeSheetsBackend()
+    journal_path = str(tmp_path / 'export.journal')
+    journals = []
+    chunks = []
+
+    def open_journal(path):
+        journals.append(ExportJournal(path))
+        return journals[-1]
+
+    def fail_after_first_chunk(event):
+        chunks.append(event)
+        if len(chunks) == 1:
+            backend.fail_next = [400]
+
+    writer = GoogleSheetsWriter(client=backend.client(), on_chunk_written=fail_after_first_chunk)
+    example_data = [{'A': f'a_{i}', 'B': f'b_{i}'} for i in range(1, 8)]
+
+    # Test a failed export syncs and closes its journal, with the chunk uploaded before the failure
+    with patch('google_sheets_writer.writer.ExportJournal', side_effect=open_journal):
+        with pytest.raises(gspread.exceptions.APIError):
+            writer.write_to_gsheets(example_data, 'test', chunk_size=2, chunk_bytes=None, journal_path=journal_path)
+    assert journals[0]._file is None
+    with open(journal_path) as file:
+        events = [json.loads(line)['event'] for line in file]
+    assert events == ['plan', 'layout', 'chunk']
+
+    # Test the journal can be resumed from, skipping the chunk it recorded
+    report = writer.write_to_gsheets(
+        example_data, 'test', chunk_size=2, chunk_bytes=None, journal_path=journal_path, resume=True
+    )
+    assert report.records_written == 5
+    assert backend.sheet_values('test_1', 'test_1') == [['A', 'B']] + [[r['A'], r['B']] for r in example_data]
+
+
+def test_write_to_gsheets_report():
+    backend = FakeSheetsBackend()
+    requests, chunks = [], []
+    writer = GoogleSheetsWriter(
+        client=backend.client(),
+        read_requests_per_minute=60_000,
+        write_requests_per_minute=60_000,
+        max_retries=1,
+        on_request=requests.append,
+        on_chunk_written=chunks.append,
+    )
+    writer.scheduler.backoff_base = 0
+    example_data = [{'A': f'a_{i}', 'B': f'b_{i}'} for i in range(1, 8)]
+
+    # Test the report counts every API call, retry and chunk of the write
+    backend.fail_next = [503]
+    report = writer.write_to_gsheets(example_data, 'test', chunk_size=2, chunk_bytes=None, max_cells_per_sheet=8)
+    assert report is writer.last_report
+    assert sum(report.api_calls.values()) == len(requests)
+    assert report.read_requests + report.write_requests == len(requests)
+    assert report.api_calls['upload'] == 4
+    assert report.retries == 1
+    assert report.errors == 2  # The 503, and the lookup of the workbook before it is created
+    assert report.api_calls['list_workbooks'] == 1  # Stale workbooks are found with a single Drive query
+    assert (report.records_written, report.chunks_written) == (7, 4)
+    assert report.bytes_sent == sum(chunk['bytes'] for chunk in chunks) > 0
+    assert set(report.phases) == {'lookup', 'layout', 'serialize', 'upload', 'cleanup'}
+    assert report.phases['upload'] > 0 and report.phases['layout'] > 0
+    assert report.duration >= sum(report.phases.values()) - report.phases['serialize']
+
+    # Test the hook is called with every chunk uploaded
+    assert [(c['workbook'], c['worksheet'], c['start_row'], c['records']) for c in chunks] == [
+        ('test_1', 'test_1', 1, 2),
+        ('test_1', 'test_1', 4, 2),
+        ('test_1', 'test_2', 1, 2),
+        ('test_1', 'test_2', 4, 1),
+    ]
+
+    # Test a failed write keeps its report
+    backend.fail_next = [400]
+    with pytest.raises(gspread.exceptions.APIError):
+        writer.write_to_gsheets(example_data, 'test', chunk_size=2)
+    assert writer.last_report is not report
+    assert writer.last_report.errors >= 1
+    assert writer._report is None
+
+
+def test_write_to_gsheets_oversized_payload():
+    backend = FakeSheetsBackend(max_request_bytes=50_000)
+    writer = GoogleSheetsWriter(
+        client=backend.client(), read_requests_per_minute=60_000, write_requests_per_minute=60_000
+    )
+    example_data = [{'A': f'a_{i}', 'B': 'b' * 500} for i in range(2000)]
+
+    # Test chunks rejected as too large are split in half until they fit, in place of failing the export
+    report = writer.write_to_gsheets(example_data, 'test', chunk_bytes=200_000)
+    assert report.records_written == 2000
+    assert report.errors > 0 and report.retries == 0  # A 413 isn't retried as is
+    assert backend.sheet_values('test_1', 'test_1') == [['A', 'B']] + [[r['A'], r['B']] for r in example_data]
+
+    # Test a single row that is still too large fails the export
+    with pytest.raises(gspread.exceptions.APIError):
+        writer.write_to_gsheets([{'A': 'a' * 60_000}], 'too_large')
+
+
+def test_write_to_gsheets_dry_run():
+    backend = FakeSheetsBackend()
+    writer = GoogleSheetsWriter(
+        client=backend.client(), read_requests_per_minute=6_000, write_requests_per_minute=6_000
+    )
+    example_data = [{'A': f'a_{i}', 'B': f'b_{i}'} for i in range(1, 8)]
+    kwargs = dict(chunk_size=2, chunk_bytes=None, max_cells_per_sheet=8, max_cells_per_workbook=8)
+
+    # Test a dry run returns the plan without touching the API
+    plan = writer.write_to_gsheets(example_data, 'test', dry_run=True, **kwargs)
+    assert backend.requests == []
+    assert [wb['name'] for wb in plan.workbooks] == ['test_1', 'test_2']
+    assert plan.record_bytes > 0
+    assert plan.duration == 0  # Well within the burst at these quotas
+
+    # Test the plan matches the write
+    report = writer.write_to_gsheets(example_data, 'test', **kwargs)
+    assert (report.read_requests, report.write_requests) == (plan.read_requests, plan.write_requests)
+    assert report.chunks_written == plan.n_chunks
+    assert [backend.sheet_titles(wb['name']) for wb in plan.workbooks] == [
+        [ws['name'] for ws in wb['worksheets']] for wb in plan.workbooks
+    ]
+
+    with pytest.raises(ValueError):
+        writer.write_to_gsheets(example_data, 'test', mode='append', dry_run=True)
+    with pytest.raises(ValueError):
+        writer.write_to_gsheets(iter(example_data), 'test', dry_run=True)
+
+
+def test_write_to_gsheets_schema():
+    backend = FakeSheetsBackend()
+    writer = GoogleSheetsWriter(
+        client=backend.client(), read_requests_per_minute=6_000, write_requests_per_minute=6_000
+    )
+    example_data = [
+        {'id': i, 'price': i / 2, 'paid': i % 2 == 0, 'day': datetime.date(2020, 1, i), 'name': f'n_{i}'}
+        for i in range(1, 6)
+    ]
+    date_format = {3: {'type': 'DATE', 'pattern': 'yyyy-mm-dd'}}
+
+    # Test values are written with their types and date columns get a number format
+    plan = writer.write_to_gsheets(example_data, 'test', max_cells_per_sheet=10, schema='infer', dry_run=True)
+    report = writer.write_to_gsheets(example_data, 'test', max_cells_per_sheet=10, schema='infer')
+    assert backend.sheet_values('test_1', 'test_1') == [
+        ['id', 'price', 'paid', 'day', 'name'], [1, 0.5, False, 43831, 'n_1'], [2, 1.0, True, 43832, 'n_2'],
+    ]
+    assert backend.sheet_formats('test_1', 'test_1') == date_format
+    assert backend.sheet_formats('test_1', 'test_3') == date_format
+    assert report.write_requests == plan.write_requests
+
+    # Test a sync sends the formats along with the changed blocks
+    writer.write_to_gsheets(example_data, 'synced', mode='sync', schema={'id': 'int', 'day': 'date'})
+    assert backend.sheet_values('synced_1', 'synced_1')[1] == [1, '0.5', 'False', 43831, 'n_1']
+    assert backend.sheet_formats('synced_1', 'synced_1') == date_format
+
+    # Test streams infer their schema from their first records
+    writer.write_to_gsheets(iter(example_data), 'stream', schema='infer')
+    assert backend.sheet_values('stream_1', 'stream_1')[5] == [5, 2.5, False, 43835, 'n_5']
+    assert backend.sheet_formats('stream_1', 'stream_1') == date_format
+
+
+@pytest.mark.parametrize('use_manifest_path', [False, True])
+def test_write_to_gsheets_sync_after_overwrite(tmp_path, use_manifest_path):
+    backend = FakeSheetsBackend()
+    writer = GoogleSheetsWriter(
+        client=backend.client(), read_requests_per_minute=60_000, write_requests_per_minute=60_000
+    )
+    manifest_path = str(tmp_path / 'manifests.json') if use_manifest_path else None
+    data_a = [{'A': f'a_{i}'} for i in range(1, 6)]
+    data_b = [{'A': f'b_{i}'} for i in range(1, 6)]
+    expected_a = [['A']] + [[record['A']] for record in data_a]
+
+    # Test a sync after an overwrite of other data rewrites the workbook instead of trusting its manifests
+    writer.write_to_gsheets(data_a, 'test', mode='sync', block_size=2, manifest_path=manifest_path)
+    writer.write_to_gsheets(data_b, 'test', manifest_path=manifest_path)
+    writer.write_to_gsheets(data_a, 'test', mode='sync', block_size=2, manifest_path=manifest_path)
+    assert backend.sheet_values('test_1', 'test_1') == expected_a
+
+    # Test the same goes after an append
+    writer.write_to_gsheets(data_b, 'test', mode='append', manifest_path=manifest_path)
+    writer.write_to_gsheets(data_a, 'test', mode='sync', block_size=2, manifest_path=manifest_path)
+    assert backend.sheet_values('test_1', 'test_1') == expected_a
+
+    # Test an unchanged sync is still a no-op
+    backend.reset_metrics()
+    writer.write_to_gsheets(data_a, 'test', mode='sync', block_size=2, manifest_path=manifest_path)
+    assert backend.metrics()['write_requests'] == 0
+
+
+def test_write_to_gsheets_cursor():
+    backend = FakeSheetsBackend()
+    writer = GoogleSheetsWriter(
+        client=backend.client(), read_requests_per_minute=60_000, write_requests_per_minute=60_000
+    )
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE example (A TEXT, B INTEGER)')
+    connection.executemany('INSERT INTO example VALUES (?, ?)', [(f'a_{i}', i) for i in range(1, 26)])
+
+    # Test a cursor, which can only be used by the thread that created it, streams with the default prefetch
+    cursor = connection.execute('SELECT A, B FROM example ORDER BY B')
+    report = writer.write_to_gsheets(cursor, 'test', chunk_size=4, chunk_bytes=None)
+    assert report.records_written == 25
+    assert backend.sheet_values('test_1', 'test_1')[1:3] == [['a_1', '1'], ['a_2', '2']]
+    assert backend.sheet_values('test_1', 'test_1')[-1] == ['a_25', '25']
+
+
+def test_write_to_gsheets_empty_stream():
+    backend = FakeSheetsBackend()
+    writer = GoogleSheetsWriter(client=backend.client())
+
+    # Test an empty stream writes nothing, with or without headers
+    assert writer.write_to_gsheets(iter([]), 'test').records_written == 0
+    assert writer.write_to_gsheets(iter([]), 'test', headers=['A']).records_written == 0
+    assert backend.spreadsheets == {}
+
+    # Test a stream of tuples needs headers
+    with pytest.raises(ValueError, match='Headers are required'):
+        writer.write_to_gsheets(iter([('a', 'b')]), 'test')
+    writer.write_to_gsheets(iter([('a', 'b')]), 'test', headers=['A', 'B'])
+    assert backend.sheet_values('test_1', 'test_1') == [['A', 'B'], ['a', 'b']]
+
+
+def test_write_to_gsheets_registry(tmp_path):
+    backend = FakeSheetsBackend()
+    path = str(tmp_path / 'registry.json')
+    example_data = [{'A': f'a_{i}', 'B': f'b_{i}'} for i in range(1, 4)]
+
+    def make_writer(check_interval=86_400):
+        # Every run starts cold, like a new process, with only the registry file to go on
+        return GoogleSheetsWriter(
+            client=backend.client(), registry=WorkbookRegistry(path, check_interval=check_interval)
+        )
+
+    make_writer().write_to_gsheets(example_data, 'test')
+    spreadsheet_id = WorkbookRegistry(path).get('test_1')
+    assert backend.spreadsheets[spreadsheet_id]['title'] == 'test_1'
+
+    # Test a later run opens the workbook by ID, without a Drive search or a trash check
+    backend.requests.clear()
+    make_writer().write_to_gsheets(example_data, 'test')
+    assert ('GET', f'/spreadsheets/{spreadsheet_id}') in backend.requests
+    assert ('GET', f'/files/{spreadsheet_id}') not in backend.requests
+    assert [method for method, request_path in backend.requests if request_path == '/files'] == ['GET']  # Cleanup
+
+    # Test the trash is checked once the check interval has passed
+    backend.requests.clear()
+    make_writer(check_interval=0).write_to_gsheets(example_data, 'test')
+    assert backend.requests.count(('GET', f'/files/{spreadsheet_id}')) == 1
+
+    # Test a renamed workbook is searched for by name and its entry repaired
+    backend.spreadsheets[spreadsheet_id]['title'] = 'renamed'
+    make_writer().write_to_gsheets(example_data, 'test')
+    assert WorkbookRegistry(path).get('test_1') not in (None, spreadsheet_id)
+
+    # Test a workbook moved to the trash, which can still be opened by ID, is recreated and its entry repaired
+    trashed_id = WorkbookRegistry(path).get('test_1')
+    backend.spreadsheets[trashed_id]['trashed'] = True
+    backend.requests.clear()
+    make_writer(check_interval=0).write_to_gsheets(example_data, 'test')
+    assert WorkbookRegistry(path).get('test_1') not in (None, trashed_id)
+    assert not [request for request in backend.requests if trashed_id in request[1] and request[0] != 'GET']
+    assert backend.sheet_values('test_1', 'test_1')[1] == ['a_1', 'b_1']
+    del backend.spreadsheets[trashed_id]
+
+    # Test a deleted workbook is recreated and its entry repaired
+    del backend.spreadsheets[WorkbookRegistry(path).get('test_1')]
+    make_writer().write_to_gsheets(example_data, 'test')
+    assert backend.sheet_values('test_1', 'test_1')[1] == ['a_1', 'b_1']
+    assert WorkbookRegistry(path).get('test_1') == next(
+        i for i, spreadsheet in backend.spreadsheets.items() if spreadsheet['title'] == 'test_1'
+    )
+
+
+def test_read_from_gsheets():
+    backend = FakeSheetsBackend()
+    writer = GoogleSheetsWriter(
+        client=backend.client(), read_requests_per_minute=60_000, write_requests_per_minute=60_000
+    )
+    example_data = [{'A': f'a_{i}', 'B': str(i) if i % 3 else None} for i in range(1, 8)]
+    writer.write_to_gsheets(example_data, 'test', max_cells_per_sheet=6, max_cells_per_workbook=12)
+    backend.create_spreadsheet('test_other')
+
+    # Test every workbook and worksheet is read back in order, with one header
+    backend.reset_metrics()
+    reader = GoogleSheetsWriter(client=backend.client())
+    frame = reader.read_from_gsheets('test', chunk_size=2, max_workers=3)
+    pd.testing.assert_frame_equal(frame, pd.DataFrame(example_data))
+    # One listing, two lookups per workbook and one batchGet per chunk of 2 rows
+    assert backend.metrics()['read_requests'] == 1 + 2 * 2 + 4
+
+    # Test reading chunk by chunk
+    chunks = list(reader.read_from_gsheets('test', chunk_size=4, iterator=True))
+    assert [len(chunk) for chunk in chunks] == [4, 2, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), frame)
+
+    # Test quotes in worksheet titles are escaped in the ranges read
+    writer.write_to_gsheets(example_data, "it's", max_cells_per_sheet=6)
+    pd.testing.assert_frame_equal(reader.read_from_gsheets("it's", chunk_size=2), frame)
+
+    with pytest.raises(gspread.exceptions.SpreadsheetNotFound):
+        reader.read_from_gsheets('missing')
+
+
+def test_write_to_gsheets_csv_engine():
+    example_data = [{'A': f'a_{i}', 'B': str(i) if i % 3 else None} for i in range(1, 8)]
+    backend = FakeSheetsBackend()
+    writer = GoogleSheetsWriter(
+        client=backend.client(), user_email='me@example.com',
+        read_requests_per_minute=60_000, write_requests_per_minute=60_000,
+    )
+    expected_backend = FakeSheetsBackend()
+    GoogleSheetsWriter(client=expected_backend.client()).write_to_gsheets(
+        example_data, 'test', max_cells_per_sheet=6, max_cells_per_workbook=12
+    )
+
+    # Test fresh workbooks are bulk loaded with the same worksheets and values as the values engine
+    report = writer.write_to_gsheets(
+        example_data, 'test', max_cells_per_sheet=6, max_cells_per_workbook=12, engine='csv'
+    )
+    titles = sorted(spreadsheet['title'] for spreadsheet in backend.spreadsheets.values())
+    assert titles == sorted(spreadsheet['title'] for spreadsheet in expected_backend.spreadsheets.values())
+    for title in titles:
+        assert backend.sheet_titles(title) == expected_backend.sheet_titles(title)
+        for sheet_title in backend.sheet_titles(title):
+            assert backend.sheet_values(title, sheet_title) == expected_backend.sheet_values(title, sheet_title)
+        for sheet in backend.spreadsheet_by_title(title)['sheets']:
+            grid = sheet['properties']['gridProperties']
+            assert (grid['rowCount'], grid['columnCount']) == (len(sheet['values']), 2)
+
+    # Test every workbook is shared, no values updates are sent and the upload is reported
+    assert [permission['emailAddress'] for _, permission in backend.permissions] == ['me@example.com'] * len(titles)
+    assert report.records_written == len(example_data)
+    assert report.bytes_sent > 0
+    assert 'upload_piece' in report.api_calls
+    assert 'upload' not in report.api_calls
+
+    # Test the sheets of the converted spreadsheets are looked up and copied through the scheduler
+    assert report.api_calls['get_worksheet'] == 3  # One per worksheet
+    assert report.api_calls['copy_to'] == 1  # The second worksheet of "test_1"
+
+    # Test workbooks that already exist are written with the values API
+    report = writer.write_to_gsheets(
+        example_data, 'test', max_cells_per_sheet=6, max_cells_per_workbook=12, engine='csv'
+    )
+    assert 'upload_piece' not in report.api_calls
+    assert report.records_written == len(example_data)
+
+    with pytest.raises(ValueError):
+        writer.write_to_gsheets(example_data, 'test', engine='xlsx')
+    with pytest.raises(ValueError):
+        writer.write_to_gsheets(example_data, 'test', mode='sync', engine='csv')
+    with pytest.raises(ValueError):
+        writer.write_to_gsheets(iter(example_data), 'test', engine='csv')
+
+
+def test_write_to_gsheets_pool():
+    example_data = [{'A': f'a_{i}', 'B': str(i)} for i in range(1, 21)]
+    backends = [FakeSheetsBackend(), FakeSheetsBackend()]  # One per service account, each sees its own files
+    writer = GoogleSheetsWriter(
+        user_email='me@example.com',
+        credentials=[backend.client() for backend in backends],
+        read_requests_per_minute=60_000,
+        write_requests_per_minute=60_000,
+    )
+
+    # Test workbooks are dealt out in turn, written by their client and shared
+    report = writer.write_to_gsheets(example_data, 'test', max_cells_per_sheet=6, max_cells_per_workbook=12)
+    assert [sorted(s['title'] for s in backend.spreadsheets.values()) for backend in backends] == [
+        ['test_1', 'test_3'], ['test_2', 'test_4']
+    ]
+    assert [len(backend.permissions) for backend in backends] == [2, 2]
+    assert report.records_written == len(example_data)
+    assert [metrics['write_requests'] > 0 for metrics in writer.pool_metrics()] == [True, True]
+
+    # Test existing workbooks stay with their client, and each client removes its extra workbooks
+    writer.pool_strategy = 'least_loaded'
+    writer.write_to_gsheets(example_data[:12], 'test', max_cells_per_sheet=6, max_cells_per_workbook=12)
+    assert [sorted(s['title'] for s in backend.spreadsheets.values()) for backend in backends] == [
+        ['test_1'], ['test_2']
+    ]
+    assert backends[1].sheet_values('test_2', 'test_1') == [['A', 'B'], ['a_7', '7'], ['a_8', '8'], ['a_9', '9']]
+
+    with pytest.raises(ValueError):
+        writer.write_to_gsheets(example_data, 'test', mode='append')
+    with pytest.raises(ValueError):
+        writer.write_to_gsheets(example_data, 'test', max_processes=2)  # Clients can't be sent to processes
+
+
+def test_write_to_gsheets_pool_processes(sheets_server):
+    example_data = [{'A': f'a_{i}', 'B': str(i)} for i in range(1, 21)]
+    writer = GoogleSheetsWriter(
+        credentials=[partial(server_client, sheets_server.url)] * 2,
+        read_requests_per_minute=60_000,
+        write_requests_per_minute=60_000,
+    )
+
+    # Test every client writes its workbooks in a worker process, and their reports are merged
+    report = writer.write_to_gsheets(
+        example_data, 'test', max_cells_per_sheet=6, max_cells_per_workbook=12, max_processes=2
+    )
+    backend = sheets_server.backend
+    assert sorted(s['title'] for s in backend.spreadsheets.values()) == ['test_1', 'test_2', 'test_3', 'test_4']
+    written = [
+        row
+        for i in range(1, 5)
+        for title in backend.sheet_titles(f'test_{i}')
+        for row in backend.sheet_values(f'test_{i}', title)[1:]
+    ]
+    assert written == [[row['A'], row['B']] for row in example_data]
+    assert report.records_written == len(example_data)
+    assert report.api_calls['list_workbooks'] >= 2
+
+
+def test_write_many():
+    backend = FakeSheetsBackend()
+    writer = GoogleSheetsWriter(client=backend.client())
+    datasets = {
+        f'report_{i}': [{'Name': f'name_{j}', 'Value': str(i * j)} for j in range(i)] for i in range(1, 41)
+    }
+    datasets['frame'] = pd.DataFrame({'A': [1, 2], 'B': ['x', None]})
+    datasets['empty'] = []
+
+    # Test every dataset lands in its own worksheet of one workbook, with a handful of requests
+    report = writer.write_many(datasets, 'reports', headers={'empty': ['C']})
+    assert backend.sheet_titles('reports') == list(datasets)
+    assert backend.sheet_values('reports', 'report_3') == [
+        ['Name', 'Value'], ['name_0', '0'], ['name_1', '3'], ['name_2', '6']
+    ]
+    assert backend.sheet_values('reports', 'frame') == [['A', 'B'], ['1', 'x'], ['2', None]]
+    assert backend.sheet_values('reports', 'empty') == [['C']]
+    assert report.api_calls == {
+        'open': 1, 'create': 1, 'share': 1, 'worksheets': 1, 'batch_update': 1, 'values_batch_update': 1,
+    }
+    assert report.records_written == sum(len(data) for data in datasets.values())
+
+    # Test a rerun clears and resizes the worksheets, keeps other ones, and packs values by the payload budget
+    backend.create_spreadsheet('other')
+    writer.create_worksheet('reports', 'notes', num_rows=5, num_cols=2)
+    datasets = {'report_1': [{'Name': 'name', 'Value': 'x' * 100}] * 20, 'report_2': [{'Name': 'only'}]}
+    report = writer.write_many(datasets, 'reports', chunk_bytes=1_000)
+    assert backend.sheet_values('reports', 'report_2') == [['Name'], ['only']]
+    assert 'notes' in backend.sheet_titles('reports')
+    assert len(backend.sheet_values('reports', 'report_1')) == 21
+    assert report.api_calls['values_batch_update'] > 1
+    assert report.api_calls['batch_update'] == 1
+
+    # Test worksheets named like partitions of the workbook are kept too
+    writer.write_many({'rep_1': [{'A': 'a'}], 'summary': [{'B': 'b'}]}, 'rep')
+    writer.write_many({'summary': [{'B': 'c'}]}, 'rep')
+    assert backend.sheet_titles('rep') == ['rep_1', 'summary']
+    assert backend.sheet_values('rep', 'rep_1') == [['A'], ['a']]
+
+    with pytest.raises(ValueError):
+        writer.write_many({'big': [{'A': 'a'}] * 20}, 'reports', max_cells_per_workbook=10)
+    with pytest.raises(ValueError):
+        writer.write_many({'stream': iter([{'A': 'a'}])}, 'reports')
+    with pytest.raises(ValueError):
+        writer.write_many({}, 'reports')
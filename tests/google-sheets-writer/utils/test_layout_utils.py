@@ -0,0 +1,117 @@
+from google_sheets_writer.utils.layout_utils import (
+    is_partition_title,
+    is_repeatable,
+    number_format_requests,
+    partition_append,
+    partition_files_query,
+    plan_layout,
+    plan_reads,
+    stale_partitions,
+    workbook_files_query,
+)
+
+
+def test_is_partition_title():
+    assert is_partition_title('my_data_1', 'my_data') is True
+    assert is_partition_title('my_data_12', 'my_data') is True
+    assert is_partition_title('my_data_x', 'my_data') is False
+    assert is_partition_title('my_data', 'my_data') is False
+    assert is_partition_title('other_data_1', 'my_data') is False
+    assert is_partition_title('Sheet1', 'my_data') is False
+
+
+def test_plan_layout():
+    # Test a new workbook (add desired sheets, then drop the default sheet)
+    requests = plan_layout(
+        existing_sheets={'Sheet1': 0},
+        desired_sheets={'my_data_1': (101, 3), 'my_data_2': (51, 3)},
+        prefix='my_data',
+    )
+    assert requests == [
+        {'addSheet': {'properties': {'title': 'my_data_1', 'gridProperties': {'rowCount': 101, 'columnCount': 3}}}},
+        {'addSheet': {'properties': {'title': 'my_data_2', 'gridProperties': {'rowCount': 51, 'columnCount': 3}}}},
+        {'deleteSheet': {'sheetId': 0}},
+    ]
+    assert is_repeatable(requests) is False  # Sending it twice would add the sheets twice
+
+    # Test an existing workbook (clear and resize, delete stale partitions even after a gap)
+    requests = plan_layout(
+        existing_sheets={'my_data_1': 10, 'my_data_3': 30, 'my_data_7': 70, 'notes': 99},
+        desired_sheets={'my_data_1': (11, 2)},
+        prefix='my_data',
+    )
+    assert requests == [
+        {'updateCells': {'range': {'sheetId': 10}, 'fields': 'userEnteredValue'}},
+        {
+            'updateSheetProperties': {
+                'properties': {'sheetId': 10, 'gridProperties': {'rowCount': 11, 'columnCount': 2}},
+                'fields': 'gridProperties(rowCount,columnCount)',
+            }
+        },
+        {'deleteSheet': {'sheetId': 30}},
+        {'deleteSheet': {'sheetId': 70}},
+    ]
+    assert is_repeatable(requests) is True
+
+    # Test a prefix of None only deletes the default sheet
+    requests = plan_layout(existing_sheets={'Sheet1': 0, 'my_data_3': 30}, desired_sheets={}, prefix=None)
+    assert requests == [{'deleteSheet': {'sheetId': 0}}]
+
+
+def test_partition_append():
+    # Test appending to nothing starts at the first worksheet of the first workbook
+    assert partition_append(3, n_cols=2, max_cells_per_sheet=4, max_cells_per_workbook=8) == {
+        1: [(1, 0, 0, 2), (2, 0, 2, 1)],
+    }
+
+    # Test the tail worksheet is filled first, then worksheets and workbooks roll over
+    assert partition_append(6, n_cols=2, max_cells_per_sheet=4, max_cells_per_workbook=8, tail=(1, 1, 1)) == {
+        1: [(1, 1, 0, 1), (2, 0, 1, 2)],
+        2: [(1, 0, 3, 2), (2, 0, 5, 1)],
+    }
+
+    # Test a full tail worksheet, and a tail workbook without worksheets
+    assert partition_append(1, n_cols=2, max_cells_per_sheet=4, max_cells_per_workbook=8, tail=(1, 2, 2)) == {
+        2: [(1, 0, 0, 1)],
+    }
+    assert partition_append(1, n_cols=2, max_cells_per_sheet=4, max_cells_per_workbook=8, tail=(3, 0, 0)) == {
+        3: [(1, 0, 0, 1)],
+    }
+    assert partition_append(0, n_cols=2, max_cells_per_sheet=4, max_cells_per_workbook=8, tail=(1, 1, 1)) == {}
+
+
+def test_number_format_requests():
+    number_format = {'type': 'DATE', 'pattern': 'yyyy-mm-dd'}
+    assert number_format_requests(7, {2: number_format}) == [{
+        'repeatCell': {
+            'range': {'sheetId': 7, 'startRowIndex': 1, 'startColumnIndex': 2, 'endColumnIndex': 3},
+            'cell': {'userEnteredFormat': {'numberFormat': number_format}},
+            'fields': 'userEnteredFormat.numberFormat',
+        }
+    }]
+    assert number_format_requests(7, {}) == []
+
+
+def test_partition_files_query():
+    assert partition_files_query('my_data') == (
+        "name contains 'my_data_' and mimeType = 'application/vnd.google-apps.spreadsheet' and trashed = false"
+    )
+    assert partition_files_query("it's").startswith("name contains 'it\\'s_' and")
+    assert workbook_files_query('my_data_1') == (
+        "name = 'my_data_1' and mimeType = 'application/vnd.google-apps.spreadsheet' and trashed = false"
+    )
+
+
+def test_stale_partitions():
+    objects = [('my_data_3', 'c'), ('my_data_1', 'a'), ('my_data_10', 'j'), ('other_data_5', 'x'), ('Sheet1', 's')]
+    assert stale_partitions(objects, 'my_data', 2) == ['c', 'j']  # Past the gap too
+    assert stale_partitions(objects, 'my_data', 1) == ['a', 'c', 'j']
+    assert stale_partitions(objects, 'my_data', 11) == []
+
+
+def test_plan_reads():
+    # Test requests are filled across worksheets, below their header rows
+    worksheets = [('a', 6, 2), ('b', 3, 2), ('c', 1, 2)]
+    assert plan_reads(worksheets, 3) == [[('a', 2, 4)], [('a', 5, 6), ('b', 2, 2)], [('b', 3, 3)]]
+    assert plan_reads(worksheets, 100) == [[('a', 2, 6), ('b', 2, 3)]]
+    assert plan_reads([('c', 1, 2)], 3) == []
@@ -1,6 +1,6 @@
 import pytest
 
-from google_sheets_writer.utils.other_utils import chunk_list
+from google_sheets_writer.utils.other_utils import batch_by_bytes, chunk_list
 from unittest.mock import MagicMock, PropertyMock, call, mock_open, patch
 
 
@@ -28,3 +28,12 @@ def test_chunk_list(benchmark, example_list_data):
     # Test chunk_size of None (no chunking)
     chunked_data = chunk_list(example_list_data, chunk_size=None)
     assert chunked_data == [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+
+
+def test_batch_by_bytes():
+    items = [('a', 40), ('b', 50), ('c', 20), ('d', 150), ('e', 10)]
+
+    # Test consecutive items are packed up to the byte budget, and oversized items are sent alone
+    assert list(batch_by_bytes(items, max_bytes=100)) == [['a', 'b'], ['c'], ['d'], ['e']]
+    assert list(batch_by_bytes(items, max_bytes=1_000)) == [['a', 'b', 'c', 'd', 'e']]
+    assert list(batch_by_bytes([], max_bytes=100)) == []
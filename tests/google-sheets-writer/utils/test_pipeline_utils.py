@@ -0,0 +1,102 @@
+import threading
+import pytest
+
+from google_sheets_writer.utils.pipeline_utils import map_in_pool, prefetch, run_in_pool
+
+
+def test_prefetch():
+    # Test results are yielded in order, with and without a background thread
+    assert list(prefetch(range(10), lambda x: x * 2, depth=3)) == [x * 2 for x in range(10)]
+    assert list(prefetch(range(10), lambda x: x * 2, depth=0)) == [x * 2 for x in range(10)]
+
+    # Test work runs in a background thread, while items are pulled in the calling thread
+    threads = set()
+    pulling_threads = set()
+
+    def items():
+        for i in range(3):
+            pulling_threads.add(threading.current_thread())
+            yield i
+
+    list(prefetch(items(), lambda x: threads.add(threading.current_thread().name), depth=1))
+    assert len(threads) == 1 and threads.pop().startswith('prefetch')
+    assert pulling_threads == {threading.current_thread()}
+
+
+def test_prefetch_is_bounded():
+    # Test the producer never gets more than depth items ahead of the consumer
+    produced = []
+    consumed = 0
+    depth = 2
+    for _ in prefetch(range(20), produced.append, depth=depth):
+        consumed += 1
+        # One queued per depth slot, plus one being produced while the queue is full
+        assert len(produced) <= consumed + depth + 1
+
+
+def test_prefetch_errors():
+    # Test producer errors are raised in the consumer
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError('bad chunk')
+        return x
+
+    results = []
+    with pytest.raises(ValueError, match='bad chunk'):
+        for result in prefetch(range(10), fail_on_three, depth=2):
+            results.append(result)
+    assert results == [0, 1, 2]
+
+    # Test consumer errors stop the producer
+    pulled = []
+
+    def items():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    with pytest.raises(RuntimeError):
+        for result in prefetch(items(), lambda x: x, depth=2):
+            if result == 1:
+                raise RuntimeError('upload failed')
+    assert len(pulled) < 10
+
+
+def test_run_in_pool():
+    # Test results are returned in task order, sequentially and in parallel
+    tasks = [(i, i) for i in range(20)]
+    assert run_in_pool(lambda a, b: a + b, tasks) == [i * 2 for i in range(20)]
+    assert run_in_pool(lambda a, b: a + b, tasks, max_workers=4) == [i * 2 for i in range(20)]
+
+    # Test tasks run concurrently
+    barrier = threading.Barrier(3, timeout=5)
+    assert run_in_pool(lambda i: barrier.wait() is not None, [(i,) for i in range(3)], max_workers=3) == [True] * 3
+
+    # Test errors are re-raised
+    def fail_on_three(i):
+        if i == 3:
+            raise ValueError('bad task')
+        return i
+
+    with pytest.raises(ValueError, match='bad task'):
+        run_in_pool(fail_on_three, [(i,) for i in range(10)], max_workers=2)
+
+
+def test_map_in_pool():
+    # Test results are yielded in order, sequentially and in parallel
+    assert list(map_in_pool(lambda x: x * 2, range(20))) == [x * 2 for x in range(20)]
+    assert list(map_in_pool(lambda x: x * 2, range(20), max_workers=4)) == [x * 2 for x in range(20)]
+
+    # Test items run concurrently
+    barrier = threading.Barrier(3, timeout=5)
+    assert list(map_in_pool(lambda i: barrier.wait() is not None, range(3), max_workers=3)) == [True] * 3
+
+    # Test no more than max_workers items are pulled ahead of the consumer
+    pulled = []
+    results = map_in_pool(lambda x: x, (pulled.append(i) or i for i in range(100)), max_workers=3)
+    assert next(results) == 0
+    assert len(pulled) == 3
+    results.close()
+
+    with pytest.raises(ZeroDivisionError):
+        list(map_in_pool(lambda x: 1 / x, [2, 1, 0, 4], max_workers=2))
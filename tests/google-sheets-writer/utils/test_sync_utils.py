@@ -0,0 +1,98 @@
+import json
+
+from google_sheets_writer.utils.sync_utils import (
+    MANIFEST_KEY,
+    block_hashes,
+    build_manifest,
+    drop_manifests,
+    hash_block,
+    is_compatible,
+    load_manifests,
+    manifest_requests,
+    parse_manifests,
+    save_manifests,
+    update_cells_request,
+)
+
+
+def test_hash_block():
+    assert hash_block([['a', 'b'], ['c', None]]) == hash_block([['a', 'b'], ['c', None]])
+    assert hash_block([['a', 'b'], ['c', None]]) != hash_block([['a', 'b'], ['c', '']])
+    assert hash_block([['ab', 'c']]) != hash_block([['a', 'bc']])
+    assert len(hash_block([])) == 8
+
+
+def test_manifest():
+    manifest = build_manifest(['A', 'B'], start=10, n_records=5, block_size=2, hashes=['aaaaaaaa', 'bbbbbbbb'])
+    assert block_hashes(manifest) == ['aaaaaaaa', 'bbbbbbbb']
+
+    # Test the layout must be unchanged for a manifest to be diffed against
+    assert is_compatible(manifest, ['A', 'B'], start=10, block_size=2) is True
+    assert is_compatible(manifest, ['A', 'C'], start=10, block_size=2) is False
+    assert is_compatible(manifest, ['A', 'B'], start=11, block_size=2) is False
+    assert is_compatible(manifest, ['A', 'B'], start=10, block_size=3) is False
+    assert is_compatible(None, ['A', 'B'], start=10, block_size=2) is False
+
+
+def test_update_cells_request():
+    assert update_cells_request(5, 3, [['a', None]]) == {
+        'updateCells': {
+            'rows': [{'values': [{'userEnteredValue': {'stringValue': 'a'}}, {}]}],
+            'start': {'sheetId': 5, 'rowIndex': 3, 'columnIndex': 0},
+            'fields': 'userEnteredValue',
+        }
+    }
+
+    # Test typed values keep their type
+    assert update_cells_request(5, 3, [[1, 1.5, True]])['updateCells']['rows'] == [{'values': [
+        {'userEnteredValue': {'numberValue': 1}},
+        {'userEnteredValue': {'numberValue': 1.5}},
+        {'userEnteredValue': {'boolValue': True}},
+    ]}]
+
+
+def test_developer_metadata():
+    manifest = build_manifest(['A'], start=0, n_records=1, block_size=1, hashes=['aaaaaaaa'])
+    metadata = {
+        'sheets': [
+            {
+                'properties': {'sheetId': 1, 'title': 'test_1'},
+                'developerMetadata': [
+                    {'metadataId': 11, 'metadataKey': 'other', 'metadataValue': '{}'},
+                    {'metadataId': 12, 'metadataKey': MANIFEST_KEY, 'metadataValue': json.dumps(manifest)},
+                ],
+            },
+            {'properties': {'sheetId': 2, 'title': 'test_2'}},
+        ]
+    }
+    existing = parse_manifests(metadata)
+    assert existing == {'test_1': (manifest, 12)}
+
+    # Test existing manifests are updated, new ones created and oversized ones dropped
+    too_large = build_manifest(['A'], start=0, n_records=1, block_size=1, hashes=['aaaaaaaa'] * 5_000)
+    requests, dropped = manifest_requests(
+        sheet_ids={'test_1': 1, 'test_2': 2},
+        manifests={'test_1': manifest, 'test_2': manifest},
+        existing=existing,
+    )
+    assert dropped == []
+    assert requests[0]['updateDeveloperMetadata']['dataFilters'] == [{'developerMetadataLookup': {'metadataId': 12}}]
+    assert requests[1]['createDeveloperMetadata']['developerMetadata']['location'] == {'sheetId': 2}
+    assert requests[1]['createDeveloperMetadata']['developerMetadata']['metadataKey'] == MANIFEST_KEY
+    requests, dropped = manifest_requests(sheet_ids={'test_1': 1}, manifests={'test_1': too_large}, existing=existing)
+    assert dropped == ['test_1']
+    assert requests == [{'deleteDeveloperMetadata': {'dataFilter': {'developerMetadataLookup': {'metadataId': 12}}}}]
+
+
+def test_local_manifests(tmp_path):
+    path = str(tmp_path / 'manifests.json')
+    manifest = build_manifest(['A'], start=0, n_records=1, block_size=1, hashes=['aaaaaaaa'])
+    assert load_manifests(path) == {}
+    save_manifests(path, 'test_1', {'test_1': manifest})
+    save_manifests(path, 'test_2', {})
+    assert load_manifests(path) == {'test_1': {'test_1': manifest}, 'test_2': {}}
+
+    # Test the manifests of every partition of a workbook name are dropped, and only those
+    save_manifests(path, 'test_x_1', {})
+    drop_manifests(path, 'test')
+    assert load_manifests(path) == {'test_x_1': {}}